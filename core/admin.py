@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.forms import UserChangeForm, UserCreationForm, AuthenticationForm as DjangoAuthenticationForm
 from django import forms # Importa o módulo forms para ValidationError
+from .busca import BuscaIndexadaMixin
 from .models import Usuario
 
 # 1. Crie um formulário personalizado para ALTERAR um usuário no admin
@@ -57,7 +58,7 @@ class CustomAdminAuthenticationForm(DjangoAuthenticationForm):
         return super().clean()
 
 @admin.register(Usuario)
-class UsuarioAdmin(UserAdmin):
+class UsuarioAdmin(BuscaIndexadaMixin, UserAdmin):
     # 4. Associe os formulários personalizados ao seu UserAdmin
     form = CustomUserChangeForm
     add_form = CustomUserCreationForm
@@ -95,45 +96,150 @@ admin.site.login_form = CustomAdminAuthenticationForm
 
 
 from django.contrib import admin
-from .models import Aposta
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponseNotAllowed, HttpResponseRedirect
+from django.urls import path, reverse
+from .models import Aposta, Evento, RelatorioFinanceiro
+from .exportacao import resposta_csv, resposta_xlsx
+from .paginacao import ChangeListKeyset, PaginadorEstimado
+from .relatorios import idade_maxima, relatorio_do_admin
+from .transicoes import transicionar
+
+def _transicionar_selecionadas(modeladmin, request, queryset, novo_status):
+    # Um UPDATE condicional por lote; o Pote e os resumos são atualizados na mesma transação
+    resultado = transicionar(queryset.order_by().values_list('pk', flat=True), novo_status)
+    modeladmin.message_user(
+        request,
+        f"{resultado.aplicadas} aposta(s) alterada(s) para '{novo_status}', "
+        f"{resultado.ignoradas} ignorada(s) por não permitirem a transição.",
+    )
+
 
 def validar_aposta(modeladmin, request, queryset):
-    queryset.update(status='valida')
+    _transicionar_selecionadas(modeladmin, request, queryset, 'valida')
+
+
+def rejeitar_aposta(modeladmin, request, queryset):
+    _transicionar_selecionadas(modeladmin, request, queryset, 'rejeitada')
+
+
+
+@admin.register(Evento)
+class EventoAdmin(admin.ModelAdmin):
 
+    list_display = ('nome', 'status', 'taxa', 'chave_pix_recebedor', 'criado_em')
 
-def rejeitar_aposta(modeladmin, request, queyset):
-    queyset.update(status='rejeitada')
+    list_filter = ('status',)
 
+    search_fields = ('nome',)
+
+    def get_readonly_fields(self, request, obj=None):
+        readonly = super().get_readonly_fields(request, obj)
+        if obj is not None and obj.taxa_travada():
+            return (*readonly, 'taxa')
+        return readonly
+
+
+def evento_filtrado(request):
+    """
+    Evento selecionado no filtro lateral do changelist (None: o evento padrão, também
+    para um id inválido ou de um evento que não existe mais).
+    """
+    evento = request.GET.get('evento__id__exact')
+    if not evento or not evento.isdigit() or not Evento.objects.filter(pk=int(evento)).exists():
+        return None
+    return int(evento)
 
 
 @admin.register(Aposta)
-class ApostaAdmin(admin.ModelAdmin):
-    
-    list_display = ('usuario', 'data_aposta','sexo_escolha', 'valor_aposta', 'status')
+class ApostaAdmin(BuscaIndexadaMixin, admin.ModelAdmin):
+
+    list_display = ('usuario', 'evento', 'data_aposta','sexo_escolha', 'valor_aposta', 'status')
 
-    list_filter = ('status', 'sexo_escolha')
+    list_filter = ('evento', 'status', 'sexo_escolha')
 
     search_fields = ('usuario__nome', 'status')
 
+    # A busca por nome passa antes pelo índice de usuários (core/busca.py)
+    campo_usuario = 'usuario'
+
     ordering = ('-data_aposta',)
 
+    # Modo para tabelas grandes: usuário e evento no mesmo SELECT da página, contagem
+    # estimada acima de ADMIN_CONTAGEM_EXATA_ATE e navegação por cursor (core/paginacao.py)
+    list_select_related = ('usuario', 'evento')
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+
     fieldsets = (
-    (None, {'fields': ('usuario', 'sexo_escolha', 'valor_aposta', 'valor_para_pote', 'status')}),
+    (None, {'fields': ('evento', 'usuario', 'sexo_escolha', 'valor_aposta', 'valor_para_pote', 'status')}),
     ('Opções de Status', {'fields': ('ativo', 'is_active', 'is_staff', 'is_superuser')}),
     )
 
       # Exemplo de como você pode adicionar o relatório em uma página customizada
     def changelist_view(self, request, extra_context=None):
-        # Pega o relatório financeiro
-        relatorio = Aposta.objects.get_relatorio_financeiro()
+        # Pega o relatório financeiro pré-calculado do evento filtrado (ver core/relatorios.py)
+        relatorio, atualizando = relatorio_do_admin(evento_filtrado(request))
         # Adiciona o relatório financeiro ao contexto
         extra_context = extra_context or {}
-        extra_context['relatorio_financeiro'] = relatorio
+        extra_context['relatorio_financeiro'] = relatorio.dados
+        extra_context['relatorio_gerado_em'] = relatorio.gerado_em
+        extra_context['relatorio_atualizando'] = atualizando
+        extra_context['relatorio_idade_maxima'] = int(idade_maxima().total_seconds())
 
         return super().changelist_view(request, extra_context=extra_context)
     
     actions = [validar_aposta, rejeitar_aposta]
 
+    def get_changelist(self, request, **kwargs):
+        return ChangeListKeyset
+
+    def get_urls(self):
+        """
+        Adiciona as URLs de exportação (CSV/XLSX) das apostas e do relatório financeiro.
+        """
+        urls = [
+            path('exportar/csv/', self.admin_site.admin_view(self.exportar_csv), name='core_aposta_exportar_csv'),
+            path('exportar/xlsx/', self.admin_site.admin_view(self.exportar_xlsx), name='core_aposta_exportar_xlsx'),
+            path('relatorio/atualizar/', self.admin_site.admin_view(self.atualizar_relatorio),
+                 name='core_aposta_atualizar_relatorio'),
+        ]
+        return urls + super().get_urls()
+
+    def _apostas_exportadas(self, request):
+        """
+        Apostas e evento da exportação: sem filtro, as do evento padrão, o mesmo do
+        relatório financeiro que acompanha o arquivo.
+        """
+        evento = evento_filtrado(request) or Evento.objects.padrao().pk
+        return self.get_queryset(request).filter(evento_id=evento), evento
+
+    def exportar_csv(self, request):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        apostas, evento = self._apostas_exportadas(request)
+        return resposta_csv(apostas, evento=evento)
+
+    def exportar_xlsx(self, request):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        apostas, evento = self._apostas_exportadas(request)
+        return resposta_xlsx(apostas, evento=evento)
+
+    def atualizar_relatorio(self, request):
+        """
+        Recalcula na hora o relatório financeiro do evento filtrado e volta ao changelist.
+        """
+        if request.method != 'POST':
+            return HttpResponseNotAllowed(['POST'])
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        evento = evento_filtrado(request)
+        RelatorioFinanceiro.objects.atualizar(evento)
+        self.message_user(request, "Relatório financeiro atualizado.")
+        url = reverse('admin:core_aposta_changelist')
+        return HttpResponseRedirect(f'{url}?evento__id__exact={evento}' if evento else url)
+
     def save_model(self, request, obj, form, change):
         """
         Override save_model to handle any custom saving logic.
@@ -4,4 +4,12 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
-    
\ No newline at end of file
+
+    def ready(self):
+        # Registra os receivers que mantêm o Pote, os resumos e o cache consolidados
+        from . import signals  # noqa: F401
+
+        # Mede as consultas SQL de cada requisição (ver core/middleware.py)
+        from django.db.backends.signals import connection_created
+        from .metricas import instalar_medicao
+        connection_created.connect(instalar_medicao, dispatch_uid='metricas_execute_wrapper')
@@ -0,0 +1,137 @@
+"""
+Busca indexada do admin por nome e telefone do usuário.
+
+A busca padrão do admin vira um `LIKE '%termo%'` por campo de search_fields, o que
+varre a tabela inteira (e, nas apostas, o JOIN com os usuários). Aqui cada termo da
+busca, dividido como o admin divide, seleciona antes os usuários candidatos por um
+índice, e a busca padrão roda só sobre eles; o resultado é o mesmo de antes:
+
+- MySQL: índice FULLTEXT com parser ngram em core_usuario (nome, telefone), criado
+  pela migração 0017, consultado por frase em BOOLEAN MODE;
+- demais bancos: a tabela TrigramaUsuario, com os trigramas do nome (sem acentos e em
+  minúsculas) e do telefone de cada usuário; cada termo usa os seus trigramas mais
+  raros, e um termo só com trigramas muito comuns fica sem restrição.
+
+O telefone entra no mesmo índice: um termo com dígitos acha o número pelo começo
+(como a equipe costuma digitar) e também pelo meio, como a busca de hoje.
+Termos com menos de 3 caracteres seguem só pela busca padrão.
+"""
+import unicodedata
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count, FloatField
+from django.db.models.expressions import RawSQL
+from django.utils.text import smart_split, unescape_string_literal
+
+TAMANHO_TRIGRAMA = 3
+
+# Trigramas usados por termo e quantos usuários um trigrama pode ter para ainda restringir a busca
+TRIGRAMAS_POR_TERMO = 3
+LIMITE_FREQUENCIA = 5000
+
+# Campos de Usuario cobertos pelos índices de busca
+CAMPOS_INDEXADOS = ('nome', 'telefone')
+
+
+def normalizar(texto):
+    """
+    Minúsculas e sem acentos, para que o índice encontre tudo que o `icontains` do banco
+    encontraria (o MySQL também ignora acentos nas collations *_ci).
+    """
+    decomposto = unicodedata.normalize('NFKD', texto.lower())
+    return ''.join(caractere for caractere in decomposto if not unicodedata.combining(caractere))
+
+
+def trigramas(texto):
+    texto = normalizar(texto)
+    return {texto[i:i + TAMANHO_TRIGRAMA] for i in range(len(texto) - TAMANHO_TRIGRAMA + 1)}
+
+
+def trigramas_do_usuario(nome, telefone):
+    return trigramas(nome) | trigramas(telefone)
+
+
+def termos_da_busca(termo_busca):
+    """
+    Divide a busca como ModelAdmin.get_search_results: por espaços, respeitando aspas.
+    """
+    for termo in smart_split(termo_busca):
+        if termo.startswith(('"', "'")) and termo[0] == termo[-1]:
+            termo = unescape_string_literal(termo)
+        yield termo
+
+
+def usar_fulltext(using='default'):
+    return connections[using].vendor == 'mysql' and getattr(settings, 'BUSCA_FULLTEXT', True)
+
+
+def usuarios_candidatos(termo, using='default'):
+    """
+    Ids dos usuários cujo nome ou telefone pode conter o termo (um superconjunto dos que
+    contêm), ou None quando o termo é curto ou comum demais para o índice ajudar.
+    """
+    from .models import TrigramaUsuario, Usuario
+
+    if len(normalizar(termo)) < TAMANHO_TRIGRAMA:
+        return None
+
+    if usar_fulltext(using):
+        # Frase: os n-gramas do termo precisam aparecer em sequência
+        frase = '"{}"'.format(termo.replace('"', ' '))
+        return Usuario.objects.using(using).alias(
+            relevancia=RawSQL('MATCH (nome, telefone) AGAINST (%s IN BOOLEAN MODE)', [frase], output_field=FloatField())
+        ).filter(relevancia__gt=0).values('pk')
+
+    # Qualquer subconjunto dos trigramas dá um superconjunto válido: ficam os mais raros,
+    # medidos por contagens limitadas no índice (trigrama, usuario_id)
+    frequencias = {
+        trigrama: TrigramaUsuario.objects.using(using).filter(trigrama=trigrama)[:LIMITE_FREQUENCIA + 1].count()
+        for trigrama in trigramas(termo)
+    }
+    escolhidos = sorted(frequencias, key=frequencias.get)[:TRIGRAMAS_POR_TERMO]
+    if frequencias[escolhidos[0]] > LIMITE_FREQUENCIA:
+        return None  # Termo comum demais ("silva"): o índice não restringe nada
+    return TrigramaUsuario.objects.using(using).filter(trigrama__in=escolhidos).values('usuario_id').annotate(
+        encontrados=Count('pk')
+    ).filter(encontrados=len(escolhidos)).values('usuario_id')
+
+
+class BuscaIndexadaMixin:
+    """
+    Mixin de ModelAdmin que restringe a busca aos usuários candidatos de cada termo antes
+    de aplicar a busca padrão. `campo_usuario` aponta para o usuário a partir do modelo
+    listado ('pk' no próprio Usuario, 'usuario' nas apostas).
+
+    Um termo só é restringido quando nenhum outro campo de search_fields pode contê-lo: campos
+    com choices são verificados pelos valores possíveis; outros campos desligam a restrição.
+    """
+
+    campo_usuario = 'pk'
+
+    def get_search_results(self, request, queryset, search_term):
+        queryset, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if not search_term:
+            return queryset, may_have_duplicates
+
+        for termo in termos_da_busca(search_term):
+            if self._outros_campos_podem_conter(request, termo):
+                continue
+            candidatos = usuarios_candidatos(termo, using=queryset.db)
+            if candidatos is not None:
+                queryset = queryset.filter(**{f'{self.campo_usuario}__in': candidatos})
+        return queryset, may_have_duplicates
+
+    def _outros_campos_podem_conter(self, request, termo):
+        prefixo = '' if self.campo_usuario == 'pk' else f'{self.campo_usuario}__'
+        indexados = {prefixo + campo for campo in CAMPOS_INDEXADOS}
+        procurado = normalizar(termo)
+        for campo in self.get_search_fields(request):
+            if campo in indexados:
+                continue
+            if campo.startswith(('^', '=', '@')) or '__' in campo:
+                return True
+            choices = self.model._meta.get_field(campo).choices
+            if not choices or any(procurado in normalizar(str(valor)) for valor, _ in choices):
+                return True
+        return False
@@ -0,0 +1,148 @@
+"""
+Cache versionado do pote e das odds.
+
+Cada alteração no Pote de um evento incrementa a "versão do pote" daquele evento
+no cache do Django, e o snapshot fica guardado sob a chave do evento e da versão.
+Leitores fazem duas leituras de cache (versão + snapshot) e só vão ao banco quando
+a versão mudou; uma aposta em um evento não invalida o cache dos outros.
+"""
+import time
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection, transaction
+
+from .calculo_unico import CalculoUnico
+from .metricas import contador_cache
+
+CHAVE_VERSAO = 'pote:versao:{evento}'
+CHAVE_SNAPSHOT = 'pote:snapshot:{evento}:{versao}'
+# Último snapshot calculado do evento, de qualquer versão: a reserva de quem cansou de esperar
+CHAVE_ULTIMO_SNAPSHOT = 'pote:snapshot:{evento}:ultimo'
+
+
+def _cache():
+    return caches[getattr(settings, 'POTE_CACHE_ALIAS', 'default')]
+
+
+def timeout_versao():
+    """
+    Validade das chaves de versão (do pote e dos usuários). Num cache compartilhado
+    (Redis, Memcached) elas não expiram. Num cache local ao processo (LocMemCache) cada
+    worker só vê as próprias invalidações: a versão expira em VERSAO_TIMEOUT_CACHE_LOCAL
+    segundos, o que limita por quanto tempo os outros workers servem dados (ou 304) velhos.
+    """
+    if isinstance(_cache(), LocMemCache):
+        return getattr(settings, 'VERSAO_TIMEOUT_CACHE_LOCAL', 5)
+    return None
+
+
+# Um único cálculo do snapshot por versão, entre threads, corrotinas e processos
+calculo_pote = CalculoUnico(
+    _cache,
+    espera=getattr(settings, 'POTE_CALCULO_ESPERA', 2.0),
+    validade_trava=getattr(settings, 'POTE_CALCULO_TRAVA', 10),
+)
+
+
+def _evento_id(evento):
+    from .models import Evento
+
+    return Evento.objects.id_de(evento)
+
+
+def versao_pote(evento=None):
+    """
+    Retorna a versão atual do pote do evento. Se a chave sumiu do cache (reinício, despejo),
+    recomeça a partir do relógio em milissegundos, para nunca reaproveitar uma versão antiga.
+    """
+    cache = _cache()
+    chave = CHAVE_VERSAO.format(evento=_evento_id(evento))
+    versao = cache.get(chave)
+    if versao is None:
+        cache.add(chave, int(time.time() * 1000), timeout=timeout_versao())
+        versao = cache.get(chave)
+    return versao
+
+
+def _incrementar_versao(evento_id):
+    cache = _cache()
+    chave = CHAVE_VERSAO.format(evento=evento_id)
+    try:
+        cache.incr(chave)
+    except ValueError:
+        cache.add(chave, int(time.time() * 1000), timeout=timeout_versao())
+
+
+def invalidar_pote(evento=None, using=None):
+    """
+    Agenda o incremento da versão do pote do evento para depois do commit da transação
+    atual (ou executa na hora, fora de transação).
+    """
+    evento_id = _evento_id(evento)
+    transaction.on_commit(lambda: _incrementar_versao(evento_id), using=using)
+
+
+def calcular_snapshot(evento=None):
+    """
+    Lê o Pote consolidado do evento e monta o snapshot com totais, taxa e odds.
+    """
+    from .models import Aposta, Pote
+
+    pote = Pote.objects.atual(evento)
+    return {
+        'taxa': pote.evento.taxa,
+        'total_masculino': pote.total_masculino,
+        'total_feminino': pote.total_feminino,
+        'total_bruto': pote.total_bruto,
+        'quantidade_masculino': pote.quantidade_masculino,
+        'quantidade_feminino': pote.quantidade_feminino,
+        'odds': Aposta.objects.calcular_odds_dos_totais(pote.total_masculino, pote.total_feminino),
+    }
+
+
+def snapshot_pote(evento=None):
+    """
+    Retorna o snapshot do pote do evento na versão atual, calculando-o apenas em caso de
+    falha no cache, uma única vez entre os chamadores concorrentes. Dentro de um bloco atomic lê direto do banco: a transação pode ter
+    alterado o pote e a versão só é incrementada no commit.
+    """
+    evento_id = _evento_id(evento)
+    if connection.in_atomic_block:
+        return calcular_snapshot(evento_id)
+
+    cache = _cache()
+    chave = CHAVE_SNAPSHOT.format(evento=evento_id, versao=versao_pote(evento_id))
+    snapshot = cache.get(chave)
+    if snapshot is not None:
+        contador_cache.incrementar('pote_hit')
+        return snapshot
+
+    contador_cache.incrementar('pote_miss')
+    return calculo_pote.obter(
+        chave, partial(calcular_snapshot, evento_id), timeout=getattr(settings, 'POTE_CACHE_TIMEOUT', 3600),
+        chave_anterior=CHAVE_ULTIMO_SNAPSHOT.format(evento=evento_id),
+    )
+
+
+async def asnapshot_pote(evento=None):
+    """
+    Versão para corrotinas de snapshot_pote(): a espera pelo cálculo de outro chamador
+    não bloqueia o event loop.
+    """
+    evento_id = _evento_id(evento)
+    cache = _cache()
+    chave = CHAVE_SNAPSHOT.format(evento=evento_id, versao=await sync_to_async(versao_pote)(evento_id))
+    snapshot = await cache.aget(chave)
+    if snapshot is not None:
+        contador_cache.incrementar('pote_hit')
+        return snapshot
+
+    contador_cache.incrementar('pote_miss')
+    return await calculo_pote.aobter(
+        chave, partial(calcular_snapshot, evento_id), timeout=getattr(settings, 'POTE_CACHE_TIMEOUT', 3600),
+        chave_anterior=CHAVE_ULTIMO_SNAPSHOT.format(evento=evento_id),
+    )
@@ -0,0 +1,55 @@
+"""
+Versão dos dados de cada usuário exibidos em /dados/ (nome e resumo das apostas).
+
+Funciona como a versão do pote (cache_pote.py), no mesmo cache: a versão é o relógio
+em milissegundos de quando a chave foi criada, e qualquer alteração nos dados do
+usuário apaga a chave depois do commit. Junto com a versão do pote do evento, forma
+o ETag de /dados/, verificado com uma única ida ao cache. Com mais de um processo, o
+cache precisa ser compartilhado (Redis, Memcached); num LocMemCache as versões expiram
+em poucos segundos (ver cache_pote.timeout_versao).
+"""
+import time
+
+from django.db import transaction
+
+from .cache_pote import CHAVE_VERSAO, _cache, _evento_id, timeout_versao, versao_pote
+
+CHAVE_VERSAO_USUARIO = 'usuario:versao:{usuario}'
+
+
+def versao_usuario(usuario_id):
+    """
+    Retorna a versão atual dos dados do usuário, criando-a se a chave não existe.
+    """
+    cache = _cache()
+    chave = CHAVE_VERSAO_USUARIO.format(usuario=usuario_id)
+    versao = cache.get(chave)
+    if versao is None:
+        cache.add(chave, int(time.time() * 1000), timeout=timeout_versao())
+        versao = cache.get(chave)
+    return versao
+
+
+def versoes_dados(evento, usuario_id):
+    """
+    Retorna (versão do pote do evento, versão do usuário) com um get_many; só uma chave
+    ausente do cache custa uma segunda ida para criá-la.
+    """
+    evento_id = _evento_id(evento)
+    chave_pote = CHAVE_VERSAO.format(evento=evento_id)
+    chave_usuario = CHAVE_VERSAO_USUARIO.format(usuario=usuario_id)
+    versoes = _cache().get_many([chave_pote, chave_usuario])
+    return (
+        versoes.get(chave_pote) or versao_pote(evento_id),
+        versoes.get(chave_usuario) or versao_usuario(usuario_id),
+    )
+
+
+def invalidar_usuarios(usuario_ids, using=None):
+    """
+    Agenda para depois do commit da transação atual (ou executa na hora, fora de
+    transação) a troca da versão dos usuários informados.
+    """
+    chaves = [CHAVE_VERSAO_USUARIO.format(usuario=usuario_id) for usuario_id in set(usuario_ids)]
+    if chaves:
+        transaction.on_commit(lambda: _cache().delete_many(chaves), using=using)
@@ -0,0 +1,150 @@
+"""
+Cálculo único (single-flight) de valores guardados no cache.
+
+Quando a versão do pote muda, todos os clientes que fazem polling erram o cache ao
+mesmo tempo e cada um recalcularia o snapshot (dogpile). Com o CalculoUnico:
+
+- no processo, o primeiro chamador de uma chave calcula e os demais esperam o
+  resultado dele (threads do WSGI e corrotinas do ASGI compartilham o mesmo Future);
+- entre processos, só quem consegue a trava `cache.add(<chave>:calculando)` calcula;
+  os outros consultam o cache até o valor aparecer.
+
+A espera é limitada: passado o prazo, ou se o cálculo alheio falhar, o chamador fica
+com o último valor calculado para a chave anterior (`chave_anterior`) ou, se não houver
+nenhum, calcula ele mesmo.
+"""
+import asyncio
+import time
+from concurrent.futures import Future
+from threading import Lock
+
+from asgiref.sync import sync_to_async
+
+
+class CalculoUnico:
+    """
+    Coalesce os cálculos de uma mesma chave de cache. `obter_cache` devolve o cache usado
+    (lido a cada chamada, para respeitar override_settings); `espera` é o tempo máximo de
+    espera por um cálculo alheio e `validade_trava`, por quanto tempo a trava entre processos
+    vale caso o processo que calcula morra.
+    """
+
+    def __init__(self, obter_cache, espera=2.0, validade_trava=10, intervalo=0.02):
+        self.obter_cache = obter_cache
+        self.espera = espera
+        self.validade_trava = validade_trava
+        self.intervalo = intervalo
+        self._em_calculo = {}  # chave -> Future do cálculo em andamento neste processo
+        self._lock = Lock()
+
+    def _entrar(self, chave):
+        """
+        Retorna (future, dono): o dono calcula e publica o resultado no future.
+        """
+        with self._lock:
+            future = self._em_calculo.get(chave)
+            if future is not None:
+                return future, False
+            future = self._em_calculo[chave] = Future()
+            return future, True
+
+    def _sair(self, chave, future):
+        with self._lock:
+            if self._em_calculo.get(chave) is future:
+                del self._em_calculo[chave]
+
+    def _guardar(self, cache, chave, valor, timeout, chave_anterior):
+        cache.set(chave, valor, timeout=timeout)
+        if chave_anterior is not None:
+            cache.set(chave_anterior, valor, timeout=None)
+
+    def obter(self, chave, calcular, timeout=None, chave_anterior=None):
+        """
+        Calcula o valor da chave uma única vez entre os chamadores concorrentes, guarda-o
+        no cache (e em `chave_anterior`) e o retorna.
+        """
+        future, dono = self._entrar(chave)
+        if not dono:
+            try:
+                return future.result(timeout=self.espera)
+            except Exception:
+                # Prazo esgotado ou erro no cálculo do dono
+                return self._reserva(chave_anterior, calcular)
+
+        try:
+            valor = self._calcular_entre_processos(chave, calcular, timeout, chave_anterior)
+        except BaseException as erro:
+            future.set_exception(erro)
+            raise
+        else:
+            future.set_result(valor)
+            return valor
+        finally:
+            self._sair(chave, future)
+
+    def _calcular_entre_processos(self, chave, calcular, timeout, chave_anterior):
+        cache = self.obter_cache()
+        trava = f'{chave}:calculando'
+        if cache.add(trava, 1, timeout=self.validade_trava):
+            try:
+                valor = calcular()
+                self._guardar(cache, chave, valor, timeout, chave_anterior)
+                return valor
+            finally:
+                cache.delete(trava)
+
+        limite = time.monotonic() + self.espera
+        while time.monotonic() < limite:
+            time.sleep(self.intervalo)
+            valor = cache.get(chave)
+            if valor is not None:
+                return valor
+        return self._reserva(chave_anterior, calcular)
+
+    def _reserva(self, chave_anterior, calcular):
+        anterior = self.obter_cache().get(chave_anterior) if chave_anterior is not None else None
+        return anterior if anterior is not None else calcular()
+
+    async def aobter(self, chave, calcular, timeout=None, chave_anterior=None):
+        """
+        Versão para corrotinas de obter(): espera sem bloquear o event loop e roda
+        `calcular` (síncrono) numa thread.
+        """
+        future, dono = self._entrar(chave)
+        if not dono:
+            try:
+                # shield: o prazo esgotado de um chamador não cancela o cálculo dos outros
+                return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), self.espera)
+            except Exception:
+                # Prazo esgotado ou erro no cálculo do dono
+                return await sync_to_async(self._reserva)(chave_anterior, calcular)
+
+        try:
+            valor = await self._acalcular_entre_processos(chave, calcular, timeout, chave_anterior)
+        except BaseException as erro:
+            future.set_exception(erro)
+            raise
+        else:
+            future.set_result(valor)
+            return valor
+        finally:
+            self._sair(chave, future)
+
+    async def _acalcular_entre_processos(self, chave, calcular, timeout, chave_anterior):
+        cache = self.obter_cache()
+        trava = f'{chave}:calculando'
+        if await cache.aadd(trava, 1, timeout=self.validade_trava):
+            try:
+                valor = await sync_to_async(calcular)()
+                await sync_to_async(self._guardar)(cache, chave, valor, timeout, chave_anterior)
+                return valor
+            finally:
+                await cache.adelete(trava)
+
+        limite = time.monotonic() + self.espera
+        while time.monotonic() < limite:
+            await asyncio.sleep(self.intervalo)
+            valor = await cache.aget(chave)
+            if valor is not None:
+                return valor
+        return await sync_to_async(self._reserva)(chave_anterior, calcular)
@@ -0,0 +1,178 @@
+"""
+Conciliação de extratos bancários (OFX/CSV) com as apostas pendentes de validação.
+
+Monta, com uma única consulta, dois índices em memória das apostas 'pendente' e
+'aguardando_validacao': por txid (o id da aposta embutido no payload PIX) e por
+valor em centavos. As transferências são percorridas uma única vez; o txid tem
+prioridade e, sem ele, vale o valor dentro da janela de tempo após a aposta.
+Correspondências ambíguas são apenas reportadas, nunca validadas.
+"""
+import bisect
+import csv
+import re
+from collections import defaultdict, namedtuple
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.utils import timezone
+
+from .models import Aposta
+from .transicoes import transicionar
+
+STATUS_CONCILIAVEIS = ('pendente', 'aguardando_validacao')
+
+TransferenciaPix = namedtuple('TransferenciaPix', ['identificador', 'valor', 'data', 'descricao', 'txid'])
+
+ResultadoConciliacao = namedtuple('ResultadoConciliacao', ['conciliadas', 'ambiguas', 'sem_correspondencia'])
+
+_REGEX_TXID = re.compile(r'txid[\s:=#-]*(\d+)', re.IGNORECASE)
+
+
+def _extrair_txid(texto):
+    encontrado = _REGEX_TXID.search(texto or '')
+    return encontrado.group(1) if encontrado else None
+
+
+def _valor(texto):
+    texto = str(texto).strip().replace('R$', '').replace(' ', '')
+    if ',' in texto:
+        # Formato brasileiro: 1.234,56
+        texto = texto.replace('.', '').replace(',', '.')
+    try:
+        return Decimal(texto).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ValueError(f"valor inválido no extrato: '{texto}'")
+
+
+def _aware(data):
+    return timezone.make_aware(data) if timezone.is_naive(data) else data
+
+
+def _data_ofx(texto):
+    """
+    Converte datas OFX (AAAAMMDD[HHMMSS[.XXX]][[-3:BRT]]) para datetime com fuso.
+    """
+    encontrado = re.match(r'(\d{8})(\d{6})?(?:\.\d+)?(?:\[([+-]?\d+(?:\.\d+)?)(?::\w+)?\])?', texto.strip())
+    if not encontrado:
+        raise ValueError(f"data OFX inválida: '{texto}'")
+    data = datetime.strptime(encontrado.group(1) + (encontrado.group(2) or '000000'), '%Y%m%d%H%M%S')
+    if encontrado.group(3) is not None:
+        deslocamento = timedelta(hours=float(encontrado.group(3)))
+        return data.replace(tzinfo=timezone.get_fixed_timezone(deslocamento))
+    return _aware(data)
+
+
+def _data_csv(texto):
+    texto = str(texto).strip()
+    for formato in ('%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d/%m/%Y', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d'):
+        try:
+            return _aware(datetime.strptime(texto, formato))
+        except ValueError:
+            continue
+    raise ValueError(f"data inválida no extrato: '{texto}'")
+
+
+def ler_ofx(conteudo):
+    """
+    Lê as transações de crédito de um extrato OFX (SGML ou XML).
+    """
+    transferencias = []
+    for bloco in re.split(r'<STMTTRN>', conteudo, flags=re.IGNORECASE)[1:]:
+        bloco = re.split(r'</STMTTRN>', bloco, flags=re.IGNORECASE)[0]
+        campos = {tag.upper(): valor.strip() for tag, valor in re.findall(r'<(\w+)>([^<\r\n]*)', bloco)}
+        valor = _valor(campos.get('TRNAMT', '0'))
+        if valor <= 0:
+            continue
+        descricao = ' '.join(filter(None, [campos.get('NAME'), campos.get('MEMO')]))
+        transferencias.append(TransferenciaPix(
+            identificador=campos.get('FITID', ''),
+            valor=valor,
+            data=_data_ofx(campos.get('DTPOSTED', '')),
+            descricao=descricao,
+            txid=_extrair_txid(descricao),
+        ))
+    return transferencias
+
+
+def ler_csv(conteudo):
+    """
+    Lê as transações de crédito de um CSV com as colunas data, valor e descricao
+    (opcionais: identificador e txid). Aceita ',' ou ';' como separador.
+    """
+    linhas = conteudo.splitlines()
+    try:
+        dialeto = csv.Sniffer().sniff(linhas[0], delimiters=',;') if linhas else csv.excel
+    except csv.Error:
+        raise ValueError("Cabeçalho do CSV inválido: separe as colunas (data, valor, descricao) com ',' ou ';'.")
+    leitor = csv.DictReader(linhas, dialect=dialeto)
+    transferencias = []
+    for numero, linha in enumerate(leitor, start=2):
+        linha = {(chave or '').strip().lower(): (valor or '').strip() for chave, valor in linha.items()}
+        valor = _valor(linha.get('valor', '0'))
+        if valor <= 0:
+            continue
+        descricao = linha.get('descricao') or linha.get('historico', '')
+        transferencias.append(TransferenciaPix(
+            identificador=linha.get('identificador') or linha.get('id') or str(numero),
+            valor=valor,
+            data=_data_csv(linha.get('data', '')),
+            descricao=descricao,
+            txid=linha.get('txid') or _extrair_txid(descricao),
+        ))
+    return transferencias
+
+
+def conciliar(transferencias, janela=timedelta(hours=2), tolerancia=timedelta(minutes=5), evento=None):
+    """
+    Casa transferências com apostas pendentes do evento (o extrato é da conta do
+    recebedor dele) em duas passadas: primeiro pelo txid, depois pelo valor nas apostas
+    que sobraram. A transferência deve ter exatamente o valor da aposta e, sem txid, ter ocorrido
+    entre (data da aposta - tolerância) e (data da aposta + janela).
+    """
+    por_id = {}
+    por_valor = defaultdict(list)  # centavos -> [(data_aposta, id)] ordenado por data
+    apostas = Aposta.objects.do_evento(evento).filter(status__in=STATUS_CONCILIAVEIS).order_by('data_aposta', 'id').values_list(
+        'id', 'valor_aposta', 'data_aposta'
+    )
+    for id_aposta, valor, data in apostas.iterator(chunk_size=5000):
+        por_id[str(id_aposta)] = (valor, data)
+        por_valor[int(valor * 100)].append((data, id_aposta))
+
+    usadas = set()
+    conciliadas, ambiguas, sem_correspondencia = [], [], []
+
+    # Primeiro todos os casamentos por txid, para que uma transferência casada só pelo
+    # valor não tome a aposta que uma transferência posterior no extrato identifica
+    restantes = []
+    for transferencia in transferencias:
+        aposta = por_id.get(transferencia.txid) if transferencia.txid else None
+        if aposta is not None and aposta[0] == transferencia.valor and int(transferencia.txid) not in usadas:
+            usadas.add(int(transferencia.txid))
+            conciliadas.append((transferencia, int(transferencia.txid), 'txid'))
+        else:
+            restantes.append(transferencia)
+
+    for transferencia in restantes:
+        candidatas = por_valor.get(int(transferencia.valor * 100), [])
+        inicio = bisect.bisect_left(candidatas, (transferencia.data - janela,))
+        fim = bisect.bisect_right(candidatas, (transferencia.data + tolerancia, float('inf')))
+        ids = [id_aposta for _, id_aposta in candidatas[inicio:fim] if id_aposta not in usadas]
+
+        if len(ids) == 1:
+            usadas.add(ids[0])
+            conciliadas.append((transferencia, ids[0], 'valor+janela'))
+        elif ids:
+            ambiguas.append((transferencia, ids))
+        else:
+            sem_correspondencia.append(transferencia)
+
+    return ResultadoConciliacao(conciliadas, ambiguas, sem_correspondencia)
+
+
+def aplicar_conciliacao(resultado, tamanho_lote=1000):
+    """
+    Valida em lote as apostas conciliadas (só as que ainda estão pendentes ou aguardando validação).
+    Retorna a quantidade de apostas validadas.
+    """
+    ids = [id_aposta for _, id_aposta, _ in resultado.conciliadas]
+    return transicionar(ids, 'valida', origens=STATUS_CONCILIAVEIS, tamanho_lote=tamanho_lote).aplicadas
@@ -0,0 +1,294 @@
+"""
+Geração de usuários e apostas sintéticos para benchmarks, testes de carga e ensaios.
+
+Os comandos de benchmark rodam dentro de banco_descartavel(), que cria um banco de
+teste (do banco configurado ou um SQLite temporário) e o remove ao final; o
+seed_event grava direto no banco configurado.
+Todos os usuários compartilham um único hash de senha pré-calculado (um PBKDF2 no
+total, e não um por usuário). Em milhões de linhas o bulk_create gasta a maior parte
+do tempo instanciando modelos e preparando campo por campo, então as linhas são
+gravadas com executemany em lotes, já no formato do banco. Os trigramas de busca são
+gravados junto com os usuários; pote, rollups, eventos e resumos são atualizados uma
+vez ao final, na mesma transação das apostas.
+"""
+import random
+import tempfile
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from decimal import Decimal
+from pathlib import Path
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections, models, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .busca import trigramas_do_usuario
+from .cache_usuario import invalidar_usuarios
+from .models import (
+    Aposta,
+    EstadoAposta,
+    Evento,
+    EventoAposta,
+    Pote,
+    ResumoApostasUsuario,
+    RollupPote,
+    TrigramaUsuario,
+    Usuario,
+    calcular_valor_para_pote,
+    contribuicao_pote,
+)
+
+DDDS = (11, 21, 31, 41, 48, 51, 61, 62, 71, 81, 85, 91)
+
+# Distribuição aproximada de uma festa: a maioria já pagou e foi validada
+PESOS_STATUS = {
+    'valida': 70,
+    'aguardando_validacao': 10,
+    'pendente': 12,
+    'rejeitada': 5,
+    'cancelada': 3,
+}
+PESOS_SEXO = {'M': 52, 'F': 48}
+PESOS_VALOR = {
+    Decimal('5.00'): 15,
+    Decimal('10.00'): 35,
+    Decimal('20.00'): 25,
+    Decimal('50.00'): 18,
+    Decimal('100.00'): 7,
+}
+
+
+def telefone_sintetico(numero):
+    """
+    Telefone válido (DDD + 9 + 8 dígitos) e único para cada número de 0 a 99.999.999.
+    """
+    return f'{DDDS[numero % len(DDDS)]}9{numero:08d}'
+
+
+def nome_sintetico(telefone):
+    """
+    Nome do convidado, derivado do telefone.
+    """
+    return f'Convidado {telefone[-8:]}'
+
+
+def chave_pix_sintetica(telefone):
+    """
+    Chave PIX do tipo telefone (+55 DDD número), única porque o telefone é único.
+    """
+    return f'+55{telefone}'
+
+
+def _valor_banco(modelo, campo, valor):
+    return modelo._meta.get_field(campo).get_db_prep_save(valor, connection)
+
+
+def _inserir(modelo, campos, linhas, fixos=None, batch_size=5000):
+    """
+    INSERT em lotes com executemany, sem instanciar o modelo. `linhas` traz os valores
+    de `campos` (attnames) já no formato do banco; os demais campos recebem `fixos`,
+    o momento atual (auto_now/auto_now_add) ou o default do modelo.
+    """
+    agora = timezone.now()
+    fixos = fixos or {}
+    demais = [
+        campo for campo in modelo._meta.concrete_fields
+        if campo.attname not in campos and not isinstance(campo, models.AutoField)
+    ]
+    constantes = []
+    for campo in demais:
+        if campo.attname in fixos:
+            valor = fixos[campo.attname]
+        elif getattr(campo, 'auto_now', False) or getattr(campo, 'auto_now_add', False):
+            valor = agora
+        else:
+            valor = campo.get_default()
+        constantes.append(campo.get_db_prep_save(valor, connection))
+    constantes = tuple(constantes)
+
+    colunas = [modelo._meta.get_field(campo).column for campo in campos] + [campo.column for campo in demais]
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        connection.ops.quote_name(modelo._meta.db_table),
+        ', '.join(connection.ops.quote_name(coluna) for coluna in colunas),
+        ', '.join(['%s'] * len(colunas)),
+    )
+    with connection.cursor() as cursor:
+        for inicio in range(0, len(linhas), batch_size):
+            cursor.executemany(sql, [linha + constantes for linha in linhas[inicio:inicio + batch_size]])
+
+
+def semear_usuarios(quantidade, senha='senha123', inicio=0, batch_size=5000):
+    """
+    Cria usuários com telefones telefone_sintetico(inicio..inicio+quantidade-1), pulando
+    os que já existem. Retorna os ids de todos os usuários desse intervalo.
+    """
+    senha_hash = make_password(senha)
+    ids = []
+    fim = inicio + quantidade
+    with transaction.atomic():
+        for lote_inicio in range(inicio, fim, batch_size):
+            telefones = [telefone_sintetico(n) for n in range(lote_inicio, min(lote_inicio + batch_size, fim))]
+            existentes = set(Usuario.objects.filter(telefone__in=telefones).values_list('telefone', flat=True))
+            novos = [telefone for telefone in telefones if telefone not in existentes]
+            _inserir(Usuario, ('telefone', 'nome', 'chave_pix'), [
+                (telefone, nome_sintetico(telefone), chave_pix_sintetica(telefone)) for telefone in novos
+            ], fixos={'password': senha_hash}, batch_size=batch_size)
+            # Relidos pelo telefone: o INSERT em lote não devolve os ids
+            ids.extend(Usuario.objects.filter(telefone__in=telefones).values_list('pk', flat=True))
+            _inserir(TrigramaUsuario, ('usuario_id', 'trigrama'), [
+                (usuario_id, trigrama)
+                for usuario_id, telefone in Usuario.objects.filter(telefone__in=novos).values_list('pk', 'telefone')
+                for trigrama in trigramas_do_usuario(nome_sintetico(telefone), telefone)
+            ], batch_size=batch_size)
+    return ids
+
+
+def semear_apostas(usuario_ids, quantidade, batch_size=5000, semente=None, evento=None):
+    """
+    Cria apostas do evento (padrão: o evento padrão) distribuídas entre os usuários,
+    com status, palpite e valor sorteados pelas distribuições acima e o valor_para_pote
+    calculado como no modelo. Todas recebem o mesmo data_aposta, posterior a qualquer
+    aposta existente. Retorna a quantidade criada.
+    """
+    evento = Evento.objects.padrao() if evento is None else Evento.objects.get(pk=Evento.objects.id_de(evento))
+    aleatorio = random.Random(semente)
+    status, pesos_status = zip(*PESOS_STATUS.items())
+    sexos, pesos_sexo = zip(*PESOS_SEXO.items())
+    valores, pesos_valor = zip(*PESOS_VALOR.items())
+    # Os valores vêm de um conjunto fixo: a conversão para o banco é feita uma vez por valor
+    valores_banco = {
+        valor: (_valor_banco(Aposta, 'valor_aposta', valor),
+                _valor_banco(Aposta, 'valor_para_pote', calcular_valor_para_pote(valor, evento.taxa)))
+        for valor in valores
+    }
+    agora = timezone.now()
+    token = uuid.uuid4()
+
+    contagem = Counter()
+    validas = {}  # usuario_id -> [total, quantidade, sexo e valor da última]
+    criadas = 0
+    with transaction.atomic():
+        id_anterior = Aposta.objects.aggregate(ultimo=Max('pk'))['ultimo'] or 0
+        while criadas < quantidade:
+            tamanho = min(batch_size, quantidade - criadas)
+            linhas = []
+            for usuario_id, sexo, valor, situacao in zip(
+                aleatorio.choices(usuario_ids, k=tamanho),
+                aleatorio.choices(sexos, pesos_sexo, k=tamanho),
+                aleatorio.choices(valores, pesos_valor, k=tamanho),
+                aleatorio.choices(status, pesos_status, k=tamanho),
+            ):
+                contagem[situacao, sexo, valor] += 1
+                if situacao == 'valida':
+                    resumo = validas.get(usuario_id)
+                    if resumo is None:
+                        validas[usuario_id] = [valor, 1, sexo, valor]
+                    else:
+                        resumo[0] += valor
+                        resumo[1] += 1
+                        resumo[2:] = sexo, valor
+                linhas.append((usuario_id, sexo, *valores_banco[valor], situacao))
+            _inserir(Aposta, ('usuario_id', 'sexo_escolha', 'valor_aposta', 'valor_para_pote', 'status'), linhas,
+                     fixos={'evento_id': evento.pk, 'data_aposta': agora, 'lote_transicao': token}, batch_size=batch_size)
+            criadas += tamanho
+
+        _registrar_agregados(evento, id_anterior, token, agora, contagem, validas, batch_size)
+    return criadas
+
+
+def _registrar_agregados(evento, id_anterior, token, agora, contagem, validas, batch_size):
+    """
+    Equivalente, para as apostas recém-semeadas, ao registrar_alteracoes de uma criação
+    em lote: cada agregado é atualizado uma única vez.
+    """
+    # Pote e rollups: contribuição de cada combinação (status, palpite, valor) vezes a quantidade.
+    # O Pote é atualizado antes de gravar o log, como em registrar_alteracoes (ver CheckpointPote)
+    delta = {}
+    for (situacao, sexo, valor), quantidade in contagem.items():
+        estado = EstadoAposta(None, evento.pk, situacao, sexo, valor, calcular_valor_para_pote(valor, evento.taxa))
+        for campo, parcela in contribuicao_pote(estado).items():
+            delta[campo] = delta.get(campo, 0) + parcela * quantidade
+    Pote.objects.aplicar_delta(delta, evento)
+    RollupPote.objects.registrar_delta(delta, evento, momento=agora)
+
+    # Um evento de criação por aposta, copiado pelo próprio banco
+    campos_evento = ('aposta_id', 'evento_id', 'status_anterior', 'status_novo', 'sexo_escolha', 'valor_aposta', 'valor_para_pote', 'criado_em')
+    origem = ('id', 'evento_id', '%s', 'status', 'sexo_escolha', 'valor_aposta', 'valor_para_pote', 'data_aposta')
+    nome = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO {} ({}) SELECT {} FROM {} WHERE {} > %s AND {} = %s'.format(
+                nome(EventoAposta._meta.db_table),
+                ', '.join(nome(EventoAposta._meta.get_field(campo).column) for campo in campos_evento),
+                ', '.join(coluna if coluna == '%s' else nome(coluna) for coluna in origem),
+                nome(Aposta._meta.db_table), nome('id'), nome('lote_transicao'),
+            ),
+            ['', id_anterior, _valor_banco(Aposta, 'lote_transicao', token)],
+        )
+
+    # Resumos: as apostas novas são as mais recentes de cada usuário, então a última
+    # válida é a de maior id no lote e os totais anteriores só precisam ser somados
+    ultimas = dict(
+        Aposta.objects.filter(pk__gt=id_anterior, lote_transicao=token, status='valida')
+        .values('usuario_id').annotate(ultima=Max('pk')).order_by().values_list('usuario_id', 'ultima')
+    )
+    anteriores = {}
+    ids_validas = list(validas)
+    for inicio in range(0, len(ids_validas), batch_size):
+        anteriores.update(
+            (usuario_id, (total, quantidade))
+            for usuario_id, total, quantidade in ResumoApostasUsuario.objects.filter(
+                pk__in=ids_validas[inicio:inicio + batch_size]
+            ).values_list('pk', 'total_validado', 'quantidade_validas')
+        )
+    substituidos = list(anteriores)
+    for inicio in range(0, len(substituidos), batch_size):
+        ResumoApostasUsuario.objects.filter(pk__in=substituidos[inicio:inicio + batch_size]).delete()
+
+    linhas = []
+    for usuario_id, (total, quantidade, sexo, valor) in validas.items():
+        total_anterior, quantidade_anterior = anteriores.get(usuario_id, (0, 0))
+        linhas.append((
+            usuario_id,
+            _valor_banco(ResumoApostasUsuario, 'total_validado', total + total_anterior),
+            quantidade + quantidade_anterior,
+            ultimas[usuario_id],
+            sexo,
+            _valor_banco(ResumoApostasUsuario, 'ultima_valor', valor),
+        ))
+    _inserir(ResumoApostasUsuario,
+             ('usuario_id', 'total_validado', 'quantidade_validas', 'id_ultima_aposta', 'ultima_sexo', 'ultima_valor'),
+             linhas, fixos={'ultima_data': agora}, batch_size=batch_size)
+    invalidar_usuarios(validas)
+
+
+def _usar_sqlite():
+    caminho = str(Path(tempfile.gettempdir()) / 'e_menino_ou_menina_bench.sqlite3')
+    # Descarta a conexão (ainda não aberta) criada com o banco configurado
+    try:
+        del connections['default']
+    except AttributeError:
+        pass
+    connections.settings['default'] = connections.configure_settings({
+        'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': caminho, 'TEST': {'NAME': caminho}},
+    })['default']
+
+
+@contextmanager
+def banco_descartavel(sqlite=False):
+    """
+    Cria um banco de teste migrado (test_<NAME> no banco configurado, ou um arquivo
+    SQLite temporário com sqlite=True) e o destrói ao sair. Nunca toca os dados reais.
+    Comandos que usam sqlite=True devem declarar requires_system_checks = [].
+    """
+    if sqlite:
+        _usar_sqlite()
+    nome_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(nome_original, verbosity=0)
@@ -0,0 +1,120 @@
+"""
+Exportação das apostas e do relatório financeiro em CSV e XLSX.
+
+As apostas são lidas com .iterator(chunk_size=...) e o usuário vem no mesmo
+SELECT (JOIN), então a memória não cresce com o tamanho da tabela e não há uma
+consulta por linha. O CSV é enviado em streaming e o XLSX é escrito pelo modo
+write-only do openpyxl em um arquivo temporário.
+"""
+import csv
+import tempfile
+
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from .models import Aposta
+
+CABECALHO_APOSTAS = [
+    'ID', 'Evento', 'Nome', 'Telefone', 'Chave PIX', 'Palpite', 'Valor da Aposta',
+    'Valor para o Pote', 'Status', 'Data da Aposta',
+]
+
+CAMPOS_APOSTAS = [
+    'id', 'evento__nome', 'usuario__nome', 'usuario__telefone', 'usuario__chave_pix', 'sexo_escolha',
+    'valor_aposta', 'valor_para_pote', 'status', 'data_aposta',
+]
+
+
+def linhas_apostas(queryset=None, chunk_size=2000):
+    """
+    Gera as linhas das apostas (com dados do usuário) em blocos de chunk_size.
+    """
+    queryset = Aposta.objects.all() if queryset is None else queryset
+    sexos = dict(Aposta.SEXO_CHOICES)
+    status = dict(Aposta.STATUS_PAYMENT)
+    linhas = queryset.order_by('-data_aposta', '-id').values_list(*CAMPOS_APOSTAS).iterator(chunk_size=chunk_size)
+    for id_aposta, evento, nome, telefone, chave_pix, sexo, valor, valor_pote, codigo_status, data in linhas:
+        yield [
+            id_aposta, evento, nome, telefone, chave_pix, sexos.get(sexo, sexo), valor, valor_pote,
+            status.get(codigo_status, codigo_status), timezone.localtime(data).strftime('%d/%m/%Y %H:%M:%S'),
+        ]
+
+
+def linhas_relatorio(relatorio):
+    """
+    Achata o dicionário de get_relatorio_financeiro() em pares (descrição, valor).
+    """
+    linhas = [
+        ['Total Arrecadado Bruto', relatorio['total_arrecadado_bruto']],
+        ['Total para Pais', relatorio['total_para_pais']],
+        ['Total Pote Disponível', relatorio['total_pote_disponivel']],
+        ['Pote Masculino', relatorio['pote_masculino']],
+        ['Pote Feminino', relatorio['pote_feminino']],
+        ['Odd Menino', relatorio['odds_atuais'].get('M')],
+        ['Odd Menina', relatorio['odds_atuais'].get('F')],
+    ]
+    for cenario in relatorio['balanco_cenarios']:
+        nome = 'Menino' if cenario['sexo'] == 'M' else 'Menina'
+        linhas += [
+            [f'Cenário {nome} vence - Total a Pagar', cenario['total_a_pagar']],
+            [f'Cenário {nome} vence - Déficit', cenario['deficit']],
+            [f'Cenário {nome} vence - Pagável', 'Sim' if cenario['ok'] else 'Não'],
+        ]
+    return linhas
+
+
+class _Eco:
+    """
+    "Arquivo" que apenas devolve o que foi escrito, para o csv.writer gerar texto sob demanda.
+    """
+
+    def write(self, valor):
+        return valor
+
+
+def _csv_em_streaming(relatorio, queryset, chunk_size):
+    escritor = csv.writer(_Eco(), delimiter=';')
+    yield '\ufeff'  # BOM para o Excel reconhecer UTF-8
+    yield escritor.writerow(CABECALHO_APOSTAS)
+    for linha in linhas_apostas(queryset, chunk_size):
+        yield escritor.writerow(linha)
+    yield escritor.writerow([])
+    yield escritor.writerow(['Relatório Financeiro', timezone.localtime().strftime('%d/%m/%Y %H:%M:%S')])
+    for linha in linhas_relatorio(relatorio):
+        yield escritor.writerow(linha)
+
+
+def _nome_arquivo(extensao):
+    return f"apostas_{timezone.localtime().strftime('%Y%m%d_%H%M%S')}.{extensao}"
+
+
+def resposta_csv(queryset=None, chunk_size=2000, evento=None):
+    relatorio = Aposta.objects.get_relatorio_financeiro(evento)
+    resposta = StreamingHttpResponse(_csv_em_streaming(relatorio, queryset, chunk_size), content_type='text/csv; charset=utf-8')
+    resposta['Content-Disposition'] = f'attachment; filename="{_nome_arquivo("csv")}"'
+    return resposta
+
+
+def resposta_xlsx(queryset=None, chunk_size=2000, evento=None):
+    from openpyxl import Workbook
+
+    planilha = Workbook(write_only=True)
+    aba_apostas = planilha.create_sheet('Apostas')
+    aba_apostas.append(CABECALHO_APOSTAS)
+    for linha in linhas_apostas(queryset, chunk_size):
+        aba_apostas.append(linha)
+
+    aba_relatorio = planilha.create_sheet('Relatório Financeiro')
+    for linha in linhas_relatorio(Aposta.objects.get_relatorio_financeiro(evento)):
+        aba_relatorio.append(linha)
+
+    # O arquivo temporário é removido ao ser fechado, quando a resposta termina
+    arquivo = tempfile.TemporaryFile(suffix='.xlsx')
+    planilha.save(arquivo)
+    arquivo.seek(0)
+    return FileResponse(
+        arquivo,
+        as_attachment=True,
+        filename=_nome_arquivo('xlsx'),
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
@@ -0,0 +1,84 @@
+"""
+Limitação de taxa por token bucket, com o estado guardado no cache do Django.
+
+Cada chave (IP, telefone...) tem um balde com `capacidade` fichas que se recarrega
+à razão de `por_segundo`. Cada tentativa consome uma ficha; sem fichas, a tentativa
+é recusada antes de qualquer trabalho caro (hash de senha, consultas).
+O par leitura/escrita no cache não é atômico: sob concorrência extrema o balde pode
+admitir algumas tentativas a mais, o que é aceitável para conter abuso.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+def _cache():
+    return caches[getattr(settings, 'LIMITE_CACHE_ALIAS', 'default')]
+
+
+class BaldeDeFichas:
+    """
+    Balde com (capacidade, fichas por segundo) lidos da configuração a cada uso,
+    para que override_settings valha em testes e benchmarks.
+    """
+
+    def __init__(self, prefixo, configuracao, padrao):
+        self.prefixo = prefixo
+        self.configuracao = configuracao
+        self.padrao = padrao
+
+    @property
+    def limites(self):
+        return getattr(settings, self.configuracao, self.padrao)
+
+    def _chave(self, identificador):
+        return f'limite:{self.prefixo}:{identificador}'
+
+    def _consumir(self, estado, agora):
+        """
+        Retorna (novo estado, espera em segundos); espera 0 indica tentativa permitida.
+        """
+        capacidade, por_segundo = self.limites
+        fichas, ultimo = estado or (capacidade, agora)
+        fichas = min(capacidade, fichas + (agora - ultimo) * por_segundo)
+        if fichas >= 1:
+            return (fichas - 1, agora), 0
+        return (fichas, agora), (1 - fichas) / por_segundo
+
+    def _timeout(self):
+        # Depois desse tempo o balde está cheio de novo e a chave pode expirar
+        capacidade, por_segundo = self.limites
+        return math.ceil(capacidade / por_segundo) + 1
+
+    def consumir(self, identificador):
+        cache = _cache()
+        chave = self._chave(identificador)
+        estado, espera = self._consumir(cache.get(chave), time.time())
+        cache.set(chave, estado, timeout=self._timeout())
+        return espera
+
+    async def aconsumir(self, identificador):
+        cache = _cache()
+        chave = self._chave(identificador)
+        estado, espera = self._consumir(await cache.aget(chave), time.time())
+        await cache.aset(chave, estado, timeout=self._timeout())
+        return espera
+
+
+def ip_do_cliente(request):
+    """
+    IP do cliente para os limites. Atrás de proxies reversos confiáveis, configure
+    IP_CLIENTE_CABECALHO (ex.: 'HTTP_X_FORWARDED_FOR') e IP_CLIENTE_PROXIES_CONFIAVEIS:
+    o IP vem da lista do cabeçalho, contando da direita tantos endereços quantos forem
+    os proxies, para que um cliente não escolha o próprio IP acrescentando entradas.
+    Sem o cabeçalho configurado (ou com menos entradas que o esperado), usa REMOTE_ADDR.
+    """
+    cabecalho = getattr(settings, 'IP_CLIENTE_CABECALHO', None)
+    if cabecalho:
+        ips = [ip.strip() for ip in request.META.get(cabecalho, '').split(',') if ip.strip()]
+        proxies = getattr(settings, 'IP_CLIENTE_PROXIES_CONFIAVEIS', 1)
+        if proxies >= 1 and len(ips) >= proxies:
+            return ips[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
@@ -0,0 +1,91 @@
+"""
+Login e cadastro com o hash de senha (PBKDF2) fora do loop de eventos.
+
+O hash roda em um pool de threads limitado (LOGIN_HASH_THREADS) e há um teto de
+tarefas aguardando o pool (LOGIN_HASH_FILA_MAXIMA): acima dele a requisição é
+recusada na hora, em vez de enfileirar indefinidamente durante um pico.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import authenticate, get_backends
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password, make_password
+from django.contrib.auth.signals import user_login_failed
+
+from .models import Usuario
+
+_executor_hash = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'LOGIN_HASH_THREADS', 4), thread_name_prefix='hash-senha'
+)
+_pendentes = 0
+_lock_pendentes = Lock()
+
+
+class SobrecargaHash(Exception):
+    """
+    O pool de hash de senhas está com a fila cheia.
+    """
+
+
+async def executar_hash(funcao, *args):
+    """
+    Executa uma função de hash no pool, recusando com SobrecargaHash quando a fila está cheia.
+    """
+    global _pendentes
+    with _lock_pendentes:
+        if _pendentes >= getattr(settings, 'LOGIN_HASH_FILA_MAXIMA', 64):
+            raise SobrecargaHash
+        _pendentes += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor_hash, funcao, *args)
+    finally:
+        with _lock_pendentes:
+            _pendentes -= 1
+
+
+async def autenticar(request, telefone, senha):
+    """
+    Equivalente assíncrono de authenticate(): retorna o usuário ativo com a senha correta
+    ou None, envia user_login_failed nas falhas e atualiza o hash da senha quando o
+    algoritmo ou o número de iterações mudou. Telefones inexistentes também pagam um
+    hash, para que o tempo de resposta não revele quais telefones estão cadastrados.
+
+    Só o ModelBackend tem o hash no pool; com outros backends em AUTHENTICATION_BACKENDS,
+    o próprio authenticate() roda fora do loop.
+    """
+    backends = get_backends()
+    if len(backends) != 1 or type(backends[0]) is not ModelBackend:
+        return await sync_to_async(authenticate)(request, telefone=telefone, password=senha)
+
+    usuario = await Usuario.objects.filter(telefone=telefone).afirst()
+    if usuario is None:
+        await executar_hash(make_password, senha)
+    else:
+        desatualizada = []
+        if await executar_hash(check_password, senha, usuario.password, desatualizada.append) and usuario.is_active:
+            if desatualizada:
+                usuario.password = await executar_hash(make_password, senha)
+                await usuario.asave(update_fields=['password'])
+            usuario.backend = 'django.contrib.auth.backends.ModelBackend'
+            return usuario
+
+    await sync_to_async(user_login_failed.send)(
+        sender='django.contrib.auth',
+        credentials={'telefone': telefone, 'password': '********************'},
+        request=request,
+    )
+    return None
+
+
+async def cadastrar(telefone, nome, chave_pix, senha):
+    """
+    Cria o usuário com a senha já hasheada no pool (mesmo resultado de create_user).
+    """
+    usuario = Usuario(telefone=telefone.strip(), nome=nome, chave_pix=chave_pix)
+    usuario.password = await executar_hash(make_password, senha)
+    await usuario.asave()
+    return usuario
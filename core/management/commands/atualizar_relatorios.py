@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Evento, RelatorioFinanceiro
+
+
+class Command(BaseCommand):
+    help = ("Recalcula o relatório financeiro pré-calculado de cada evento exibido no admin. "
+            "Deve rodar periodicamente (ex.: cron a cada minuto) ou continuamente com --intervalo, "
+            "para que o painel nunca passe de RELATORIO_IDADE_MAXIMA.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--evento', type=int, help="Atualiza só este evento (padrão: todos).")
+        parser.add_argument('--intervalo', type=float,
+                            help="Repete a cada N segundos, até ser interrompido (padrão: uma única vez).")
+
+    def handle(self, *args, **options):
+        eventos = Evento.objects.order_by('pk')
+        if options['evento'] is not None:
+            eventos = eventos.filter(pk=options['evento'])
+            if not eventos.exists():
+                raise CommandError(f"Evento {options['evento']} não encontrado.")
+
+        while True:
+            for evento in eventos:
+                inicio = time.perf_counter()
+                RelatorioFinanceiro.objects.atualizar(evento)
+                self.stdout.write(f"{evento}: relatório atualizado em {time.perf_counter() - inicio:.2f}s.")
+            if not options['intervalo']:
+                break
+            time.sleep(options['intervalo'])
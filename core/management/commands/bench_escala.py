@@ -0,0 +1,148 @@
+import json
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+
+from core.dados_sinteticos import banco_descartavel, semear_apostas, semear_usuarios
+from core.models import Aposta, Usuario
+
+# Um usuário para cada N apostas, como numa festa em que cada convidado aposta algumas vezes
+APOSTAS_POR_USUARIO = 5
+TAMANHO_PAGINA = 100
+
+
+class _ContadorConsultas:
+    """
+    execute_wrapper que conta as consultas. O CaptureQueriesContext não serve aqui: o sinal
+    request_started do test Client chama reset_queries() no meio da medição do admin.
+    """
+
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.total += 1
+        return execute(sql, params, many, context)
+
+
+def _propriedades(apostas):
+    return [
+        (aposta.odd_da_aposta, aposta.retorno_potencial, aposta.retorno_real_possivel)
+        for aposta in apostas
+    ]
+
+
+class Command(BaseCommand):
+    help = ("Benchmark de escala do ApostaManager, das propriedades de Aposta e do changelist do admin "
+            "em vários tamanhos de base (padrão: 10k, 100k e 1M apostas). Mede tempo, consultas e pico de "
+            "memória (tracemalloc), grava o resultado em JSON e compara com uma baseline.")
+
+    # As verificações de sistema abririam a conexão com o banco configurado antes do --sqlite
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamanhos', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                            help="Quantidades de apostas (padrão: 10000 100000 1000000).")
+        parser.add_argument('--repeticoes', type=int, default=3, help="Repetições por operação; vale a menor (padrão: 3).")
+        parser.add_argument('--sqlite', action='store_true', help="Usa um SQLite temporário no lugar do banco configurado.")
+        parser.add_argument('--saida', default='bench_escala.json', help="Arquivo do resultado (padrão: bench_escala.json).")
+        parser.add_argument('--baseline', help="Resultado anterior para comparação.")
+        parser.add_argument('--limite', type=float, default=0.20,
+                            help="Regressão tolerada no tempo, em fração da baseline (padrão: 0.20 = 20%%).")
+        parser.add_argument('--piso', type=float, default=0.005,
+                            help="Diferença de tempo, em segundos, abaixo da qual nunca há regressão "
+                                 "(ruído de medição em operações rápidas; padrão: 0.005).")
+
+    def handle(self, *args, **options):
+        resultados = {}
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']), \
+                banco_descartavel(sqlite=options['sqlite']):
+            admin = Usuario.objects.create_superuser(telefone='00000000000', nome='Bench', chave_pix='bench', password='bench')
+            usuario_ids, apostas = [], 0
+            for tamanho in sorted(options['tamanhos']):
+                # A base cresce de um tamanho para o próximo, sem recomeçar do zero
+                inicio = time.perf_counter()
+                novos_usuarios = max(1, tamanho // APOSTAS_POR_USUARIO) - len(usuario_ids)
+                if novos_usuarios > 0:
+                    usuario_ids += semear_usuarios(novos_usuarios, inicio=len(usuario_ids))
+                apostas += semear_apostas(usuario_ids, tamanho - apostas, semente=tamanho)
+                self.stderr.write(f"{tamanho} apostas semeadas em {time.perf_counter() - inicio:.1f}s; medindo...")
+                resultados[str(tamanho)] = self._medir_tamanho(admin, options['repeticoes'])
+
+        saida = {'banco': connection.vendor, 'resultados': resultados}
+        Path(options['saida']).write_text(json.dumps(saida, indent=2) + '\n', encoding='utf-8')
+        self.stdout.write(json.dumps(saida, indent=2))
+
+        if options['baseline']:
+            self._comparar(resultados, options['baseline'], options['limite'], options['piso'])
+
+    def _operacoes(self, admin):
+        cliente = Client()
+        cliente.force_login(admin)
+        return {
+            'calcular_odds': Aposta.objects.calcular_odds,
+            'get_relatorio_financeiro': Aposta.objects.get_relatorio_financeiro,
+            'validar_balanco_financeiro': Aposta.objects.validar_balanco_financeiro,
+            'propriedades_pagina': lambda: _propriedades(list(Aposta.objects.select_related('usuario')[:TAMANHO_PAGINA])),
+            'propriedades_pagina_with_odds': lambda: _propriedades(list(Aposta.objects.with_odds()[:TAMANHO_PAGINA])),
+            'admin_changelist': lambda: cliente.get('/superuser/core/aposta/'),
+        }
+
+    @staticmethod
+    def _limpar_caches():
+        # Cache limpo: mede o custo no banco, não o acerto no snapshot do pote
+        for alias in settings.CACHES:
+            caches[alias].clear()
+
+    def _medir_tamanho(self, admin, repeticoes):
+        medidas = {}
+        for nome, operacao in self._operacoes(admin).items():
+            tempos = []
+            for _ in range(repeticoes):
+                self._limpar_caches()
+                consultas = _ContadorConsultas()
+                with connection.execute_wrapper(consultas):
+                    inicio = time.perf_counter()
+                    operacao()
+                    tempos.append(time.perf_counter() - inicio)
+
+            # Memória numa execução à parte: o tracemalloc deixaria os tempos mais lentos
+            self._limpar_caches()
+            tracemalloc.start()
+            operacao()
+            _, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            medidas[nome] = {
+                'tempo_s': round(min(tempos), 4),
+                'consultas': consultas.total,
+                'pico_memoria_kb': round(pico / 1024, 1),
+            }
+        return medidas
+
+    def _comparar(self, resultados, caminho_baseline, limite, piso):
+        baseline = json.loads(Path(caminho_baseline).read_text(encoding='utf-8'))['resultados']
+        regressoes = []
+        for tamanho, medidas in resultados.items():
+            for nome, medida in medidas.items():
+                anterior = baseline.get(tamanho, {}).get(nome)
+                if anterior is None:
+                    continue
+                diferenca = medida['tempo_s'] - anterior['tempo_s']
+                if diferenca > piso and medida['tempo_s'] > anterior['tempo_s'] * (1 + limite):
+                    regressoes.append(f"{nome} @ {tamanho}: tempo {anterior['tempo_s']}s -> {medida['tempo_s']}s")
+                if medida['consultas'] > anterior['consultas']:
+                    regressoes.append(f"{nome} @ {tamanho}: consultas {anterior['consultas']} -> {medida['consultas']}")
+
+        if regressoes:
+            for regressao in regressoes:
+                self.stderr.write(self.style.ERROR(regressao))
+            raise CommandError(f"{len(regressoes)} regressão(ões) acima do limite de {limite:.0%} em relação à baseline.")
+        self.stderr.write(self.style.SUCCESS(f"Sem regressões em relação à baseline (limite {limite:.0%})."))
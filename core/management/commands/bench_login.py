@@ -0,0 +1,100 @@
+import asyncio
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient
+from django.test.utils import override_settings
+
+from core.models import Usuario
+
+PREFIXO_TELEFONE = '000'
+
+
+def _percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p / 100))]
+
+
+def _resumo(latencias, duracao, sucessos):
+    return {
+        'logins': len(latencias),
+        'sucessos': sucessos,
+        'logins_por_segundo': round(len(latencias) / duracao, 1),
+        'latencia_ms': {
+            'p50': round(_percentil(latencias, 50) * 1000, 1),
+            'p95': round(_percentil(latencias, 95) * 1000, 1),
+            'p99': round(_percentil(latencias, 99) * 1000, 1),
+            'media': round(statistics.mean(latencias) * 1000, 1),
+        },
+    }
+
+
+class Command(BaseCommand):
+    help = ("Mede logins/segundo sob concorrência: o caminho antigo (authenticate() síncrono, "
+            "uma thread por requisição) contra a view assíncrona com o hash no pool limitado. "
+            "Cria usuários temporários e os remove ao final.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=200, help="Logins por rodada, um por usuário (padrão: 200).")
+        parser.add_argument('--concorrencia', type=int, default=32, help="Logins simultâneos (padrão: 32).")
+
+    def handle(self, *args, **options):
+        quantidade, concorrencia = options['usuarios'], options['concorrencia']
+        senha = 'senha-bench'
+        # Um único hash compartilhado: criar os usuários não deve custar um PBKDF2 por usuário
+        senha_hash = make_password(senha)
+        telefones = [f'{PREFIXO_TELEFONE}{i:08d}' for i in range(quantidade)]
+        Usuario.objects.filter(telefone__startswith=PREFIXO_TELEFONE).delete()
+        Usuario.objects.bulk_create(
+            [Usuario(telefone=t, nome=f'Bench {t}', chave_pix='bench', password=senha_hash) for t in telefones],
+            batch_size=1000,
+        )
+        try:
+            resultado = {
+                'usuarios': quantidade,
+                'concorrencia': concorrencia,
+                'hash_threads': getattr(settings, 'LOGIN_HASH_THREADS', 4),
+                'sincrono': self._sincrono(telefones, senha, concorrencia),
+                'assincrono': asyncio.run(self._assincrono(telefones, senha, concorrencia)),
+            }
+        finally:
+            Usuario.objects.filter(telefone__startswith=PREFIXO_TELEFONE).delete()
+        self.stdout.write(json.dumps(resultado, indent=2))
+
+    def _sincrono(self, telefones, senha, concorrencia):
+        def logar(telefone):
+            inicio = time.perf_counter()
+            usuario = authenticate(None, telefone=telefone, password=senha)
+            return time.perf_counter() - inicio, usuario is not None
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+            resultados = list(executor.map(logar, telefones))
+        duracao = time.perf_counter() - inicio
+        return _resumo([r[0] for r in resultados], duracao, sum(r[1] for r in resultados))
+
+    async def _assincrono(self, telefones, senha, concorrencia):
+        cliente = AsyncClient()
+        semaforo = asyncio.Semaphore(concorrencia)
+
+        async def logar(telefone):
+            async with semaforo:
+                inicio = time.perf_counter()
+                resposta = await cliente.post(
+                    '/login/', {'telefone': telefone, 'senha': senha}, content_type='application/json',
+                )
+                return time.perf_counter() - inicio, resposta.status_code == 200
+
+        # Todas as requisições saem do mesmo IP: o limite por IP é desligado para medir o hash
+        sem_limite_ip = (len(telefones) + 1, len(telefones) + 1)
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], LOGIN_LIMITE_IP=sem_limite_ip):
+            inicio = time.perf_counter()
+            resultados = await asyncio.gather(*(logar(t) for t in telefones))
+            duracao = time.perf_counter() - inicio
+        return _resumo([r[0] for r in resultados], duracao, sum(r[1] for r in resultados))
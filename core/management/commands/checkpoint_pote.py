@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.models import CheckpointPote, Evento
+
+
+class Command(BaseCommand):
+    help = ("Grava um checkpoint do pote de cada evento a partir do log de eventos das apostas. "
+            "Deve rodar periodicamente (ex.: cron a cada hora) para que a reconstrução "
+            "do pote em um momento passado some poucos eventos.")
+
+    def handle(self, *args, **options):
+        for evento in Evento.objects.order_by('pk'):
+            checkpoint = CheckpointPote.objects.criar(evento)
+            if checkpoint is None:
+                self.stdout.write(f"{evento}: nenhum evento novo desde o último checkpoint.")
+                continue
+            self.stdout.write(self.style.SUCCESS(f"{evento}: {checkpoint} gravado."))
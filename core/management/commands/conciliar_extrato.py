@@ -0,0 +1,60 @@
+from datetime import timedelta
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.conciliacao import aplicar_conciliacao, conciliar, ler_csv, ler_ofx
+
+
+class Command(BaseCommand):
+    help = ("Concilia um extrato bancário (OFX ou CSV) de PIX recebidos com as apostas pendentes. "
+            "Por padrão apenas mostra o relatório (dry-run); use --aplicar para validar as apostas.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help="Caminho do extrato .ofx ou .csv.")
+        parser.add_argument('--formato', choices=['ofx', 'csv'], help="Força o formato (padrão: pela extensão).")
+        parser.add_argument('--janela-minutos', type=int, default=120,
+                            help="Tempo máximo entre a aposta e a transferência, sem txid (padrão: 120).")
+        parser.add_argument('--encoding', default='utf-8', help="Codificação do arquivo (padrão: utf-8).")
+        parser.add_argument('--evento', type=int, help="Id do evento dono da conta do extrato (padrão: o evento padrão).")
+        parser.add_argument('--aplicar', action='store_true', help="Valida as apostas conciliadas.")
+
+    def handle(self, *args, **options):
+        caminho = Path(options['arquivo'])
+        if not caminho.exists():
+            raise CommandError(f"Arquivo não encontrado: {caminho}")
+
+        formato = options['formato'] or caminho.suffix.lower().lstrip('.')
+        leitores = {'ofx': ler_ofx, 'csv': ler_csv}
+        if formato not in leitores:
+            raise CommandError("Formato não suportado. Use .ofx ou .csv (ou --formato).")
+
+        try:
+            transferencias = leitores[formato](caminho.read_text(encoding=options['encoding'], errors='replace'))
+        except ValueError as erro:
+            raise CommandError(str(erro))
+
+        resultado = conciliar(transferencias, janela=timedelta(minutes=options['janela_minutos']), evento=options['evento'])
+
+        for transferencia, id_aposta, criterio in resultado.conciliadas:
+            self.stdout.write(
+                f"OK   {transferencia.identificador}: R$ {transferencia.valor} em {transferencia.data:%d/%m %H:%M} "
+                f"-> aposta {id_aposta} ({criterio})"
+            )
+        for transferencia, ids in resultado.ambiguas:
+            self.stdout.write(self.style.WARNING(
+                f"AMBÍGUA {transferencia.identificador}: R$ {transferencia.valor} -> apostas {', '.join(map(str, ids))}"
+            ))
+        for transferencia in resultado.sem_correspondencia:
+            self.stdout.write(self.style.WARNING(
+                f"SEM APOSTA {transferencia.identificador}: R$ {transferencia.valor} em {transferencia.data:%d/%m %H:%M}"
+            ))
+
+        resumo = (f"{len(transferencias)} transferência(s): {len(resultado.conciliadas)} conciliada(s), "
+                  f"{len(resultado.ambiguas)} ambígua(s), {len(resultado.sem_correspondencia)} sem aposta.")
+        if not options['aplicar']:
+            self.stdout.write(self.style.SUCCESS(f"{resumo} (dry-run, nada foi validado)"))
+            return
+
+        validadas = aplicar_conciliacao(resultado)
+        self.stdout.write(self.style.SUCCESS(f"{resumo} {validadas} aposta(s) validada(s)."))
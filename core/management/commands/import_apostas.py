@@ -0,0 +1,155 @@
+import time
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Aposta, Evento, Usuario, calcular_valor_para_pote
+
+SEXOS = {'M': 'M', 'MENINO': 'M', 'F': 'F', 'MENINA': 'F'}
+STATUS_VALIDOS = {codigo for codigo, _ in Aposta.STATUS_PAYMENT}
+# Maior valor que cabe na coluna valor_aposta (max_digits/decimal_places)
+_campo_valor = Aposta._meta.get_field('valor_aposta')
+VALOR_MAXIMO = Decimal(10) ** (_campo_valor.max_digits - _campo_valor.decimal_places) - Decimal(1).scaleb(-_campo_valor.decimal_places)
+
+
+def linhas_csv(caminho, tamanho_chunk):
+    """
+    Lê o CSV em blocos com o pandas, sem carregar o arquivo inteiro.
+    """
+    import pandas as pd
+
+    for bloco in pd.read_csv(caminho, dtype=str, chunksize=tamanho_chunk, keep_default_na=False):
+        bloco.columns = [coluna.strip().lower() for coluna in bloco.columns]
+        yield bloco.to_dict('records')
+
+
+def linhas_xlsx(caminho, tamanho_chunk):
+    """
+    Lê a planilha em modo read-only do openpyxl (streaming), em blocos.
+    """
+    from openpyxl import load_workbook
+
+    planilha = load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        linhas = planilha.active.iter_rows(values_only=True)
+        cabecalho = [str(coluna or '').strip().lower() for coluna in next(linhas, ())]
+        bloco = []
+        for valores in linhas:
+            bloco.append({coluna: ('' if valor is None else str(valor)) for coluna, valor in zip(cabecalho, valores)})
+            if len(bloco) >= tamanho_chunk:
+                yield bloco
+                bloco = []
+        if bloco:
+            yield bloco
+    finally:
+        planilha.close()
+
+
+class Command(BaseCommand):
+    help = ("Importa apostas de um arquivo CSV ou XLSX com as colunas telefone, sexo_escolha, "
+            "valor_aposta e (opcional) status, usando bulk_create em lotes.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help="Caminho do arquivo .csv ou .xlsx.")
+        parser.add_argument('--formato', choices=['csv', 'xlsx'], help="Força o formato (padrão: pela extensão).")
+        parser.add_argument('--status', default='valida', choices=sorted(STATUS_VALIDOS),
+                            help="Status usado quando a linha não informa um (padrão: valida).")
+        parser.add_argument('--evento', type=int, help="Id do evento das apostas (padrão: o evento padrão).")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Linhas por INSERT (padrão: 1000).")
+        parser.add_argument('--chunk-size', type=int, default=10000, help="Linhas lidas do arquivo por vez (padrão: 10000).")
+        parser.add_argument('--dry-run', action='store_true', help="Apenas valida o arquivo, sem gravar.")
+
+    def handle(self, *args, **options):
+        caminho = Path(options['arquivo'])
+        if not caminho.exists():
+            raise CommandError(f"Arquivo não encontrado: {caminho}")
+
+        formato = options['formato'] or caminho.suffix.lower().lstrip('.')
+        leitores = {'csv': linhas_csv, 'xlsx': linhas_xlsx}
+        if formato not in leitores:
+            raise CommandError("Formato não suportado. Use .csv ou .xlsx (ou --formato).")
+
+        if options['evento'] is None:
+            evento = Evento.objects.padrao()
+        else:
+            evento = Evento.objects.filter(pk=options['evento']).first()
+            if evento is None:
+                raise CommandError(f"Evento não encontrado: {options['evento']}")
+
+        # Um único SELECT para resolver todos os telefones
+        usuarios = dict(Usuario.objects.values_list('telefone', 'id'))
+
+        inicio = time.perf_counter()
+        importadas = 0
+        erros = []
+        numero_linha = 1  # a linha 1 é o cabeçalho
+
+        for bloco in leitores[formato](caminho, options['chunk_size']):
+            apostas = []
+            for linha in bloco:
+                numero_linha += 1
+                try:
+                    apostas.append(self.montar_aposta(linha, usuarios, options['status'], evento))
+                except ValueError as erro:
+                    erros.append((numero_linha, str(erro)))
+
+            if not options['dry_run']:
+                self.gravar(apostas, options['batch_size'])
+            importadas += len(apostas)
+
+        duracao = time.perf_counter() - inicio
+        for numero, mensagem in erros[:20]:
+            self.stderr.write(f"Linha {numero}: {mensagem}")
+        if len(erros) > 20:
+            self.stderr.write(f"... e mais {len(erros) - 20} linha(s) com erro.")
+
+        acao = "validadas (dry-run)" if options['dry_run'] else "importadas"
+        self.stdout.write(self.style.SUCCESS(
+            f"{importadas} aposta(s) {acao}, {len(erros)} linha(s) rejeitada(s) em {duracao:.2f}s "
+            f"({importadas / duracao if duracao else 0:.0f} linhas/s)."
+        ))
+
+    def montar_aposta(self, linha, usuarios, status_padrao, evento):
+        """
+        Converte uma linha do arquivo em uma Aposta (não salva), já com o valor_para_pote,
+        pois o bulk_create não passa pelo Aposta.save().
+        """
+        telefone = ''.join(caractere for caractere in str(linha.get('telefone', '')) if caractere.isdigit())
+        usuario_id = usuarios.get(telefone)
+        if usuario_id is None:
+            raise ValueError(f"usuário com telefone '{telefone}' não encontrado.")
+
+        sexo = SEXOS.get(str(linha.get('sexo_escolha', '')).strip().upper())
+        if sexo is None:
+            raise ValueError(f"palpite inválido: '{linha.get('sexo_escolha')}'.")
+
+        try:
+            valor = Decimal(str(linha.get('valor_aposta', '')).strip().replace(',', '.')).quantize(Decimal('0.01'))
+        except InvalidOperation:
+            raise ValueError(f"valor inválido: '{linha.get('valor_aposta')}'.")
+        if not valor.is_finite():
+            raise ValueError(f"valor inválido: '{linha.get('valor_aposta')}'.")
+        if valor < Decimal('0.01'):
+            raise ValueError("valor da aposta abaixo do mínimo de R$0,01.")
+        if valor > VALOR_MAXIMO:
+            raise ValueError(f"valor da aposta acima do máximo de R${VALOR_MAXIMO}.".replace('.', ',', 1))
+
+        status = str(linha.get('status') or status_padrao).strip()
+        if status not in STATUS_VALIDOS:
+            raise ValueError(f"status inválido: '{status}'.")
+
+        return Aposta(
+            evento=evento,
+            usuario_id=usuario_id,
+            sexo_escolha=sexo,
+            valor_aposta=valor,
+            valor_para_pote=calcular_valor_para_pote(valor, evento.taxa),
+            status=status,
+        )
+
+    def gravar(self, apostas, batch_size):
+        """
+        Insere um bloco e atualiza Pote, eventos e resumos dos usuários na mesma transação.
+        """
+        Aposta.objects.criar_em_lote(apostas, batch_size=batch_size)
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Evento, Pote, ResumoApostasUsuario, RollupPote
+
+
+class Command(BaseCommand):
+    help = ("Recalcula o Pote consolidado de cada evento do zero a partir das apostas válidas e informa a divergência. "
+            "Também reconstrói os resumos de apostas por usuário e os rollups do gráfico de odds.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Apenas informa a divergência, sem gravar os valores recalculados.",
+        )
+
+    def handle(self, *args, **options):
+        salvar = not options['dry_run']
+        divergencias = {}
+        for evento in Evento.objects.order_by('pk'):
+            for campo, valores in Pote.objects.recalcular(salvar=salvar, evento=evento).items():
+                divergencias[f"{evento.pk}.{campo}"] = valores
+
+        if salvar:
+            quantidade = ResumoApostasUsuario.objects.recalcular()
+            self.stdout.write(f"Resumos de usuários reconstruídos: {quantidade}.")
+            quantidade = RollupPote.objects.recalcular()
+            self.stdout.write(f"Rollups do pote reconstruídos: {quantidade}.")
+
+        if not divergencias:
+            self.stdout.write(self.style.SUCCESS("Potes consistentes: nenhuma divergência encontrada."))
+            return
+
+        for campo, (armazenado, recalculado) in sorted(divergencias.items()):
+            self.stdout.write(
+                f"{campo}: armazenado={armazenado} recalculado={recalculado} "
+                f"diferença={recalculado - armazenado}"
+            )
+
+        if salvar:
+            self.stdout.write(self.style.WARNING(f"Potes corrigidos ({len(divergencias)} campo(s) divergente(s))."))
+        else:
+            self.stdout.write(self.style.WARNING(f"{len(divergencias)} campo(s) divergente(s) (dry-run, nada gravado)."))
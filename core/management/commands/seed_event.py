@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.dados_sinteticos import semear_apostas, semear_usuarios
+
+
+class Command(BaseCommand):
+    help = ("Popula o banco configurado com usuários e apostas sintéticos para benchmarks e ensaios: "
+            "telefones e chaves PIX válidos e únicos, uma única senha compartilhada e apostas com "
+            "distribuição realista de status, palpite e valor. Pote, eventos, rollups e resumos "
+            "ficam consistentes. Não use em produção.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, required=True, help="Quantidade de usuários.")
+        parser.add_argument('--bets', type=int, required=True, help="Quantidade de apostas.")
+        parser.add_argument('--inicio', type=int, default=0,
+                            help="Primeiro número dos telefones sintéticos; os já existentes são reaproveitados (padrão: 0).")
+        parser.add_argument('--senha', default='senha123', help="Senha de todos os usuários (padrão: senha123).")
+        parser.add_argument('--evento', type=int, help="Id do evento das apostas (padrão: o evento padrão).")
+        parser.add_argument('--semente', type=int, help="Semente do sorteio, para repetir a mesma base.")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Linhas por lote de INSERT (padrão: 5000).")
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['bets'] < 0:
+            raise CommandError("--users deve ser maior que zero e --bets não pode ser negativo.")
+
+        inicio = time.perf_counter()
+        usuario_ids = semear_usuarios(options['users'], senha=options['senha'], inicio=options['inicio'],
+                                      batch_size=options['batch_size'])
+        tempo_usuarios = time.perf_counter() - inicio
+        self.stdout.write(f"{len(usuario_ids)} usuários em {tempo_usuarios:.1f}s")
+
+        inicio = time.perf_counter()
+        apostas = semear_apostas(usuario_ids, options['bets'], batch_size=options['batch_size'],
+                                 semente=options['semente'], evento=options['evento'])
+        tempo_apostas = time.perf_counter() - inicio
+        self.stdout.write(f"{apostas} apostas em {tempo_apostas:.1f}s")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(usuario_ids) + apostas} linhas em {tempo_usuarios + tempo_apostas:.1f}s."
+        ))
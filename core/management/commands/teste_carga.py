@@ -0,0 +1,188 @@
+import asyncio
+import json
+import statistics
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+
+from core.dados_sinteticos import banco_descartavel, semear_apostas, semear_usuarios, telefone_sintetico
+
+SENHA = 'senha-carga'
+
+# Contador de consultas da requisição em andamento (propagado para as threads do sync_to_async)
+_consultas = ContextVar('consultas', default=None)
+
+
+def _contar_consulta(execute, sql, params, many, context):
+    contador = _consultas.get()
+    if contador is not None:
+        contador[0] += 1
+    return execute(sql, params, many, context)
+
+
+def _instalar_contador(sender, connection, **kwargs):
+    if _contar_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_contar_consulta)
+
+
+def _percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p / 100))]
+
+
+class Command(BaseCommand):
+    help = ("Teste de carga HTTP: cria um banco de teste (do banco configurado ou --sqlite), "
+            "semeia usuários e apostas e executa sessões concorrentes "
+            "(cadastro -> login -> /dados/ -> /registrar/ -> /confirmar_pagamento_aposta/) "
+            "pela aplicação WSGI ou ASGI. Emite latência p50/p95/p99, vazão e consultas por endpoint em JSON.")
+
+    # As verificações de sistema abririam a conexão com o banco configurado antes do --sqlite
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=200, help="Usuários semeados antes da carga (padrão: 200).")
+        parser.add_argument('--apostas', type=int, default=2000, help="Apostas semeadas antes da carga (padrão: 2000).")
+        parser.add_argument('--sessoes', type=int, default=50, help="Sessões roteirizadas, cada uma um convidado novo (padrão: 50).")
+        parser.add_argument('--concorrencia', type=int, default=10, help="Sessões simultâneas (padrão: 10).")
+        parser.add_argument('--polls', type=int, default=5, help="Leituras de /dados/ por sessão (padrão: 5).")
+        parser.add_argument('--interface', choices=['wsgi', 'asgi'], default='wsgi', help="Aplicação usada (padrão: wsgi).")
+        parser.add_argument('--sqlite', action='store_true', help="Usa um SQLite temporário no lugar do banco configurado.")
+        parser.add_argument('--senha-rapida', action='store_true',
+                            help="Usa um hasher barato, para medir o resto do fluxo sem o custo do PBKDF2.")
+        parser.add_argument('--saida', help="Também grava o JSON do resultado neste arquivo.")
+
+    def handle(self, *args, **options):
+        configuracoes = {
+            'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'testserver'],
+            # Todas as sessões saem do mesmo IP: os limites por IP não se aplicam aqui
+            'LOGIN_LIMITE_IP': (10 ** 9, 10 ** 9),
+            'CADASTRO_LIMITE_IP': (10 ** 9, 10 ** 9),
+        }
+        if options['senha_rapida']:
+            configuracoes['PASSWORD_HASHERS'] = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+        connection_created.connect(_instalar_contador)
+        try:
+            with override_settings(**configuracoes), banco_descartavel(sqlite=options['sqlite']):
+                _instalar_contador(None, connection)
+                inicio = time.perf_counter()
+                usuario_ids = semear_usuarios(options['usuarios'], senha=SENHA)
+                semear_apostas(usuario_ids, options['apostas'], semente=42)
+                tempo_semeadura = time.perf_counter() - inicio
+
+                medicoes, duracao = self._executar(options)
+        finally:
+            connection_created.disconnect(_instalar_contador)
+
+        resultado = {
+            'configuracao': {
+                chave: options[chave]
+                for chave in ('usuarios', 'apostas', 'sessoes', 'concorrencia', 'polls', 'interface', 'sqlite', 'senha_rapida')
+            },
+            'banco': connection.vendor,
+            'semeadura_s': round(tempo_semeadura, 2),
+            'duracao_s': round(duracao, 2),
+            'requisicoes': sum(len(m) for m in medicoes.values()),
+            'requisicoes_por_segundo': round(sum(len(m) for m in medicoes.values()) / duracao, 1),
+            'endpoints': {nome: self._resumo(lista, duracao) for nome, lista in medicoes.items()},
+        }
+        saida = json.dumps(resultado, indent=2)
+        if options['saida']:
+            Path(options['saida']).write_text(saida + '\n', encoding='utf-8')
+        self.stdout.write(saida)
+
+    def _resumo(self, medicoes, duracao):
+        latencias = [m[0] for m in medicoes]
+        consultas = [m[2] for m in medicoes]
+        return {
+            'requisicoes': len(medicoes),
+            'erros': sum(1 for m in medicoes if m[1] >= 400),
+            'requisicoes_por_segundo': round(len(medicoes) / duracao, 1),
+            'latencia_ms': {
+                'p50': round(_percentil(latencias, 50) * 1000, 1),
+                'p95': round(_percentil(latencias, 95) * 1000, 1),
+                'p99': round(_percentil(latencias, 99) * 1000, 1),
+                'media': round(statistics.mean(latencias) * 1000, 1),
+            },
+            'consultas': {'media': round(statistics.mean(consultas), 1), 'max': max(consultas)},
+        }
+
+    def _roteiro(self, numero, polls):
+        """
+        Passos de uma sessão: (endpoint, método, caminho, dados, content_type).
+        O id da aposta criada em /registrar/ é preenchido durante a execução.
+        """
+        telefone = telefone_sintetico(10 ** 7 + numero)
+        yield 'cadastro', 'post', '/cadastro_usuario/', {
+            'nome': f'Carga {numero}', 'telefone': telefone, 'chave_pix': telefone,
+            'senha': SENHA, 'confirma_senha': SENHA, 'termos': 'on',
+        }, None
+        yield 'login', 'post', '/login/', {'telefone': telefone, 'senha': SENHA}, 'application/json'
+        for _ in range(polls):
+            yield 'dados', 'get', '/dados/', None, None
+        yield 'registrar', 'post', '/registrar/', {'sexo_escolha': 'MF'[numero % 2], 'valor_aposta': '10.00'}, 'application/json'
+        yield 'confirmar_pagamento', 'post', '/confirmar_pagamento_aposta/', {}, 'application/json'
+
+    @staticmethod
+    def _argumentos(dados, content_type, aposta_id):
+        if content_type:
+            if aposta_id is not None and dados == {}:
+                dados = {'aposta_id': aposta_id}
+            return (dados,), {'content_type': content_type}
+        return ((dados,) if dados else ()), {}
+
+    def _executar(self, options):
+        medicoes = defaultdict(list)
+        if options['interface'] == 'asgi':
+            inicio = time.perf_counter()
+            asyncio.run(self._executar_asgi(options, medicoes))
+        else:
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['concorrencia']) as executor:
+                list(executor.map(lambda numero: self._sessao_wsgi(numero, options['polls'], medicoes), range(options['sessoes'])))
+        return medicoes, time.perf_counter() - inicio
+
+    def _sessao_wsgi(self, numero, polls, medicoes):
+        cliente = Client()
+        aposta_id = None
+        try:
+            for endpoint, metodo, caminho, dados, content_type in self._roteiro(numero, polls):
+                args, kwargs = self._argumentos(dados, content_type, aposta_id)
+                contador = [0]
+                token = _consultas.set(contador)
+                inicio = time.perf_counter()
+                resposta = getattr(cliente, metodo)(caminho, *args, **kwargs)
+                medicoes[endpoint].append((time.perf_counter() - inicio, resposta.status_code, contador[0]))
+                _consultas.reset(token)
+                if endpoint == 'registrar' and resposta.status_code == 200:
+                    aposta_id = resposta.json()['aposta_id']
+        finally:
+            connection.close()
+
+    async def _executar_asgi(self, options, medicoes):
+        semaforo = asyncio.Semaphore(options['concorrencia'])
+
+        async def sessao(numero):
+            async with semaforo:
+                cliente = AsyncClient()
+                aposta_id = None
+                for endpoint, metodo, caminho, dados, content_type in self._roteiro(numero, options['polls']):
+                    args, kwargs = self._argumentos(dados, content_type, aposta_id)
+                    contador = [0]
+                    _consultas.set(contador)
+                    inicio = time.perf_counter()
+                    resposta = await getattr(cliente, metodo)(caminho, *args, **kwargs)
+                    medicoes[endpoint].append((time.perf_counter() - inicio, resposta.status_code, contador[0]))
+                    if endpoint == 'registrar' and resposta.status_code == 200:
+                        aposta_id = resposta.json()['aposta_id']
+
+        await asyncio.gather(*(sessao(numero) for numero in range(options['sessoes'])))
@@ -0,0 +1,168 @@
+"""
+Métricas em memória do processo: contadores simples e, por view, histograma de
+latência, consultas SQL, tempo de SQL e acertos/falhas de cache (preenchidos
+pelo MetricasMiddleware, em core/middleware.py).
+"""
+import bisect
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from threading import Lock
+
+
+class Contador:
+    """
+    Contadores simples em memória, seguros entre threads do mesmo processo.
+    """
+
+    def __init__(self):
+        self._valores = defaultdict(int)
+        self._lock = Lock()
+
+    def incrementar(self, nome, valor=1):
+        with self._lock:
+            self._valores[nome] += valor
+
+    def valores(self):
+        with self._lock:
+            return dict(self._valores)
+
+
+class MedicaoRequisicao:
+    """
+    Acumuladores da requisição em andamento (uma instância por requisição).
+    """
+    __slots__ = ('consultas', 'tempo_sql', 'cache_hits', 'cache_misses')
+
+    def __init__(self):
+        self.consultas = 0
+        self.tempo_sql = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+# Medição da requisição atual; o contexto é copiado para as threads do sync_to_async
+medicao_atual = ContextVar('medicao_atual', default=None)
+
+
+class ContadorCache(Contador):
+    """
+    Contador de acertos/falhas de cache que também soma na requisição em andamento.
+    Os nomes terminam em '_hit' ou '_miss' (ex.: 'pote_hit').
+    """
+
+    def incrementar(self, nome, valor=1):
+        super().incrementar(nome, valor)
+        medicao = medicao_atual.get()
+        if medicao is not None:
+            if nome.endswith('_hit'):
+                medicao.cache_hits += valor
+            else:
+                medicao.cache_misses += valor
+
+
+def medir_consulta(execute, sql, params, many, context):
+    """
+    execute_wrapper instalado em todas as conexões: conta e cronometra as consultas
+    da requisição em andamento (sem medição ativa, só o custo de um ContextVar.get).
+    """
+    medicao = medicao_atual.get()
+    if medicao is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        medicao.tempo_sql += time.perf_counter() - inicio
+        medicao.consultas += 1
+
+
+def instalar_medicao(sender, connection, **kwargs):
+    """
+    Receiver de connection_created: instala medir_consulta em cada conexão aberta.
+    """
+    if medir_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.append(medir_consulta)
+
+
+class MetricasViews:
+    """
+    Histograma de latência e totais de SQL/cache por nome de view.
+    """
+    LIMITES = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self):
+        self._lock = Lock()
+        self._views = {}
+
+    def registrar(self, view, duracao, medicao):
+        with self._lock:
+            dados = self._views.get(view)
+            if dados is None:
+                dados = self._views[view] = {
+                    'baldes': [0] * (len(self.LIMITES) + 1),
+                    'soma': 0.0,
+                    'quantidade': 0,
+                    'consultas': 0,
+                    'tempo_sql': 0.0,
+                    'cache_hits': 0,
+                    'cache_misses': 0,
+                }
+            dados['baldes'][bisect.bisect_left(self.LIMITES, duracao)] += 1
+            dados['soma'] += duracao
+            dados['quantidade'] += 1
+            dados['consultas'] += medicao.consultas
+            dados['tempo_sql'] += medicao.tempo_sql
+            dados['cache_hits'] += medicao.cache_hits
+            dados['cache_misses'] += medicao.cache_misses
+
+    def valores(self):
+        with self._lock:
+            return {view: {**dados, 'baldes': list(dados['baldes'])} for view, dados in self._views.items()}
+
+
+def _rotulo(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def formato_prometheus(metricas, contadores_cache):
+    """
+    Serializa as métricas por view e os contadores de cache no formato texto do Prometheus.
+    """
+    linhas = [
+        '# HELP http_request_duration_seconds Latência das requisições por view.',
+        '# TYPE http_request_duration_seconds histogram',
+    ]
+    for view, dados in sorted(metricas.items()):
+        rotulo = _rotulo(view)
+        acumulado = 0
+        for limite, quantidade in zip(MetricasViews.LIMITES, dados['baldes']):
+            acumulado += quantidade
+            linhas.append(f'http_request_duration_seconds_bucket{{view="{rotulo}",le="{limite}"}} {acumulado}')
+        linhas.append(f'http_request_duration_seconds_bucket{{view="{rotulo}",le="+Inf"}} {dados["quantidade"]}')
+        linhas.append(f'http_request_duration_seconds_sum{{view="{rotulo}"}} {dados["soma"]:.6f}')
+        linhas.append(f'http_request_duration_seconds_count{{view="{rotulo}"}} {dados["quantidade"]}')
+
+    for nome, chave, ajuda, formato in (
+        ('http_sql_queries_total', 'consultas', 'Consultas SQL executadas por view.', '{}'),
+        ('http_sql_duration_seconds_total', 'tempo_sql', 'Tempo gasto em SQL por view.', '{:.6f}'),
+        ('http_cache_hits_total', 'cache_hits', 'Acertos de cache (pote/QR Code) por view.', '{}'),
+        ('http_cache_misses_total', 'cache_misses', 'Falhas de cache (pote/QR Code) por view.', '{}'),
+    ):
+        linhas.append(f'# HELP {nome} {ajuda}')
+        linhas.append(f'# TYPE {nome} counter')
+        for view, dados in sorted(metricas.items()):
+            linhas.append(f'{nome}{{view="{_rotulo(view)}"}} {formato.format(dados[chave])}')
+
+    linhas.append('# TYPE cache_eventos_total counter')
+    for nome, valor in sorted(contadores_cache.items()):
+        cache, _, evento = nome.rpartition('_')
+        linhas.append(f'cache_eventos_total{{cache="{_rotulo(cache)}",evento="{_rotulo(evento)}"}} {valor}')
+    return '\n'.join(linhas) + '\n'
+
+
+# Acertos e falhas do cache do pote/odds (ver core/cache_pote.py)
+contador_cache = ContadorCache()
+
+# Latência, SQL e cache por view (ver core/middleware.py)
+metricas_views = MetricasViews()
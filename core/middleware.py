@@ -0,0 +1,58 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .metricas import MedicaoRequisicao, medicao_atual, metricas_views
+
+
+class MetricasMiddleware:
+    """
+    Mede cada requisição: latência, consultas SQL e tempo de SQL (execute_wrapper que
+    CoreConfig.ready() instala em todas as conexões, inclusive as das threads do
+    sync_to_async) e acertos/falhas de
+    cache, agregados pelo nome da view resolvida. Com METRICAS_SERVER_TIMING = True,
+    também devolve os números no cabeçalho Server-Timing.
+    Deve ser o primeiro da lista MIDDLEWARE, para medir a pilha inteira.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'METRICAS_SERVER_TIMING', False)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        medicao = MedicaoRequisicao()
+        token = medicao_atual.set(medicao)
+        inicio = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            medicao_atual.reset(token)
+        return self._finalizar(request, response, time.perf_counter() - inicio, medicao)
+
+    async def __acall__(self, request):
+        medicao = MedicaoRequisicao()
+        token = medicao_atual.set(medicao)
+        inicio = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            medicao_atual.reset(token)
+        return self._finalizar(request, response, time.perf_counter() - inicio, medicao)
+
+    def _finalizar(self, request, response, duracao, medicao):
+        match = getattr(request, 'resolver_match', None)
+        metricas_views.registrar(match.view_name if match else 'nao_resolvida', duracao, medicao)
+        if self.server_timing:
+            response['Server-Timing'] = (
+                f'app;dur={duracao * 1000:.1f}, '
+                f'db;dur={medicao.tempo_sql * 1000:.1f};desc="{medicao.consultas} consultas", '
+                f'cache;desc="{medicao.cache_hits} hits {medicao.cache_misses} misses"'
+            )
+        return response
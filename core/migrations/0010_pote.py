@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:58
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def popular_pote(apps, schema_editor):
+    """
+    Cria a linha única do Pote já com os totais das apostas válidas existentes.
+    """
+    Aposta = apps.get_model('core', 'Aposta')
+    Pote = apps.get_model('core', 'Pote')
+
+    pote = Pote(pk=1)
+    linhas = Aposta.objects.filter(status='valida').values('sexo_escolha').annotate(
+        pote=Sum('valor_para_pote'),
+        bruto=Sum('valor_aposta'),
+        quantidade=Count('id'),
+    ).order_by()
+    for linha in linhas:
+        sufixo = 'masculino' if linha['sexo_escolha'] == 'M' else 'feminino'
+        setattr(pote, f'total_{sufixo}', linha['pote'] or Decimal('0.00'))
+        setattr(pote, f'quantidade_{sufixo}', linha['quantidade'])
+        pote.total_bruto += linha['bruto'] or Decimal('0.00')
+    pote.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_alter_usuario_chave_pix'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Pote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_masculino', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Pote Masculino')),
+                ('total_feminino', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Pote Feminino')),
+                ('total_bruto', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Total Arrecadado Bruto')),
+                ('quantidade_masculino', models.PositiveIntegerField(default=0, verbose_name='Apostas Válidas (Menino)')),
+                ('quantidade_feminino', models.PositiveIntegerField(default=0, verbose_name='Apostas Válidas (Menina)')),
+                ('atualizado_em', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Pote',
+                'verbose_name_plural': 'Pote',
+            },
+        ),
+        migrations.AlterField(
+            model_name='aposta',
+            name='status',
+            field=models.CharField(choices=[('pendente', 'Pendente de Pagamento'), ('aguardando_validacao', 'Aguardando Validação'), ('valida', 'Válida'), ('cancelada', 'Cancelada'), ('rejeitada', 'Rejeitada')], default='pendente', help_text='Status atual da aposta (ex: pendente, aguardando validação, válida).', max_length=20, verbose_name='Status da Aposta'),
+        ),
+        migrations.AlterField(
+            model_name='aposta',
+            name='valor_para_pote',
+            field=models.DecimalField(blank=True, decimal_places=2, default=Decimal('0.00'), help_text='Valor líquido da contribuição após a dedução da taxa.', max_digits=8, verbose_name='Valor para o Pote'),
+        ),
+        migrations.AddIndex(
+            model_name='aposta',
+            index=models.Index(fields=['status'], name='core_aposta_status_784adb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aposta',
+            index=models.Index(fields=['sexo_escolha', 'status'], name='core_aposta_sexo_es_c0e813_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aposta',
+            index=models.Index(fields=['-data_aposta'], name='core_aposta_data_ap_a1216e_idx'),
+        ),
+        migrations.RunPython(popular_pote, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:02
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def popular_resumos(apps, schema_editor):
+    """
+    Cria o resumo de cada usuário que já possui apostas válidas.
+    """
+    Aposta = apps.get_model('core', 'Aposta')
+    ResumoApostasUsuario = apps.get_model('core', 'ResumoApostasUsuario')
+
+    resumos = {}
+    linhas = Aposta.objects.filter(status='valida').values('usuario_id').annotate(
+        total=Sum('valor_aposta'),
+        quantidade=Count('id'),
+    ).order_by()
+    for linha in linhas:
+        resumos[linha['usuario_id']] = ResumoApostasUsuario(
+            usuario_id=linha['usuario_id'],
+            total_validado=linha['total'],
+            quantidade_validas=linha['quantidade'],
+        )
+
+    # A primeira aposta de cada usuário nesta ordenação é a última válida
+    for aposta in Aposta.objects.filter(status='valida').order_by('usuario_id', '-data_aposta', '-id').iterator():
+        resumo = resumos[aposta.usuario_id]
+        if resumo.id_ultima_aposta is None:
+            resumo.id_ultima_aposta = aposta.id
+            resumo.ultima_sexo = aposta.sexo_escolha
+            resumo.ultima_valor = aposta.valor_aposta
+            resumo.ultima_data = aposta.data_aposta
+
+    ResumoApostasUsuario.objects.bulk_create(resumos.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_pote'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoApostasUsuario',
+            fields=[
+                ('usuario', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='resumo_apostas', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+                ('total_validado', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Total Apostado (válidas)')),
+                ('quantidade_validas', models.PositiveIntegerField(default=0, verbose_name='Quantidade de Apostas Válidas')),
+                ('id_ultima_aposta', models.BigIntegerField(blank=True, null=True, verbose_name='ID da Última Aposta Válida')),
+                ('ultima_sexo', models.CharField(blank=True, default='', max_length=1, verbose_name='Palpite da Última Aposta')),
+                ('ultima_valor', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True, verbose_name='Valor da Última Aposta')),
+                ('ultima_data', models.DateTimeField(blank=True, null=True, verbose_name='Data da Última Aposta')),
+                ('atualizado_em', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Resumo de Apostas do Usuário',
+                'verbose_name_plural': 'Resumos de Apostas dos Usuários',
+            },
+        ),
+        migrations.RunPython(popular_resumos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_resumoapostasusuario'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aposta',
+            name='lote_transicao',
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='aposta',
+            name='status_anterior',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+    ]
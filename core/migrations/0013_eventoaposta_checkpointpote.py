@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:15
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def popular_eventos(apps, schema_editor):
+    """
+    Cria um evento de criação para cada aposta existente, com o status atual e
+    data_aposta como momento (o histórico anterior de status não foi registrado).
+    """
+    Aposta = apps.get_model('core', 'Aposta')
+    EventoAposta = apps.get_model('core', 'EventoAposta')
+
+    eventos = (
+        EventoAposta(
+            aposta_id=aposta.id,
+            status_anterior='',
+            status_novo=aposta.status,
+            sexo_escolha=aposta.sexo_escolha,
+            valor_aposta=aposta.valor_aposta,
+            valor_para_pote=aposta.valor_para_pote,
+            criado_em=aposta.data_aposta,
+        )
+        for aposta in Aposta.objects.order_by('data_aposta', 'id').iterator()
+    )
+    lote = []
+    for evento in eventos:
+        lote.append(evento)
+        if len(lote) == 1000:
+            EventoAposta.objects.bulk_create(lote)
+            lote = []
+    EventoAposta.objects.bulk_create(lote)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_aposta_transicao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CheckpointPote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ultimo_evento_id', models.BigIntegerField(unique=True, verbose_name='Último Evento')),
+                ('momento', models.DateTimeField(db_index=True, verbose_name='Momento')),
+                ('total_masculino', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Pote Masculino')),
+                ('total_feminino', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Pote Feminino')),
+                ('total_bruto', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Total Arrecadado Bruto')),
+                ('quantidade_masculino', models.PositiveIntegerField(verbose_name='Apostas Válidas (Menino)')),
+                ('quantidade_feminino', models.PositiveIntegerField(verbose_name='Apostas Válidas (Menina)')),
+            ],
+            options={
+                'verbose_name': 'Checkpoint do Pote',
+                'verbose_name_plural': 'Checkpoints do Pote',
+            },
+        ),
+        migrations.CreateModel(
+            name='EventoAposta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('aposta_id', models.BigIntegerField(db_index=True, verbose_name='Aposta')),
+                ('status_anterior', models.CharField(blank=True, max_length=20, verbose_name='Status Anterior')),
+                ('status_novo', models.CharField(blank=True, max_length=20, verbose_name='Status Novo')),
+                ('sexo_escolha', models.CharField(max_length=1, verbose_name='Palpite')),
+                ('valor_aposta', models.DecimalField(decimal_places=2, max_digits=8, verbose_name='Valor da Aposta')),
+                ('valor_para_pote', models.DecimalField(decimal_places=2, max_digits=8, verbose_name='Valor para o Pote')),
+                ('criado_em', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Criado em')),
+            ],
+            options={
+                'verbose_name': 'Evento de Aposta',
+                'verbose_name_plural': 'Eventos de Apostas',
+            },
+        ),
+        migrations.RunPython(popular_eventos, migrations.RunPython.noop),
+    ]
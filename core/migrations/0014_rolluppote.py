@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:17
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def popular_rollups(apps, schema_editor):
+    """
+    Monta os rollups por minuto e por hora a partir do log de eventos.
+    """
+    EventoAposta = apps.get_model('core', 'EventoAposta')
+    RollupPote = apps.get_model('core', 'RollupPote')
+
+    rollups = {}
+    eventos = EventoAposta.objects.filter(
+        models.Q(status_anterior='valida') | models.Q(status_novo='valida')
+    ).order_by('pk')
+    for evento in eventos.iterator():
+        sinal = (evento.status_novo == 'valida') - (evento.status_anterior == 'valida')
+        sufixo = 'masculino' if evento.sexo_escolha == 'M' else 'feminino'
+        for granularidade, inicio in (
+            ('minuto', evento.criado_em.replace(second=0, microsecond=0)),
+            ('hora', evento.criado_em.replace(minute=0, second=0, microsecond=0)),
+        ):
+            rollup = rollups.setdefault((granularidade, inicio), RollupPote(granularidade=granularidade, inicio=inicio))
+            setattr(rollup, f'total_{sufixo}', getattr(rollup, f'total_{sufixo}') + sinal * evento.valor_para_pote)
+            setattr(rollup, f'quantidade_{sufixo}', getattr(rollup, f'quantidade_{sufixo}') + sinal)
+            rollup.total_bruto += sinal * evento.valor_aposta
+
+    RollupPote.objects.bulk_create(rollups.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_eventoaposta_checkpointpote'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupPote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularidade', models.CharField(choices=[('minuto', 'Minuto'), ('hora', 'Hora')], max_length=6, verbose_name='Granularidade')),
+                ('inicio', models.DateTimeField(verbose_name='Início do Intervalo')),
+                ('total_masculino', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Variação Pote Masculino')),
+                ('total_feminino', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Variação Pote Feminino')),
+                ('total_bruto', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Variação Total Bruto')),
+                ('quantidade_masculino', models.IntegerField(default=0, verbose_name='Variação Apostas Válidas (Menino)')),
+                ('quantidade_feminino', models.IntegerField(default=0, verbose_name='Variação Apostas Válidas (Menina)')),
+            ],
+            options={
+                'verbose_name': 'Rollup do Pote',
+                'verbose_name_plural': 'Rollups do Pote',
+                'constraints': [models.UniqueConstraint(fields=('granularidade', 'inicio'), name='rollup_pote_granularidade_inicio')],
+            },
+        ),
+        migrations.RunPython(popular_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,130 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:38
+
+import django.core.validators
+import django.db.models.deletion
+import django.utils.timezone
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+def criar_evento_padrao(apps, schema_editor):
+    """
+    Cria o evento padrão (pk=1) com o recebedor PIX das configurações.
+    As apostas, o pote, o log e os rollups existentes passam a pertencer a ele.
+    """
+    Evento = apps.get_model('core', 'Evento')
+    Evento.objects.get_or_create(pk=1, defaults={
+        'nome': 'Chá Revelação',
+        'chave_pix_recebedor': settings.PIX_CHAVE_RECEBEDOR,
+        'nome_recebedor': settings.PIX_NOME_RECEBEDOR,
+        'cidade_recebedor': settings.PIX_CIDADE_RECEBEDOR,
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_rolluppote'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Evento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=100, verbose_name='Nome do Evento')),
+                ('chave_pix_recebedor', models.CharField(max_length=77, verbose_name='Chave PIX do Recebedor')),
+                ('nome_recebedor', models.CharField(max_length=25, verbose_name='Nome do Recebedor')),
+                ('cidade_recebedor', models.CharField(max_length=15, verbose_name='Cidade do Recebedor')),
+                ('taxa', models.DecimalField(decimal_places=3, default=Decimal('0.25'), help_text='Fração do valor apostado que fica com os pais (ex: 0,250 = 25%).', max_digits=4, validators=[django.core.validators.MinValueValidator(Decimal('0')), django.core.validators.MaxValueValidator(Decimal('1'))], verbose_name='Taxa')),
+                ('status', models.CharField(choices=[('aberto', 'Aberto para Apostas'), ('encerrado', 'Apostas Encerradas'), ('revelado', 'Sexo Revelado')], default='aberto', max_length=10, verbose_name='Status do Evento')),
+                ('criado_em', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+            ],
+            options={
+                'verbose_name': 'Evento',
+                'verbose_name_plural': 'Eventos',
+            },
+        ),
+        migrations.RunPython(criar_evento_padrao, migrations.RunPython.noop),
+        migrations.AlterModelOptions(
+            name='pote',
+            options={'verbose_name': 'Pote', 'verbose_name_plural': 'Potes'},
+        ),
+        migrations.RemoveConstraint(
+            model_name='rolluppote',
+            name='rollup_pote_granularidade_inicio',
+        ),
+        migrations.RemoveIndex(
+            model_name='aposta',
+            name='core_aposta_status_784adb_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='aposta',
+            name='core_aposta_sexo_es_c0e813_idx',
+        ),
+        migrations.AlterField(
+            model_name='checkpointpote',
+            name='momento',
+            field=models.DateTimeField(verbose_name='Momento'),
+        ),
+        migrations.AlterField(
+            model_name='eventoaposta',
+            name='criado_em',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Criado em'),
+        ),
+        migrations.AddField(
+            model_name='aposta',
+            name='evento',
+            field=models.ForeignKey(db_index=False, default=1, on_delete=django.db.models.deletion.PROTECT, related_name='apostas', to='core.evento', verbose_name='Evento'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='checkpointpote',
+            name='evento',
+            field=models.ForeignKey(db_index=False, default=1, on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints', to='core.evento', verbose_name='Evento'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='eventoaposta',
+            name='evento',
+            field=models.ForeignKey(db_index=False, default=1, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.evento', verbose_name='Evento'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='pote',
+            name='evento',
+            field=models.OneToOneField(default=1, on_delete=django.db.models.deletion.CASCADE, related_name='pote', to='core.evento', verbose_name='Evento'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='rolluppote',
+            name='evento',
+            field=models.ForeignKey(db_index=False, default=1, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.evento', verbose_name='Evento'),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='aposta',
+            index=models.Index(fields=['evento', 'status'], name='core_aposta_evento__4bf7de_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aposta',
+            index=models.Index(fields=['evento', 'sexo_escolha', 'status'], name='core_aposta_evento__c9099b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aposta',
+            index=models.Index(fields=['evento', '-data_aposta'], name='core_aposta_evento__b96c91_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='checkpointpote',
+            index=models.Index(fields=['evento', 'momento'], name='core_checkp_evento__8f7a85_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventoaposta',
+            index=models.Index(fields=['evento', 'criado_em'], name='core_evento_evento__8a3ff2_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='rolluppote',
+            constraint=models.UniqueConstraint(fields=('evento', 'granularidade', 'inicio'), name='rollup_pote_evento_granularidade_inicio'),
+        ),
+    ]
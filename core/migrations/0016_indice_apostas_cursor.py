@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_evento'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='aposta',
+            name='core_aposta_data_ap_a1216e_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='aposta',
+            name='core_aposta_evento__b96c91_idx',
+        ),
+        migrations.AddIndex(
+            model_name='aposta',
+            index=models.Index(fields=['evento', '-data_aposta', '-id'], name='core_aposta_evento__16f6da_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aposta',
+            index=models.Index(fields=['-data_aposta', '-id'], name='core_aposta_data_ap_b4ca66_idx'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:54
+
+import unicodedata
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Cópia da tokenização de core/busca.py no momento desta migração: mudanças futuras
+# no tokenizador não alteram o que a migração histórica grava
+def _normalizar(texto):
+    decomposto = unicodedata.normalize('NFKD', texto.lower())
+    return ''.join(caractere for caractere in decomposto if not unicodedata.combining(caractere))
+
+
+def _trigramas(texto):
+    texto = _normalizar(texto)
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+def trigramas_do_usuario(nome, telefone):
+    return _trigramas(nome) | _trigramas(telefone)
+
+
+def indexar_usuarios(apps, schema_editor):
+    """
+    Preenche os trigramas de busca dos usuários existentes.
+    """
+    Usuario = apps.get_model('core', 'Usuario')
+    TrigramaUsuario = apps.get_model('core', 'TrigramaUsuario')
+    lote = []
+    for usuario_id, nome, telefone in Usuario.objects.values_list('pk', 'nome', 'telefone').iterator(chunk_size=2000):
+        lote.extend(TrigramaUsuario(usuario_id=usuario_id, trigrama=trigrama)
+                    for trigrama in trigramas_do_usuario(nome, telefone))
+        if len(lote) >= 10000:
+            TrigramaUsuario.objects.bulk_create(lote, batch_size=2000)
+            lote = []
+    TrigramaUsuario.objects.bulk_create(lote, batch_size=2000)
+
+
+def criar_fulltext(apps, schema_editor):
+    """
+    No MySQL, índice FULLTEXT (parser ngram) em nome e telefone para a busca do admin.
+    Sem stopwords: com o ngram, qualquer n-grama que contenha uma stopword ("de", "la",
+    "an"...) ficaria fora do índice e a busca por nomes como "Ana" deixaria de achá-los.
+    """
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute('SET SESSION innodb_ft_enable_stopword = OFF')
+    schema_editor.execute(
+        'ALTER TABLE core_usuario ADD FULLTEXT INDEX core_usuario_busca_ft (nome, telefone) WITH PARSER ngram'
+    )
+
+
+def remover_fulltext(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('ALTER TABLE core_usuario DROP INDEX core_usuario_busca_ft')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_indice_apostas_cursor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrigramaUsuario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigrama', models.CharField(max_length=3, verbose_name='Trigrama')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Trigrama de Usuário',
+                'verbose_name_plural': 'Trigramas de Usuários',
+                'constraints': [models.UniqueConstraint(fields=('trigrama', 'usuario'), name='trigrama_usuario_unico')],
+            },
+        ),
+        migrations.RunPython(indexar_usuarios, migrations.RunPython.noop),
+        migrations.RunPython(criar_fulltext, remover_fulltext),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:03
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_busca_usuarios'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatorioFinanceiro',
+            fields=[
+                ('evento', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='relatorio_financeiro', serialize=False, to='core.evento', verbose_name='Evento')),
+                ('dados', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Relatório')),
+                ('gerado_em', models.DateTimeField(verbose_name='Gerado em')),
+            ],
+            options={
+                'verbose_name': 'Relatório Financeiro',
+                'verbose_name_plural': 'Relatórios Financeiros',
+            },
+        ),
+    ]
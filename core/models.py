@@ -141,70 +141,1028 @@ class Usuario(AbstractBaseUser, PermissionsMixin):
         return self.ativo
 
 
-from django.db import models
+import uuid
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+from django.db import IntegrityError, models, transaction
 from django.conf import settings
 from decimal import Decimal
-from django.core.validators import MinValueValidator
-from django.db.models import Sum
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db.models import Sum, Count, F, Max, OuterRef, Q, Subquery
+from django.db.models.query import ModelIterable
+from django.utils import timezone
 from decimal import ROUND_HALF_UP
 
-class ApostaManager(models.Manager):
+from .busca import TAMANHO_TRIGRAMA, trigramas_do_usuario
+from .cache_pote import invalidar_pote, snapshot_pote
+from .cache_usuario import invalidar_usuarios
+
+# Fração do valor apostado que fica com os pais quando o evento não define outra
+TAXA_PADRAO = Decimal('0.25')
+
+
+class EventoManager(models.Manager):
+    """
+    Manager dos eventos (chás revelação) hospedados na instalação.
+    O evento padrão (pk=1) é o usado sempre que nenhum evento é informado.
+    """
+
+    PK_PADRAO = 1
+
+    def padrao(self):
+        """
+        Retorna o evento padrão, criando-o com o recebedor PIX das configurações caso não exista.
+        """
+        evento, _ = self.get_or_create(pk=self.PK_PADRAO, defaults={
+            'nome': 'Chá Revelação',
+            'chave_pix_recebedor': settings.PIX_CHAVE_RECEBEDOR,
+            'nome_recebedor': settings.PIX_NOME_RECEBEDOR,
+            'cidade_recebedor': settings.PIX_CIDADE_RECEBEDOR,
+        })
+        return evento
+
+    def id_de(self, evento):
+        """
+        Aceita um Evento, um id ou None (evento padrão) e retorna o id, sem consultar o banco.
+        """
+        if evento is None:
+            return self.PK_PADRAO
+        return getattr(evento, 'pk', evento)
+
+
+class Evento(models.Model):
+    """
+    Um chá revelação hospedado na instalação. Cada evento tem o próprio recebedor
+    PIX, a própria taxa e o próprio pote; cada aposta pertence a um único evento.
+    """
+    nome = models.CharField(max_length=100, verbose_name="Nome do Evento")
+    # Limites de tamanho do BR Code (nome do recebedor: 25, cidade: 15)
+    chave_pix_recebedor = models.CharField(max_length=77, verbose_name="Chave PIX do Recebedor")
+    nome_recebedor = models.CharField(max_length=25, verbose_name="Nome do Recebedor")
+    cidade_recebedor = models.CharField(max_length=15, verbose_name="Cidade do Recebedor")
+    taxa = models.DecimalField(
+        max_digits=4,
+        decimal_places=3,
+        default=TAXA_PADRAO,
+        validators=[MinValueValidator(Decimal('0')), MaxValueValidator(Decimal('1'))],
+        help_text="Fração do valor apostado que fica com os pais (ex: 0,250 = 25%).",
+        verbose_name="Taxa"
+    )
+
+    STATUS_CHOICES = [
+        ('aberto', 'Aberto para Apostas'),
+        ('encerrado', 'Apostas Encerradas'),
+        ('revelado', 'Sexo Revelado'),
+    ]
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='aberto', verbose_name="Status do Evento")
+    criado_em = models.DateTimeField(auto_now_add=True, verbose_name="Criado em")
+
+    objects = EventoManager()
+
+    class Meta:
+        verbose_name = "Evento"
+        verbose_name_plural = "Eventos"
+
+    def __str__(self):
+        return self.nome
+
+    @property
+    def aceita_apostas(self):
+        return self.status == 'aberto'
+
+    def _taxa_no_banco(self):
+        if self._state.adding or self.pk is None:
+            return None
+        return Evento.objects.filter(pk=self.pk).values_list('taxa', flat=True).first()
+
+    def taxa_travada(self):
+        """
+        A taxa fica travada depois da primeira aposta: o valor_para_pote de cada aposta é
+        calculado uma única vez, com a taxa do momento em que ela foi feita.
+        """
+        return not self._state.adding and self.pk is not None and self.apostas.exists()
+
+    def clean(self):
+        super().clean()
+        taxa_atual = self._taxa_no_banco()
+        if taxa_atual is not None and taxa_atual != self.taxa and self.taxa_travada():
+            raise ValidationError({'taxa': "A taxa não pode ser alterada depois que o evento recebeu apostas."})
+
+    def save(self, *args, **kwargs):
+        taxa_atual = self._taxa_no_banco()
+        if taxa_atual is not None and taxa_atual != self.taxa and self.taxa_travada():
+            raise ValueError(f"A taxa do evento '{self}' não pode ser alterada depois que ele recebeu apostas.")
+        super().save(*args, **kwargs)
+
+
+def calcular_valor_para_pote(valor_aposta, taxa=TAXA_PADRAO):
+    """
+    Valor que efetivamente vai para o pote: o valor apostado menos a taxa do evento (padrão: 75%).
+    """
+    if valor_aposta is None:
+        return Decimal('0.00')
+    return (valor_aposta * (1 - taxa)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+# Estado de uma aposta no banco, antes ou depois de uma alteração (None quando não existe)
+EstadoAposta = namedtuple('EstadoAposta', ['usuario_id', 'evento_id', 'status', 'sexo_escolha', 'valor_aposta', 'valor_para_pote'])
+
+# Uma alteração em uma aposta (criação, mudança de status/valor ou exclusão)
+AlteracaoAposta = namedtuple('AlteracaoAposta', ['aposta_id', 'data_aposta', 'antes', 'depois'])
+
+
+def contribuicao_pote(estado):
+    """
+    Retorna quanto uma aposta, no estado informado, contribui para cada
+    campo do Pote. Apostas que não estão 'valida' não contribuem em nada.
+    """
+    if estado is None or estado.status != 'valida':
+        return {}
+    if estado.sexo_escolha == 'M':
+        return {
+            'total_masculino': estado.valor_para_pote,
+            'quantidade_masculino': 1,
+            'total_bruto': estado.valor_aposta,
+        }
+    return {
+        'total_feminino': estado.valor_para_pote,
+        'quantidade_feminino': 1,
+        'total_bruto': estado.valor_aposta,
+    }
+
+
+def diferenca_contribuicao(anterior, nova):
+    """
+    Retorna o delta (nova - anterior) entre duas contribuições, sem as chaves zeradas.
+    """
+    delta = {}
+    for campo in set(anterior) | set(nova):
+        valor = nova.get(campo, 0) - anterior.get(campo, 0)
+        if valor:
+            delta[campo] = valor
+    return delta
+
+
+def registrar_alteracoes(alteracoes, atualizar_resumos=True):
+    """
+    Aplica um lote de alterações de apostas aos agregados mantidos de forma
+    incremental (Pote e rollups por minuto/hora de cada evento, log de eventos e
+    resumo por usuário). Deve ser chamado na mesma
+    transação que gravou as apostas, depois da escrita.
+    """
+    deltas = defaultdict(dict)  # evento_id -> delta
+    for alteracao in alteracoes:
+        antes, depois = alteracao.antes, alteracao.depois
+        if antes is not None and depois is not None and antes.evento_id != depois.evento_id:
+            # Aposta movida de evento: sai inteira de um pote e entra no outro
+            partes = [(antes.evento_id, contribuicao_pote(antes), {}), (depois.evento_id, {}, contribuicao_pote(depois))]
+        else:
+            partes = [((depois or antes).evento_id, contribuicao_pote(antes), contribuicao_pote(depois))]
+        for evento_id, anterior, nova in partes:
+            delta = deltas[evento_id]
+            for campo, valor in diferenca_contribuicao(anterior, nova).items():
+                delta[campo] = delta.get(campo, 0) + valor
+
+    for evento_id, delta in deltas.items():
+        Pote.objects.aplicar_delta(delta, evento_id)
+        RollupPote.objects.registrar_delta(delta, evento_id)
+    EventoAposta.objects.registrar(alteracoes)
+    if atualizar_resumos:
+        ResumoApostasUsuario.objects.registrar_alteracoes(alteracoes)
+
+
+class PoteManager(models.Manager):
+    """
+    Manager dos Potes consolidados. Existe uma linha por evento, atualizada
+    de forma incremental a cada transição de status para dentro ou para fora de 'valida'.
+    """
+
+    def atual(self, evento=None):
+        """
+        Retorna a linha do pote do evento (padrão: o evento padrão), criando-a zerada caso ainda não exista.
+        Levanta Evento.DoesNotExist para um evento inexistente, sem criar linha alguma.
+        """
+        evento_id = Evento.objects.id_de(evento)
+        pote = self.select_related('evento').filter(evento_id=evento_id).first()
+        if pote is None:
+            if evento_id == Evento.objects.PK_PADRAO:
+                Evento.objects.padrao()
+            elif not Evento.objects.filter(pk=evento_id).exists():
+                raise Evento.DoesNotExist(f"Evento {evento_id} não encontrado.")
+            self.get_or_create(evento_id=evento_id)
+            pote = self.select_related('evento').get(evento_id=evento_id)
+        return pote
+
+    def aplicar_delta(self, delta, evento=None):
+        """
+        Soma o delta informado ao pote do evento com um único UPDATE (F expressions).
+        Deve ser chamado dentro da mesma transação que alterou as apostas.
+        """
+        if not delta:
+            return
+        evento_id = Evento.objects.id_de(evento)
+        valores = {campo: F(campo) + valor for campo, valor in delta.items()}
+        valores['atualizado_em'] = timezone.now()
+        if not self.filter(evento_id=evento_id).update(**valores):
+            self.atual(evento_id)
+            self.filter(evento_id=evento_id).update(**valores)
+        invalidar_pote(evento_id, using=self.db)
+
+    def calcular_a_partir_das_apostas(self, evento=None):
+        """
+        Recalcula os totais do evento do zero com uma única consulta agrupada sobre as apostas válidas.
+        """
+        totais = {campo: Decimal('0.00') for campo in ('total_masculino', 'total_feminino', 'total_bruto')}
+        totais.update(quantidade_masculino=0, quantidade_feminino=0)
+
+        linhas = Aposta.objects.filter(evento_id=Evento.objects.id_de(evento), status='valida').values('sexo_escolha').annotate(
+            pote=Sum('valor_para_pote'),
+            bruto=Sum('valor_aposta'),
+            quantidade=Count('id'),
+        ).order_by()
+        for linha in linhas:
+            sufixo = 'masculino' if linha['sexo_escolha'] == 'M' else 'feminino'
+            totais[f'total_{sufixo}'] += linha['pote'] or Decimal('0.00')
+            totais[f'quantidade_{sufixo}'] += linha['quantidade']
+            totais['total_bruto'] += linha['bruto'] or Decimal('0.00')
+        return totais
+
+    def recalcular(self, salvar=True, evento=None):
+        """
+        Reconstrói o pote do evento a partir das apostas e retorna a divergência encontrada
+        no formato {campo: (valor_armazenado, valor_recalculado)}.
+        """
+        evento_id = Evento.objects.id_de(evento)
+        with transaction.atomic():
+            self.atual(evento_id)
+            pote = self.select_for_update().get(evento_id=evento_id)
+            totais = self.calcular_a_partir_das_apostas(evento_id)
+
+            divergencias = {}
+            for campo, valor in totais.items():
+                if getattr(pote, campo) != valor:
+                    divergencias[campo] = (getattr(pote, campo), valor)
+
+            if salvar and divergencias:
+                for campo, valor in totais.items():
+                    setattr(pote, campo, valor)
+                pote.save()
+                invalidar_pote(evento_id, using=self.db)
+        return divergencias
+
+
+class Pote(models.Model):
+    """
+    Totais consolidados das apostas válidas de um evento. Evita um SUM() sobre
+    as apostas a cada leitura de odds ou do relatório financeiro.
+    """
+    evento = models.OneToOneField(
+        Evento,
+        on_delete=models.CASCADE,
+        related_name='pote',
+        verbose_name="Evento"
+    )
+    total_masculino = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Pote Masculino"
+    )
+    total_feminino = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Pote Feminino"
+    )
+    total_bruto = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Total Arrecadado Bruto"
+    )
+    quantidade_masculino = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Apostas Válidas (Menino)"
+    )
+    quantidade_feminino = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Apostas Válidas (Menina)"
+    )
+    atualizado_em = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Atualizado em"
+    )
+
+    objects = PoteManager()
+
+    class Meta:
+        verbose_name = "Pote"
+        verbose_name_plural = "Potes"
+
+    def __str__(self):
+        return (f"Pote - Menino: R${self.total_masculino:.2f} "
+                f"- Menina: R${self.total_feminino:.2f}")
+
+
+class ResumoApostasUsuarioManager(models.Manager):
+    """
+    Manager do resumo de apostas válidas por usuário.
+    """
+
+    def do_usuario(self, usuario):
+        """
+        Retorna o resumo do usuário com uma leitura por chave primária.
+        Usuários sem apostas válidas recebem um resumo zerado (não salvo).
+        """
+        return self.filter(pk=usuario.pk).first() or self.model(usuario=usuario)
+
+    def registrar_alteracoes(self, alteracoes):
+        """
+        Atualiza os resumos dos usuários afetados por um lote de alterações:
+        totais com F expressions e a última aposta válida só quando ela muda.
+        """
+        por_usuario = defaultdict(lambda: {'total': Decimal('0.00'), 'quantidade': 0, 'entradas': [], 'saidas': set()})
+        for alteracao in alteracoes:
+            if alteracao.antes is not None and alteracao.antes.status == 'valida':
+                dados = por_usuario[alteracao.antes.usuario_id]
+                dados['total'] -= alteracao.antes.valor_aposta
+                dados['quantidade'] -= 1
+                dados['saidas'].add(alteracao.aposta_id)
+            if alteracao.depois is not None and alteracao.depois.status == 'valida':
+                dados = por_usuario[alteracao.depois.usuario_id]
+                dados['total'] += alteracao.depois.valor_aposta
+                dados['quantidade'] += 1
+                dados['entradas'].append(alteracao)
+
+        invalidar_usuarios(por_usuario, using=self.db)
+        for usuario_id, dados in por_usuario.items():
+            self.get_or_create(usuario_id=usuario_id)
+            resumo = self.select_for_update().get(pk=usuario_id)
+
+            valores = {}
+            if dados['total'] or dados['quantidade']:
+                valores['total_validado'] = F('total_validado') + dados['total']
+                valores['quantidade_validas'] = F('quantidade_validas') + dados['quantidade']
+
+            if resumo.id_ultima_aposta in dados['saidas']:
+                # A última aposta válida deixou de ser válida (ou mudou): busca a nova no banco
+                ultima = Aposta.objects.filter(usuario_id=usuario_id, status='valida').order_by(
+                    '-data_aposta', '-id'
+                ).values_list('id', 'sexo_escolha', 'valor_aposta', 'data_aposta').first()
+                valores.update(self._campos_ultima(ultima))
+            elif dados['entradas']:
+                entrada = max(dados['entradas'], key=lambda a: (a.data_aposta, a.aposta_id))
+                if resumo.ultima_data is None or (entrada.data_aposta, entrada.aposta_id) >= (resumo.ultima_data, resumo.id_ultima_aposta):
+                    valores.update(self._campos_ultima(
+                        (entrada.aposta_id, entrada.depois.sexo_escolha, entrada.depois.valor_aposta, entrada.data_aposta)
+                    ))
+
+            if valores:
+                self.filter(pk=usuario_id).update(**valores)
+
+    @staticmethod
+    def _campos_ultima(ultima):
+        """
+        Converte (id, sexo, valor, data) da última aposta válida nos campos do resumo.
+        """
+        id_aposta, sexo, valor, data = ultima or (None, '', None, None)
+        return {
+            'id_ultima_aposta': id_aposta,
+            'ultima_sexo': sexo,
+            'ultima_valor': valor,
+            'ultima_data': data,
+        }
+
+    def recalcular(self, usuario_ids=None):
+        """
+        Reconstrói do zero os resumos (de todos os usuários ou apenas dos informados)
+        a partir das apostas válidas. Retorna a quantidade de resumos gravados.
+        """
+        apostas = Aposta.objects.filter(status='valida')
+        usuarios = Usuario.objects.all()
+        resumos = self.all()
+        if usuario_ids is not None:
+            usuario_ids = list(usuario_ids)
+            apostas = apostas.filter(usuario_id__in=usuario_ids)
+            usuarios = usuarios.filter(pk__in=usuario_ids)
+            resumos = resumos.filter(usuario_id__in=usuario_ids)
+
+        linhas = list(apostas.values('usuario_id').annotate(
+            total=Sum('valor_aposta'),
+            quantidade=Count('id'),
+        ).order_by())
+
+        # A última aposta é buscada por usuário (subconsulta fora do GROUP BY, que a repetiria por linha)
+        ultimas = Aposta.objects.filter(usuario_id=OuterRef('pk'), status='valida').order_by('-data_aposta', '-id')
+        ids_ultimas = dict(usuarios.annotate(
+            id_ultima=Subquery(ultimas.values('id')[:1])
+        ).filter(id_ultima__isnull=False).values_list('pk', 'id_ultima'))
+        dados_ultimas = Aposta.objects.in_bulk(ids_ultimas.values())
+
+        novos = []
+        for linha in linhas:
+            ultima = dados_ultimas.get(ids_ultimas.get(linha['usuario_id']))
+            novos.append(self.model(
+                usuario_id=linha['usuario_id'],
+                total_validado=linha['total'],
+                quantidade_validas=linha['quantidade'],
+                **self._campos_ultima(
+                    (ultima.id, ultima.sexo_escolha, ultima.valor_aposta, ultima.data_aposta) if ultima else None
+                ),
+            ))
+
+        with transaction.atomic():
+            invalidar_usuarios(
+                usuario_ids if usuario_ids is not None else
+                [*resumos.values_list('pk', flat=True), *(resumo.usuario_id for resumo in novos)],
+                using=self.db,
+            )
+            resumos.delete()
+            self.bulk_create(novos, batch_size=1000)
+        return len(novos)
+
+
+class ResumoApostasUsuario(models.Model):
+    """
+    Resumo desnormalizado das apostas válidas de cada usuário (total, quantidade
+    e última aposta), servido com uma leitura por chave primária.
+    """
+    usuario = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='resumo_apostas',
+        verbose_name="Usuário"
+    )
+    total_validado = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Total Apostado (válidas)"
+    )
+    quantidade_validas = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Quantidade de Apostas Válidas"
+    )
+    # Identificador da última aposta válida (sem FK, para não interferir na exclusão de apostas)
+    id_ultima_aposta = models.BigIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="ID da Última Aposta Válida"
+    )
+    ultima_sexo = models.CharField(
+        max_length=1,
+        blank=True,
+        default='',
+        verbose_name="Palpite da Última Aposta"
+    )
+    ultima_valor = models.DecimalField(
+        max_digits=8,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        verbose_name="Valor da Última Aposta"
+    )
+    ultima_data = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Data da Última Aposta"
+    )
+    atualizado_em = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Atualizado em"
+    )
+
+    objects = ResumoApostasUsuarioManager()
+
+    class Meta:
+        verbose_name = "Resumo de Apostas do Usuário"
+        verbose_name_plural = "Resumos de Apostas dos Usuários"
+
+    def __str__(self):
+        return f"Resumo de {self.usuario_id} - {self.quantidade_validas} aposta(s) válida(s)"
+
+    @property
+    def ultima_aposta_texto(self):
+        """
+        Texto exibido no frontend para a última aposta válida (ex: 'Menino - R$ 10,00').
+        """
+        if self.id_ultima_aposta is None:
+            return "-"
+        sexo_display = "Menino" if self.ultima_sexo == 'M' else "Menina"
+        return f"{sexo_display} - R$ {self.ultima_valor:.2f}".replace('.', ',')
+
+
+class TrigramaUsuarioManager(models.Manager):
+    """
+    Manager do índice de trigramas usado pela busca do admin (ver core/busca.py).
+    """
+
+    def indexar(self, usuarios):
+        """
+        Regrava os trigramas do nome e do telefone dos usuários informados.
+        """
+        usuarios = list(usuarios)
+        with transaction.atomic(using=self.db):
+            self.filter(usuario_id__in=[usuario.pk for usuario in usuarios]).delete()
+            self.bulk_create([
+                self.model(usuario_id=usuario.pk, trigrama=trigrama)
+                for usuario in usuarios
+                for trigrama in trigramas_do_usuario(usuario.nome, usuario.telefone)
+            ], batch_size=1000)
+
+
+class TrigramaUsuario(models.Model):
+    """
+    Trigramas do nome (sem acentos, em minúsculas) e do telefone de cada usuário: a busca
+    por um trecho procura os usuários que têm todos os trigramas dele.
+    """
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name="Usuário"
+    )
+    trigrama = models.CharField(max_length=TAMANHO_TRIGRAMA, verbose_name="Trigrama")
+
+    objects = TrigramaUsuarioManager()
+
+    class Meta:
+        verbose_name = "Trigrama de Usuário"
+        verbose_name_plural = "Trigramas de Usuários"
+        constraints = [
+            # Começa pelo trigrama, a coluna da busca; o usuario_id sai do próprio índice
+            models.UniqueConstraint(fields=['trigrama', 'usuario'], name='trigrama_usuario_unico'),
+        ]
+
+
+# Totais do pote zerados, no formato de Pote/snapshot (sem as odds)
+CAMPOS_TOTAIS_POTE = ('total_masculino', 'total_feminino', 'total_bruto', 'quantidade_masculino', 'quantidade_feminino')
+
+
+def _totais_zerados():
+    return {
+        'total_masculino': Decimal('0.00'),
+        'total_feminino': Decimal('0.00'),
+        'total_bruto': Decimal('0.00'),
+        'quantidade_masculino': 0,
+        'quantidade_feminino': 0,
+    }
+
+
+class EventoApostaManager(models.Manager):
+    """
+    Manager do log de eventos das apostas (somente inclusão).
+    """
+
+    def registrar(self, alteracoes):
+        """
+        Grava em lote um evento por alteração de status de cada aposta.
+        Quando o palpite ou o valor mudam, a alteração vira uma saída do estado
+        antigo seguida de uma entrada do novo, para que o replay seja uma soma simples.
+        """
+        agora = timezone.now()
+        eventos = []
+        for alteracao in alteracoes:
+            antes, depois = alteracao.antes, alteracao.depois
+            if antes is not None and depois is not None:
+                # [1:] ignora usuario_id; [3:] são palpite e valores
+                if antes[1:] == depois[1:]:
+                    continue
+                if antes[3:] != depois[3:] or antes.evento_id != depois.evento_id:
+                    eventos.append(self._evento(alteracao.aposta_id, antes.status, '', antes, agora))
+                    eventos.append(self._evento(alteracao.aposta_id, '', depois.status, depois, agora))
+                    continue
+            eventos.append(self._evento(
+                alteracao.aposta_id,
+                antes.status if antes is not None else '',
+                depois.status if depois is not None else '',
+                depois if depois is not None else antes,
+                agora,
+            ))
+        if eventos:
+            self.bulk_create(eventos, batch_size=1000)
+
+    def _evento(self, aposta_id, status_anterior, status_novo, estado, criado_em):
+        return self.model(
+            aposta_id=aposta_id,
+            evento_id=estado.evento_id,
+            status_anterior=status_anterior,
+            status_novo=status_novo,
+            sexo_escolha=estado.sexo_escolha,
+            valor_aposta=estado.valor_aposta,
+            valor_para_pote=estado.valor_para_pote,
+            criado_em=criado_em,
+        )
+
+    def acumular(self, totais, eventos):
+        """
+        Soma aos totais a contribuição de um queryset de eventos, com uma consulta agrupada.
+        """
+        linhas = eventos.filter(
+            Q(status_anterior='valida') | Q(status_novo='valida')
+        ).values('sexo_escolha', 'status_anterior', 'status_novo').annotate(
+            pote=Sum('valor_para_pote'),
+            bruto=Sum('valor_aposta'),
+            quantidade=Count('id'),
+        ).order_by()
+        for linha in linhas:
+            sinal = (linha['status_novo'] == 'valida') - (linha['status_anterior'] == 'valida')
+            sufixo = 'masculino' if linha['sexo_escolha'] == 'M' else 'feminino'
+            totais[f'total_{sufixo}'] += sinal * linha['pote']
+            totais[f'quantidade_{sufixo}'] += sinal * linha['quantidade']
+            totais['total_bruto'] += sinal * linha['bruto']
+        return totais
+
+    def pote_em(self, momento, evento=None):
+        """
+        Reconstrói os totais do pote do evento e as odds como estavam no momento informado:
+        parte do último checkpoint anterior ao momento e soma apenas os eventos seguintes.
+        """
+        evento_id = Evento.objects.id_de(evento)
+        checkpoint = CheckpointPote.objects.filter(
+            evento_id=evento_id, momento__lte=momento
+        ).order_by('-ultimo_evento_id').first()
+        totais = checkpoint.totais() if checkpoint else _totais_zerados()
+        eventos = self.filter(evento_id=evento_id, criado_em__lte=momento)
+        if checkpoint:
+            eventos = eventos.filter(pk__gt=checkpoint.ultimo_evento_id)
+        self.acumular(totais, eventos)
+        totais['odds'] = Aposta.objects.calcular_odds_dos_totais(totais['total_masculino'], totais['total_feminino'])
+        return totais
+
+
+class EventoAposta(models.Model):
+    """
+    Log somente de inclusão com cada criação, mudança de status e exclusão de aposta.
+    status_anterior vazio indica criação; status_novo vazio indica exclusão.
+    """
+    aposta_id = models.BigIntegerField(db_index=True, verbose_name="Aposta")
+    # Sem índice próprio: o índice (evento, criado_em) já começa pelo evento
+    evento = models.ForeignKey(Evento, on_delete=models.CASCADE, related_name='+', db_index=False, verbose_name="Evento")
+    status_anterior = models.CharField(max_length=20, blank=True, verbose_name="Status Anterior")
+    status_novo = models.CharField(max_length=20, blank=True, verbose_name="Status Novo")
+    sexo_escolha = models.CharField(max_length=1, verbose_name="Palpite")
+    valor_aposta = models.DecimalField(max_digits=8, decimal_places=2, verbose_name="Valor da Aposta")
+    valor_para_pote = models.DecimalField(max_digits=8, decimal_places=2, verbose_name="Valor para o Pote")
+    criado_em = models.DateTimeField(default=timezone.now, verbose_name="Criado em")
+
+    objects = EventoApostaManager()
+
+    class Meta:
+        verbose_name = "Evento de Aposta"
+        verbose_name_plural = "Eventos de Apostas"
+        indexes = [
+            models.Index(fields=['evento', 'criado_em']),
+        ]
+
+    def __str__(self):
+        return f"Aposta {self.aposta_id}: {self.status_anterior or '-'} -> {self.status_novo or '-'}"
+
+
+class CheckpointPoteManager(models.Manager):
+    """
+    Manager dos checkpoints periódicos do pote usados na reconstrução por momento.
+    """
+
+    def criar(self, evento=None):
+        """
+        Grava um checkpoint do pote do evento com os totais até o último registro do log
+        já confirmado. Retorna o checkpoint criado (ou None se não há registros novos).
+
+        O limite é o maior id lido com a linha do Pote travada: toda transação que altera
+        o pote atualiza essa linha (Pote.aplicar_delta) antes de gravar no log, e a trava
+        só é liberada no commit. Assim, nenhuma transação que mexe no pote pode confirmar
+        depois um registro com id abaixo do limite; registros com id menor gravados depois
+        só podem ser os que não mudam os totais (ex.: criação de aposta pendente).
+        """
+        evento_id = Evento.objects.id_de(evento)
+        with transaction.atomic(using=self.db):
+            Pote.objects.atual(evento_id)
+            list(Pote.objects.select_for_update().filter(evento_id=evento_id).values_list('pk', flat=True))
+
+            anterior = self.filter(evento_id=evento_id).order_by('-ultimo_evento_id').first()
+            eventos = EventoAposta.objects.filter(evento_id=evento_id)
+            if anterior:
+                eventos = eventos.filter(pk__gt=anterior.ultimo_evento_id)
+            limites = eventos.aggregate(ultimo=Max('id'), momento=Max('criado_em'))
+            if limites['ultimo'] is None:
+                return None
+
+            totais = anterior.totais() if anterior else _totais_zerados()
+            EventoAposta.objects.acumular(totais, eventos.filter(pk__lte=limites['ultimo']))
+            return self.create(evento_id=evento_id, ultimo_evento_id=limites['ultimo'], momento=limites['momento'], **totais)
+
+
+class CheckpointPote(models.Model):
+    """
+    Totais do pote de um evento acumulados até um registro do log (inclusive).
+    momento é o criado_em mais recente entre os registros incluídos.
+    """
+    evento = models.ForeignKey(Evento, on_delete=models.CASCADE, related_name='checkpoints', db_index=False, verbose_name="Evento")
+    ultimo_evento_id = models.BigIntegerField(unique=True, verbose_name="Último Evento")
+    momento = models.DateTimeField(verbose_name="Momento")
+    total_masculino = models.DecimalField(max_digits=14, decimal_places=2, verbose_name="Pote Masculino")
+    total_feminino = models.DecimalField(max_digits=14, decimal_places=2, verbose_name="Pote Feminino")
+    total_bruto = models.DecimalField(max_digits=14, decimal_places=2, verbose_name="Total Arrecadado Bruto")
+    quantidade_masculino = models.PositiveIntegerField(verbose_name="Apostas Válidas (Menino)")
+    quantidade_feminino = models.PositiveIntegerField(verbose_name="Apostas Válidas (Menina)")
+
+    objects = CheckpointPoteManager()
+
+    class Meta:
+        verbose_name = "Checkpoint do Pote"
+        verbose_name_plural = "Checkpoints do Pote"
+        indexes = [
+            models.Index(fields=['evento', 'momento']),
+        ]
+
+    def __str__(self):
+        return f"Checkpoint até o evento {self.ultimo_evento_id} ({self.momento:%d/%m/%Y %H:%M})"
+
+    def totais(self):
+        return {campo: getattr(self, campo) for campo in CAMPOS_TOTAIS_POTE}
+
+
+class RollupPoteManager(models.Manager):
+    """
+    Manager das variações do pote por minuto e por hora, usadas no gráfico de odds.
+    """
+
+    DURACOES = {
+        'minuto': timedelta(minutes=1),
+        'hora': timedelta(hours=1),
+    }
+
+    @staticmethod
+    def inicio_do_intervalo(momento, granularidade):
+        if granularidade == 'hora':
+            return momento.replace(minute=0, second=0, microsecond=0)
+        return momento.replace(second=0, microsecond=0)
+
+    def registrar_delta(self, delta, evento=None, momento=None):
+        """
+        Soma um delta do Pote do evento aos intervalos (minuto e hora) do momento informado.
+        Normalmente é um UPDATE por granularidade; a linha só é criada no primeiro delta do intervalo.
+        """
+        if not delta:
+            return
+        momento = momento or timezone.now()
+        evento_id = Evento.objects.id_de(evento)
+        for granularidade in self.DURACOES:
+            chave = {'evento_id': evento_id, 'granularidade': granularidade, 'inicio': self.inicio_do_intervalo(momento, granularidade)}
+            incrementos = {campo: F(campo) + valor for campo, valor in delta.items()}
+            if self.filter(**chave).update(**incrementos):
+                continue
+            try:
+                with transaction.atomic():
+                    self.create(**chave, **delta)
+            except IntegrityError:
+                # Outro worker criou o intervalo ao mesmo tempo
+                self.filter(**chave).update(**incrementos)
+
+    def recalcular(self):
+        """
+        Reconstrói os rollups a partir do log de eventos. Retorna a quantidade de linhas gravadas.
+        """
+        rollups = {}
+        eventos = EventoAposta.objects.filter(
+            Q(status_anterior='valida') | Q(status_novo='valida')
+        ).order_by('pk').values_list('evento_id', 'status_anterior', 'status_novo', 'sexo_escolha', 'valor_aposta', 'valor_para_pote', 'criado_em')
+        for evento_id, status_anterior, status_novo, sexo, valor_aposta, valor_para_pote, criado_em in eventos.iterator(chunk_size=5000):
+            sinal = (status_novo == 'valida') - (status_anterior == 'valida')
+            sufixo = 'masculino' if sexo == 'M' else 'feminino'
+            for granularidade in self.DURACOES:
+                inicio = self.inicio_do_intervalo(criado_em, granularidade)
+                rollup = rollups.get((evento_id, granularidade, inicio))
+                if rollup is None:
+                    rollup = rollups[(evento_id, granularidade, inicio)] = self.model(
+                        evento_id=evento_id, granularidade=granularidade, inicio=inicio
+                    )
+                setattr(rollup, f'total_{sufixo}', getattr(rollup, f'total_{sufixo}') + sinal * valor_para_pote)
+                setattr(rollup, f'quantidade_{sufixo}', getattr(rollup, f'quantidade_{sufixo}') + sinal)
+                rollup.total_bruto += sinal * valor_aposta
+
+        with transaction.atomic():
+            self.all().delete()
+            self.bulk_create(rollups.values(), batch_size=1000)
+        return len(rollups)
+
+
+class RollupPote(models.Model):
+    """
+    Variação dos totais do pote de um evento dentro de um intervalo (minuto ou hora).
+    O total acumulado até um intervalo é a soma das variações até ele.
+    """
+    evento = models.ForeignKey(Evento, on_delete=models.CASCADE, related_name='+', db_index=False, verbose_name="Evento")
+    GRANULARIDADE_CHOICES = [
+        ('minuto', 'Minuto'),
+        ('hora', 'Hora'),
+    ]
+    granularidade = models.CharField(max_length=6, choices=GRANULARIDADE_CHOICES, verbose_name="Granularidade")
+    inicio = models.DateTimeField(verbose_name="Início do Intervalo")
+    total_masculino = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'), verbose_name="Variação Pote Masculino")
+    total_feminino = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'), verbose_name="Variação Pote Feminino")
+    total_bruto = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'), verbose_name="Variação Total Bruto")
+    quantidade_masculino = models.IntegerField(default=0, verbose_name="Variação Apostas Válidas (Menino)")
+    quantidade_feminino = models.IntegerField(default=0, verbose_name="Variação Apostas Válidas (Menina)")
+
+    objects = RollupPoteManager()
+
+    class Meta:
+        verbose_name = "Rollup do Pote"
+        verbose_name_plural = "Rollups do Pote"
+        constraints = [
+            models.UniqueConstraint(fields=['evento', 'granularidade', 'inicio'], name='rollup_pote_evento_granularidade_inicio'),
+        ]
+
+    def __str__(self):
+        return f"Rollup por {self.granularidade} de {self.inicio:%d/%m/%Y %H:%M}"
+
+
+class RelatorioFinanceiroManager(models.Manager):
+    """
+    Manager dos relatórios financeiros pré-calculados exibidos no admin (ver core/relatorios.py).
+    """
+
+    def atualizar(self, evento=None):
+        """
+        Recalcula o relatório financeiro do evento e grava o snapshot com o momento do cálculo.
+        """
+        evento_id = Evento.objects.id_de(evento)
+        dados = Aposta.objects.get_relatorio_financeiro(evento_id)
+        relatorio, _ = self.update_or_create(evento_id=evento_id, defaults={'dados': dados, 'gerado_em': timezone.now()})
+        return relatorio
+
+    def do_evento(self, evento=None):
+        return self.filter(evento_id=Evento.objects.id_de(evento)).first()
+
+
+class RelatorioFinanceiro(models.Model):
+    """
+    Último relatório financeiro calculado de cada evento (Aposta.objects.get_relatorio_financeiro),
+    com valores em texto, e o momento em que foi gerado.
+    """
+    evento = models.OneToOneField(
+        Evento,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='relatorio_financeiro',
+        verbose_name="Evento"
+    )
+    dados = models.JSONField(encoder=DjangoJSONEncoder, verbose_name="Relatório")
+    gerado_em = models.DateTimeField(verbose_name="Gerado em")
+
+    objects = RelatorioFinanceiroManager()
+
+    class Meta:
+        verbose_name = "Relatório Financeiro"
+        verbose_name_plural = "Relatórios Financeiros"
+
+    def __str__(self):
+        return f"Relatório de {self.evento_id} em {self.gerado_em:%d/%m/%Y %H:%M:%S}"
+
+    @property
+    def idade(self):
+        return timezone.now() - self.gerado_em
+
+
+class ApostaComOddsIterable(ModelIterable):
+    """
+    Iterable que lê as odds uma única vez por evento em cada avaliação do queryset e
+    anexa odd e retornos a cada instância (ver ApostaQuerySet.with_odds).
+    """
+
+    def __iter__(self):
+        odds_por_evento = {}
+        for aposta in super().__iter__():
+            odds = odds_por_evento.get(aposta.evento_id)
+            if odds is None:
+                odds = odds_por_evento[aposta.evento_id] = Aposta.objects.calcular_odds(aposta.evento_id)
+            odd = odds.get(aposta.sexo_escolha, Decimal('1.00'))
+            aposta._odd_da_aposta = odd
+            aposta._retorno_potencial = (aposta.valor_aposta * odd).quantize(Decimal('0.01'))
+            aposta._retorno_real_possivel = (aposta.valor_para_pote * odd).quantize(Decimal('0.01'))
+            yield aposta
+
+
+class ApostaQuerySet(models.QuerySet):
+
+    def with_odds(self):
+        """
+        Anexa odd_da_aposta, retorno_potencial e retorno_real_possivel a cada aposta,
+        com uma única leitura de odds por evento (em vez de uma por instância).
+        """
+        clone = self._chain()
+        clone._iterable_class = ApostaComOddsIterable
+        return clone
+
+    def alterar_status(self, novo_status):
+        """
+        Altera o status das apostas do queryset pelo serviço de transições
+        (core/transicoes.py), que mantém o Pote e os resumos na mesma transação.
+        Retorna a quantidade de apostas efetivamente alteradas.
+        """
+        from .transicoes import transicionar
+
+        return transicionar(self.order_by().values_list('pk', flat=True), novo_status).aplicadas
+
+
+class ApostaManager(models.Manager.from_queryset(ApostaQuerySet)):
     """
     Manager personalizado para a classe Aposta, contendo métodos
     para cálculos financeiros relacionados às apostas.
+    Os totais vêm do snapshot versionado do Pote consolidado (ver core/cache_pote.py)
+    em vez de somar a tabela a cada chamada. Todos os cálculos são de um evento
+    (parâmetro evento: instância, id ou None para o evento padrão).
     """
-    
-    def get_total_pote_masculino(self):
+
+    def do_evento(self, evento=None):
+        return self.filter(evento_id=Evento.objects.id_de(evento))
+
+    def criar_em_lote(self, apostas, batch_size=1000):
+        """
+        Insere apostas com bulk_create e registra Pote, eventos e resumos na mesma transação.
+        Apostas sem evento vão para o evento padrão. O MySQL não devolve os ids no
+        bulk_create: as linhas inseridas são relidas pelo token gravado em lote_transicao,
+        a partir do maior id existente antes da inserção.
+        Retorna a quantidade inserida.
+        """
+        if not apostas:
+            return 0
+        token = uuid.uuid4()
+        if any(aposta.evento_id is None for aposta in apostas):
+            padrao = Evento.objects.padrao().pk
+            for aposta in apostas:
+                if aposta.evento_id is None:
+                    aposta.evento_id = padrao
+        taxas = dict(Evento.objects.filter(pk__in={aposta.evento_id for aposta in apostas}).values_list('pk', 'taxa'))
+        for aposta in apostas:
+            aposta.valor_para_pote = calcular_valor_para_pote(aposta.valor_aposta, taxas[aposta.evento_id])
+            aposta.lote_transicao = token
+
+        with transaction.atomic(using=self.db):
+            # lote_transicao não tem índice: o pk limita a releitura às linhas novas
+            id_anterior = self.aggregate(ultimo=Max('pk'))['ultimo'] or 0
+            self.bulk_create(apostas, batch_size=batch_size)
+            linhas = self.filter(pk__gt=id_anterior, lote_transicao=token).order_by().values_list('pk', 'data_aposta', *EstadoAposta._fields)
+            alteracoes = [
+                AlteracaoAposta(pk, data_aposta, None, EstadoAposta(*estado))
+                for pk, data_aposta, *estado in linhas.iterator(chunk_size=batch_size)
+            ]
+            registrar_alteracoes(alteracoes, atualizar_resumos=False)
+            # Resumos recalculados no banco, de uma vez por usuário afetado
+            usuario_ids = {alteracao.depois.usuario_id for alteracao in alteracoes if alteracao.depois.status == 'valida'}
+            if usuario_ids:
+                ResumoApostasUsuario.objects.recalcular(usuario_ids)
+        return len(alteracoes)
+
+    def get_total_pote_masculino(self, evento=None):
         """
-        Retorna o total do pote masculino (75% dos valores apostados validados).
+        Retorna o total do pote masculino (valores apostados validados menos a taxa do evento).
         """
-        return self.filter(
-            sexo_escolha='M',
-            status='valida' # Filtra por status 'valida'
-        ).aggregate(
-            total=models.Sum('valor_para_pote')
-        )['total'] or Decimal('0.00')
+        return snapshot_pote(evento)['total_masculino']
     
-    def get_total_pote_feminino(self):
+    def get_total_pote_feminino(self, evento=None):
         """
-        Retorna o total do pote feminino (75% dos valores apostados validados).
+        Retorna o total do pote feminino (valores apostados validados menos a taxa do evento).
         """
-        return self.filter(
-            sexo_escolha='F',
-            status='valida'
-        ).aggregate(
-            total=models.Sum('valor_para_pote')
-        )['total'] or Decimal('0.00')
+        return snapshot_pote(evento)['total_feminino']
     
-    def get_total_pote(self):
+    def get_total_pote(self, evento=None):
         """
         Retorna o total geral disponível nos potes para pagamentos.
         """
-        return self.get_total_pote_masculino() + self.get_total_pote_feminino()
+        snapshot = snapshot_pote(evento)
+        return snapshot['total_masculino'] + snapshot['total_feminino']
     
-    def get_total_arrecadado_bruto(self):
+    def get_total_arrecadado_bruto(self, evento=None):
         """
         Retorna o total bruto arrecadado (100% dos valores apostados validados).
         """
-        return self.filter(
-            status='valida'
-        ).aggregate(
-            total=models.Sum('valor_aposta')
-        )['total'] or Decimal('0.00')
+        return snapshot_pote(evento)['total_bruto']
     
-    def get_total_para_pais(self):
+    def get_total_para_pais(self, evento=None):
         """
-        Retorna o total destinado aos pais (25% do total bruto arrecadado).
+        Retorna o total destinado aos pais: o que foi arrecadado e não foi para os potes.
         """
-        return (self.get_total_arrecadado_bruto() * Decimal('0.25')).quantize(Decimal('0.01'))
+        snapshot = snapshot_pote(evento)
+        return (snapshot['total_bruto'] - snapshot['total_masculino'] - snapshot['total_feminino']).quantize(Decimal('0.01'))
     
-    def calcular_odds(self):
+    def calcular_odds(self, evento=None):
         """
         Calcula e retorna as odds atuais para cada sexo (Menino/Menina)
-        com base nos valores presentes nos potes.
+        com base nos valores presentes nos potes do evento.
+        """
+        return dict(snapshot_pote(evento)['odds'])
+
+    @staticmethod
+    def calcular_odds_dos_totais(total_masculino, total_feminino):
+        """
+        Calcula as odds a partir dos totais já conhecidos de cada pote.
         """
-        total_masculino = self.get_total_pote_masculino()
-        total_feminino = self.get_total_pote_feminino()
         total_geral_pote = total_masculino + total_feminino
         
         # Se não há apostas válidas, as odds são 1.00 para ambos
@@ -221,29 +1179,41 @@ class ApostaManager(models.Manager):
         
         return {'M': odd_menino, 'F': odd_feminino}
     
-    def validar_balanco_financeiro(self):
+    def validar_balanco_financeiro(self, evento=None):
         """
         MÉTODO CRÍTICO: Valida se é possível pagar todos os ganhadores
-        em cada cenário (Menino vence ou Menina vence) com o pote atual.
+        em cada cenário (Menino vence ou Menina vence) com o pote atual do evento.
+
+        Os totais por sexo vêm de uma única consulta agrupada sobre as apostas
+        válidas do evento; odds e pote são derivados desses mesmos totais.
         """
-        odds = self.calcular_odds()
-        total_pote = self.get_total_pote()
-        
+        totais = {'M': Decimal('0.00'), 'F': Decimal('0.00')}
+        linhas = self.do_evento(evento).filter(status='valida').values('sexo_escolha').annotate(
+            total=Sum('valor_para_pote')
+        ).order_by()
+        for linha in linhas:
+            totais[linha['sexo_escolha']] = linha['total'] or Decimal('0.00')
+
+        return self.calcular_cenarios(totais['M'], totais['F'])
+
+    @classmethod
+    def calcular_cenarios(cls, total_masculino, total_feminino):
+        """
+        Monta os cenários de pagamento a partir dos totais de cada pote.
+        Como a odd é a mesma para todas as apostas do sexo vencedor, a soma de
+        (valor_para_pote * odd) de cada aposta é exatamente (total do sexo * odd).
+        """
+        odds = cls.calcular_odds_dos_totais(total_masculino, total_feminino)
+        total_pote = total_masculino + total_feminino
+        totais = {'M': total_masculino, 'F': total_feminino}
+
         cenarios = []
-        
+
         for sexo_vencedor in ['M', 'F']:
-            apostas_vencedoras = self.filter(
-                sexo_escolha=sexo_vencedor,
-                status='valida'
-            )
-            
-            total_a_pagar = Decimal('0.00')
-            for aposta in apostas_vencedoras:
-                # O pagamento é calculado com base no valor BRUTO da aposta
-                # multiplicado pela odd atual para o sexo vencedor.
-                pagamento = aposta.valor_para_pote * odds.get(sexo_vencedor, Decimal('1.00'))
-                total_a_pagar += pagamento
-            
+            # O pagamento é calculado com base no valor que foi para o pote
+            # multiplicado pela odd atual para o sexo vencedor.
+            total_a_pagar = totais[sexo_vencedor] * odds.get(sexo_vencedor, Decimal('1.00'))
+
             cenarios.append({
                 'sexo': sexo_vencedor,
                 'total_a_pagar': total_a_pagar.quantize(Decimal('0.01')),
@@ -254,24 +1224,37 @@ class ApostaManager(models.Manager):
         
         return cenarios
     
-    def get_relatorio_financeiro(self):
+    def get_relatorio_financeiro(self, evento=None):
         """ 
-        Retorna um relatório completo da situação financeira das apostas.
+        Retorna um relatório completo da situação financeira das apostas do evento.
         """
+        snapshot = snapshot_pote(evento)
+        total_bruto = snapshot['total_bruto']
+        total_masculino = snapshot['total_masculino']
+        total_feminino = snapshot['total_feminino']
         return {
-            'total_arrecadado_bruto': self.get_total_arrecadado_bruto().quantize(Decimal('0.01')),
-            'total_para_pais': self.get_total_para_pais().quantize(Decimal('0.01')),
-            'total_pote_disponivel': self.get_total_pote().quantize(Decimal('0.01')),
-            'pote_masculino': self.get_total_pote_masculino().quantize(Decimal('0.01')),
-            'pote_feminino': self.get_total_pote_feminino().quantize(Decimal('0.01')),
-            'odds_atuais': self.calcular_odds(),
-            'balanco_cenarios': self.validar_balanco_financeiro(),
+            'total_arrecadado_bruto': total_bruto.quantize(Decimal('0.01')),
+            # A diferença, e não bruto * taxa: cada aposta descontou a taxa do seu momento
+            'total_para_pais': (total_bruto - total_masculino - total_feminino).quantize(Decimal('0.01')),
+            'total_pote_disponivel': (total_masculino + total_feminino).quantize(Decimal('0.01')),
+            'pote_masculino': total_masculino.quantize(Decimal('0.01')),
+            'pote_feminino': total_feminino.quantize(Decimal('0.01')),
+            'odds_atuais': dict(snapshot['odds']),
+            'balanco_cenarios': self.validar_balanco_financeiro(evento),
         }
             
 class Aposta(models.Model):
     """
     Modelo para registrar as apostas dos usuários no palpite do sexo do bebê.
     """
+    # Sem índice próprio: os índices compostos de Meta.indexes começam pelo evento
+    evento = models.ForeignKey(
+        Evento,
+        on_delete=models.PROTECT,
+        related_name='apostas',
+        db_index=False,
+        verbose_name="Evento"
+    )
     usuario = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -302,7 +1285,7 @@ class Aposta(models.Model):
         verbose_name="Valor da Aposta"
     )
 
-    # Valor efetivamente adicionado ao pote (75% do valor_aposta)
+    # Valor efetivamente adicionado ao pote (valor_aposta menos a taxa do evento)
     valor_para_pote = models.DecimalField(
         max_digits=8,
         decimal_places=2,
@@ -333,6 +1316,10 @@ class Aposta(models.Model):
         verbose_name="Status da Aposta"
     )
 
+    # Preenchidos pelo serviço de transições (core/transicoes.py) a cada UPDATE em lote
+    status_anterior = models.CharField(max_length=20, blank=True, default='', editable=False)
+    lote_transicao = models.UUIDField(null=True, blank=True, editable=False)
+
     # Atribui o manager personalizado à classe Aposta
     objects = ApostaManager()
 
@@ -341,9 +1328,12 @@ class Aposta(models.Model):
         verbose_name_plural = "Apostas"
         ordering = ['-data_aposta'] # Ordena as apostas da mais recente para a mais antiga
         indexes = [
-            models.Index(fields=['status']),
-            models.Index(fields=['sexo_escolha', 'status']),
-            models.Index(fields=['-data_aposta']),
+            models.Index(fields=['evento', 'status']),
+            models.Index(fields=['evento', 'sexo_escolha', 'status']),
+            # Com o pk no índice, a ordenação do admin (-data_aposta, -pk) e o cursor de
+            # core/paginacao.py percorrem o índice sem ordenar as apostas de mesma data
+            models.Index(fields=['evento', '-data_aposta', '-id']),
+            models.Index(fields=['-data_aposta', '-id']),
          ]
 
     def __str__(self):
@@ -357,26 +1347,95 @@ class Aposta(models.Model):
                 
     
 
+    def estado(self):
+        """
+        Retorna o estado atual da instância no formato usado pelos agregados.
+        """
+        return EstadoAposta(self.usuario_id, self.evento_id, self.status, self.sexo_escolha, self.valor_aposta, self.valor_para_pote)
+
+    def _estado_no_banco(self):
+        """
+        Retorna o estado registrado no banco para esta aposta (None se ainda não existe).
+        A linha é travada até o fim da transação para que os deltas aplicados sejam exatos.
+        """
+        if self._state.adding or self.pk is None:
+            return None
+        linha = Aposta.objects.select_for_update().filter(pk=self.pk).values_list(*EstadoAposta._fields).first()
+        return EstadoAposta(*linha) if linha else None
+
+    def clean(self):
+        """
+        Recusa no formulário (ex.: admin) uma mudança de status fora de TRANSICOES.
+        """
+        from .transicoes import transicao_permitida
+
+        super().clean()
+        if self._state.adding or self.pk is None:
+            return
+        atual = Aposta.objects.filter(pk=self.pk).values_list('status', flat=True).first()
+        if atual is not None and not transicao_permitida(atual, self.status):
+            raise ValidationError({'status': (
+                f"Uma aposta '{dict(self.STATUS_PAYMENT)[atual]}' não pode passar para "
+                f"'{self.get_status_display()}'."
+            )})
+
     def save(self, *args, **kwargs):
         """
-        Sobrescreve o método save para calcular 'valor_para_pote' antes de salvar.
+        Sobrescreve o método save para calcular 'valor_para_pote' (na criação ou quando o
+        valor muda) e manter o Pote e o resumo do usuário na mesma transação.
+        Apostas criadas sem evento vão para o evento padrão. Uma mudança de status
+        segue as regras do serviço de transições (core/transicoes.py) e é publicada
+        pelo mesmo sinal apostas_transicionadas.
         """
-        # Calcula 75% do valor_aposta antes de salvar
-        if self.valor_aposta is not None:
-            self.valor_para_pote = (self.valor_aposta * Decimal('0.75')).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-        else:
-            self.valor_para_pote = Decimal('0.00')
+        from .transicoes import apostas_transicionadas, transicao_permitida
 
-        super().save(*args, **kwargs)
+        if self.evento_id is None:
+            self.evento = Evento.objects.padrao()
+
+        with transaction.atomic(using=kwargs.get('using')):
+            antes = self._estado_no_banco()
+            # Desconta a taxa do evento só na criação ou quando o valor (ou o evento) muda:
+            # uma aposta antiga mantém o valor_para_pote calculado com a taxa da época
+            if antes is None or (antes.valor_aposta, antes.evento_id) != (self.valor_aposta, self.evento_id):
+                self.valor_para_pote = calcular_valor_para_pote(self.valor_aposta, self.evento.taxa)
+            else:
+                self.valor_para_pote = antes.valor_para_pote
+            mudou_status = antes is not None and antes.status != self.status
+            if mudou_status:
+                if not transicao_permitida(antes.status, self.status):
+                    raise ValueError(f"Transição não permitida de '{antes.status}' para '{self.status}'.")
+                self.status_anterior = antes.status
+                if kwargs.get('update_fields') is not None:
+                    kwargs['update_fields'] = {*kwargs['update_fields'], 'status_anterior'}
+            super().save(*args, **kwargs)
+            alteracao = AlteracaoAposta(self.pk, self.data_aposta, antes, self.estado())
+            if mudou_status:
+                apostas_transicionadas.send(sender=Aposta, alteracoes=[alteracao], novo_status=self.status)
+            else:
+                registrar_alteracoes([alteracao])
+
+    def delete(self, *args, **kwargs):
+        """
+        Recarrega do banco os campos que definem o estado da aposta antes de excluir,
+        pois o receiver de post_delete (core/signals.py) usa os valores da instância.
+        """
+        with transaction.atomic(using=kwargs.get('using')):
+            estado = self._estado_no_banco()
+            for campo, valor in (estado._asdict() if estado else {}).items():
+                setattr(self, campo, valor)
+            return super().delete(*args, **kwargs)
 
     @property
     def odd_da_aposta(self):
         """
         Retorna a odd atual para a escolha desta aposta.
+        Reaproveita o valor anexado por Aposta.objects.with_odds(), quando houver.
         """
+        if hasattr(self, '_odd_da_aposta'):
+            return self._odd_da_aposta
         try:
             # Acessa o manager através da instância do modelo para obter as odds
-            odds_atuais = Aposta.objects.calcular_odds()
+            odds_atuais = Aposta.objects.calcular_odds(self.evento_id)
             return odds_atuais.get(self.sexo_escolha, Decimal('1.00'))
         except Exception as e:
             # Idealmente, você pode logar este erro para depuração
@@ -389,6 +1448,8 @@ class Aposta(models.Model):
         Calcula o retorno potencial desta aposta com base no valor bruto
         apostado e nas odds atuais.
         """
+        if hasattr(self, '_retorno_potencial'):
+            return self._retorno_potencial
         return (self.valor_aposta * self.odd_da_aposta).quantize(Decimal('0.01'))
 
     @property
@@ -398,6 +1459,8 @@ class Aposta(models.Model):
         que efetivamente foi para o pote e nas odds atuais.
         Este valor é mais realista para a capacidade de pagamento do sistema.
         """
+        if hasattr(self, '_retorno_real_possivel'):
+            return self._retorno_real_possivel
         return (self.valor_para_pote * self.odd_da_aposta).quantize(Decimal('0.01'))
 
     def validar_pagamento_possivel(self):
@@ -405,15 +1468,11 @@ class Aposta(models.Model):
         Valida se o pagamento desta aposta específica seria possível
         dada a situação atual do pote total e das outras apostas do mesmo sexo.
         """
-        total_pote = Aposta.objects.get_total_pote()
+        snapshot = snapshot_pote(self.evento_id)
+        total_pote = snapshot['total_masculino'] + snapshot['total_feminino']
         
-        # Soma todos os valores que foram para o pote para o mesmo sexo desta aposta
-        total_apostas_mesmo_sexo = Aposta.objects.filter(
-            sexo_escolha=self.sexo_escolha,
-            status='valida' # FILTRA POR STATUS 'valida'
-        ).aggregate(
-            total=models.Sum('valor_para_pote')
-        )['total'] or Decimal('0.00')
+        # Total que foi para o pote no mesmo sexo desta aposta (apostas válidas)
+        total_apostas_mesmo_sexo = snapshot['total_masculino'] if self.sexo_escolha == 'M' else snapshot['total_feminino']
         
         if total_apostas_mesmo_sexo > Decimal('0.00'):
             # Calcula a odd real baseada no pote total e no total apostado para este sexo
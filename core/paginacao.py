@@ -0,0 +1,125 @@
+"""
+Listagem do admin para tabelas grandes.
+
+- PaginadorEstimado: conta exatamente até um limite (COUNT sobre um subselect com
+  LIMIT) e, acima dele, usa a estimativa do planejador do banco, em vez de um
+  COUNT(*) completo a cada página, filtro ou busca.
+- ChangeListKeyset: navegação "próximas" por cursor na ordenação padrão
+  (-data_aposta, -pk). ?apos=<pk> lista as linhas seguintes àquela aposta descendo
+  pelo índice de data_aposta, sem OFFSET: a milésima página custa o mesmo que a
+  primeira.
+"""
+import json
+
+from django.conf import settings
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+VAR_APOS = 'apos'
+
+
+def estimar_linhas(queryset):
+    """
+    Estima quantas linhas o queryset retorna pelo plano de execução (MySQL/MariaDB e
+    PostgreSQL). Nos demais bancos, que não expõem a estimativa, devolve a contagem exata.
+    """
+    connection = connections[queryset.db]
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute(f'EXPLAIN {sql}', params)
+            colunas = [coluna[0] for coluna in cursor.description]
+            linha = dict(zip(colunas, cursor.fetchone()))
+            return int((linha.get('rows') or 0) * float(linha.get('filtered') or 100) / 100)
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plano = cursor.fetchone()[0]
+            if isinstance(plano, str):
+                plano = json.loads(plano)
+            return int(plano[0]['Plan']['Plan Rows'])
+    return queryset.count()
+
+
+class PaginadorEstimado(Paginator):
+    """
+    Paginator que conta exatamente até `limite_exato` linhas e estima acima disso.
+    `estimado` indica se a contagem é aproximada.
+    """
+
+    def __init__(self, *args, limite_exato=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if limite_exato is None:
+            limite_exato = getattr(settings, 'ADMIN_CONTAGEM_EXATA_ATE', 10_000)
+        self.limite_exato = limite_exato
+        self.estimado = False
+
+    @cached_property
+    def count(self):
+        contagem = self.object_list.order_by().values('pk')[:self.limite_exato + 1].count()
+        if contagem <= self.limite_exato:
+            return contagem
+        self.estimado = True
+        # A estimativa nunca fica abaixo do que já foi contado de fato
+        return max(estimar_linhas(self.object_list), contagem)
+
+
+class ChangeListKeyset(ChangeList):
+    """
+    ChangeList com o cursor ?apos=<pk> na ordenação padrão. O cursor não é um filtro:
+    links de filtros, ordenação e páginas numeradas recomeçam do início da lista, e
+    as ações em massa continuam valendo para todas as linhas filtradas.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        self.apos = request.GET.get(VAR_APOS)
+        super().__init__(request, *args, **kwargs)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(VAR_APOS, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        return super().get_query_string(new_params, [*(remove or []), VAR_APOS])
+
+    @property
+    def ordem_padrao(self):
+        return ORDER_VAR not in self.params
+
+    def get_results(self, request):
+        cursor = self._linha_do_cursor() if self.apos and self.ordem_padrao else None
+        if cursor is not None:
+            data_aposta, pk = cursor
+            self.queryset = self.queryset.filter(data_aposta__lte=data_aposta).exclude(
+                data_aposta=data_aposta, pk__gte=pk
+            )
+            self.page_num = 1
+        self.usando_cursor = cursor is not None
+        super().get_results(request)
+
+    def _linha_do_cursor(self):
+        try:
+            pk = int(self.apos)
+        except ValueError:
+            return None
+        data_aposta = self.model._default_manager.filter(pk=pk).values_list('data_aposta', flat=True).first()
+        return None if data_aposta is None else (data_aposta, pk)
+
+    def url_proximas(self):
+        """
+        Link para as linhas seguintes à última da página atual, ou None no fim da lista
+        (ou fora da ordenação padrão).
+        """
+        if not self.ordem_padrao or self.show_all:
+            return None
+        linhas = list(self.result_list)
+        if len(linhas) < self.list_per_page:
+            return None
+        if not self.usando_cursor and self.paginator.num_pages <= self.page_num:
+            return None
+        return self.get_query_string({VAR_APOS: linhas[-1].pk})
+
+    def url_inicio(self):
+        return self.get_query_string() if self.usando_cursor else None
@@ -0,0 +1,75 @@
+"""
+Codificador do BR Code (payload EMV "copia e cola" do PIX).
+
+Substitui a captura do stdout do pixqrcodegen: é uma função pura, segura entre
+threads, e o trecho fixo do recebedor (chave, nome e cidade) é montado uma única
+vez. A cada aposta só são acrescentados valor, txid e o CRC.
+O formato gerado é idêntico ao do pixqrcodegen (ver core/tests.py).
+"""
+from functools import lru_cache
+
+
+def _gerar_tabela_crc16(polinomio=0x1021):
+    tabela = []
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ polinomio) if crc & 0x8000 else (crc << 1)
+        tabela.append(crc & 0xFFFF)
+    return tuple(tabela)
+
+
+TABELA_CRC16 = _gerar_tabela_crc16()
+
+
+def crc16_ccitt(dados, crc=0xFFFF):
+    """
+    CRC16-CCITT (polinômio 0x1021, sem reflexão) via tabela, como exige o BR Code.
+    Aceita o valor inicial para continuar o cálculo a partir de um prefixo já processado.
+    """
+    for byte in dados:
+        crc = ((crc << 8) & 0xFFFF) ^ TABELA_CRC16[((crc >> 8) ^ byte) & 0xFF]
+    return crc
+
+
+def campo_emv(identificador, valor):
+    """
+    Monta um campo EMV no formato ID (2) + tamanho (2) + valor.
+    """
+    if len(valor) > 99:
+        raise ValueError(f"Campo EMV {identificador} excede 99 caracteres.")
+    return f'{identificador}{len(valor):02}{valor}'
+
+
+class BRCode:
+    """
+    Gerador de payloads PIX estáticos para um recebedor fixo.
+    """
+
+    def __init__(self, nome, chave_pix, cidade):
+        conta = campo_emv('00', 'BR.GOV.BCB.PIX') + campo_emv('01', chave_pix)
+        # Tudo o que vem antes do valor é fixo: o CRC desse trecho também é pré-calculado
+        self._prefixo = '000201' + campo_emv('26', conta) + '52040000' + '5303986'
+        self._crc_prefixo = crc16_ccitt(self._prefixo.encode('utf-8'))
+        self._recebedor = '5802BR' + campo_emv('59', nome) + campo_emv('60', cidade)
+
+    def payload(self, valor, txid):
+        """
+        Retorna o BR Code completo (com CRC) para o valor e o identificador da transação.
+        """
+        variavel = (
+            campo_emv('54', f'{valor:.2f}')
+            + self._recebedor
+            + campo_emv('62', campo_emv('05', str(txid)))
+            + '6304'
+        )
+        crc = crc16_ccitt(variavel.encode('utf-8'), self._crc_prefixo)
+        return f'{self._prefixo}{variavel}{crc:04X}'
+
+
+@lru_cache(maxsize=32)
+def brcode_recebedor(nome, chave_pix, cidade):
+    """
+    Retorna o BRCode (imutável) de um recebedor, construído uma única vez por processo.
+    """
+    return BRCode(nome, chave_pix, cidade)
@@ -0,0 +1,102 @@
+"""
+Renderização do QR Code dos payloads PIX no servidor.
+
+Rasterizar o QR é caro em CPU; as imagens ficam num cache LRU limitado, em
+memória, chaveado pelo hash do payload. Como o payload de uma aposta nunca
+muda, o mesmo hash serve de ETag e a resposta pode ser marcada como imutável.
+"""
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from threading import Lock
+
+import qrcode
+import qrcode.image.svg
+from django.conf import settings
+
+from .metricas import contador_cache
+
+FORMATOS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+
+class CacheLRU:
+    """
+    Cache LRU limitado em número de itens, seguro entre threads.
+    """
+
+    def __init__(self, tamanho_maximo):
+        self.tamanho_maximo = tamanho_maximo
+        self._itens = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, chave):
+        with self._lock:
+            valor = self._itens.get(chave)
+            if valor is not None:
+                self._itens.move_to_end(chave)
+            return valor
+
+    def set(self, chave, valor):
+        with self._lock:
+            self._itens[chave] = valor
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.tamanho_maximo:
+                self._itens.popitem(last=False)
+
+    def __len__(self):
+        return len(self._itens)
+
+
+cache_qrcodes = CacheLRU(getattr(settings, 'PIX_QRCODE_CACHE_TAMANHO', 256))
+
+# Uma única thread para a pré-renderização: não compete com os workers das requisições
+_executor_pre_renderizacao = ThreadPoolExecutor(max_workers=1, thread_name_prefix='qrcode-pix')
+
+
+def hash_payload(payload):
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _rasterizar(payload, formato):
+    buffer = BytesIO()
+    if formato == 'svg':
+        qrcode.make(payload, image_factory=qrcode.image.svg.SvgPathImage).save(buffer)
+    else:
+        qrcode.make(payload).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def etag_qrcode(payload, formato='png'):
+    """
+    ETag da imagem do payload no formato pedido, calculado sem rasterizar.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de QR Code inválido: {formato}")
+    return f'"{hash_payload(payload)}-{formato}"'
+
+
+def renderizar_qrcode(payload, formato='png'):
+    """
+    Retorna (etag, conteúdo) do QR Code do payload no formato pedido ('png' ou 'svg').
+    """
+    etag = etag_qrcode(payload, formato)
+    conteudo = cache_qrcodes.get(etag)
+    if conteudo is not None:
+        contador_cache.incrementar('qrcode_hit')
+        return etag, conteudo
+
+    contador_cache.incrementar('qrcode_miss')
+    conteudo = _rasterizar(payload, formato)
+    cache_qrcodes.set(etag, conteudo)
+    return etag, conteudo
+
+
+def pre_renderizar(payload, formato='png'):
+    """
+    Agenda a renderização em segundo plano, para que a primeira abertura do modal já encontre a imagem no cache.
+    """
+    _executor_pre_renderizacao.submit(renderizar_qrcode, payload, formato)
@@ -0,0 +1,71 @@
+"""
+Relatório financeiro do admin pré-calculado.
+
+O relatório (Aposta.objects.get_relatorio_financeiro) fica gravado em RelatorioFinanceiro
+com o momento do cálculo. Quem o mantém em dia é o comando periódico
+`manage.py atualizar_relatorios` (cron, ou um processo com --intervalo); como reserva,
+o próprio processo web agenda um recálculo em segundo plano quando o snapshot passa de
+RELATORIO_IDADE_MAXIMA segundos. O changelist só lê o snapshot, e a latência da página
+deixa de depender do tamanho da tabela. A equipe pode pedir um recálculo na hora pelo
+botão do painel.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from threading import Lock
+
+from django.conf import settings
+from django.db import connections
+
+from .models import Evento, RelatorioFinanceiro
+
+logger = logging.getLogger(__name__)
+
+# Um recálculo por vez por processo; cada evento entra no máximo uma vez na fila
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='relatorio')
+_agendados = set()
+_lock_agendados = Lock()
+
+
+def idade_maxima():
+    return timedelta(seconds=getattr(settings, 'RELATORIO_IDADE_MAXIMA', 60))
+
+
+def _atualizar_em_segundo_plano(evento_id):
+    try:
+        RelatorioFinanceiro.objects.atualizar(evento_id)
+    except Exception:
+        logger.exception("Falha ao atualizar o relatório financeiro do evento %s", evento_id)
+    finally:
+        with _lock_agendados:
+            _agendados.discard(evento_id)
+        connections.close_all()
+
+
+def agendar_atualizacao(evento=None):
+    """
+    Agenda o recálculo do relatório do evento em segundo plano, se ainda não houver um
+    pendente.
+    """
+    evento_id = Evento.objects.id_de(evento)
+    with _lock_agendados:
+        if evento_id in _agendados:
+            return
+        _agendados.add(evento_id)
+    _executor.submit(_atualizar_em_segundo_plano, evento_id)
+
+
+def relatorio_do_admin(evento=None):
+    """
+    Retorna (relatório, atualizando). Só calcula na hora quando o evento ainda não tem
+    relatório; um relatório mais velho que a idade máxima é servido assim mesmo, com um
+    recálculo agendado em segundo plano.
+    """
+    evento_id = Evento.objects.id_de(evento)
+    relatorio = RelatorioFinanceiro.objects.do_evento(evento_id)
+    if relatorio is None:
+        return RelatorioFinanceiro.objects.atualizar(evento_id), False
+    if relatorio.idade > idade_maxima():
+        agendar_atualizacao(evento_id)
+        return relatorio, True
+    return relatorio, False
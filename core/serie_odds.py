@@ -0,0 +1,98 @@
+"""
+Série histórica das odds para o gráfico, montada a partir dos rollups do pote.
+
+O total acumulado no início da janela vem de um único SUM sobre os rollups
+anteriores; dentro da janela os deltas são acumulados em memória. Quando há mais
+intervalos do que pontos pedidos, a série é reduzida com LTTB
+(Largest-Triangle-Three-Buckets), que preserva picos e vales da odd.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Sum
+
+from .models import Aposta, Evento, RollupPote
+
+# Janelas até este tamanho usam rollups por minuto; acima disso, por hora
+LIMITE_JANELA_POR_MINUTO = timedelta(hours=48)
+
+
+def lttb(pontos, limite):
+    """
+    Reduz uma lista de (x, y) para no máximo `limite` pontos com o algoritmo LTTB.
+    Retorna os índices escolhidos, sempre incluindo o primeiro e o último ponto.
+    """
+    total = len(pontos)
+    if limite >= total:
+        return list(range(total))
+    if limite < 3:
+        return [0, total - 1][:max(limite, 0)]
+
+    indices = [0]
+    tamanho_balde = (total - 2) / (limite - 2)
+    anterior = 0
+    for i in range(limite - 2):
+        inicio = int(i * tamanho_balde) + 1
+        fim = int((i + 1) * tamanho_balde) + 1
+
+        # Média do próximo balde (ou o último ponto)
+        proximo_inicio, proximo_fim = fim, min(int((i + 2) * tamanho_balde) + 1, total)
+        if proximo_inicio >= proximo_fim:
+            proximo_inicio, proximo_fim = total - 1, total
+        media_x = sum(p[0] for p in pontos[proximo_inicio:proximo_fim]) / (proximo_fim - proximo_inicio)
+        media_y = sum(p[1] for p in pontos[proximo_inicio:proximo_fim]) / (proximo_fim - proximo_inicio)
+
+        ax, ay = pontos[anterior]
+        melhor, maior_area = inicio, -1.0
+        for j in range(inicio, fim):
+            area = abs((ax - media_x) * (pontos[j][1] - ay) - (ax - pontos[j][0]) * (media_y - ay))
+            if area > maior_area:
+                melhor, maior_area = j, area
+        indices.append(melhor)
+        anterior = melhor
+
+    indices.append(total - 1)
+    return indices
+
+
+def serie_odds(inicio, fim, pontos=200, evento=None):
+    """
+    Retorna (granularidade, lista de pontos) com totais e odds do evento acumulados ao fim
+    de cada intervalo com apostas entre inicio e fim, mais um ponto inicial em `inicio`.
+    """
+    granularidade = 'minuto' if fim - inicio <= LIMITE_JANELA_POR_MINUTO else 'hora'
+    duracao = RollupPote.objects.DURACOES[granularidade]
+    rollups = RollupPote.objects.filter(evento_id=Evento.objects.id_de(evento), granularidade=granularidade)
+
+    inicio = RollupPote.objects.inicio_do_intervalo(inicio, granularidade)
+    base = rollups.filter(inicio__lt=inicio).aggregate(m=Sum('total_masculino'), f=Sum('total_feminino'))
+    total_m = base['m'] or Decimal('0.00')
+    total_f = base['f'] or Decimal('0.00')
+
+    serie = [(inicio, total_m, total_f)]
+    for inicio_intervalo, delta_m, delta_f in rollups.filter(inicio__gte=inicio, inicio__lt=fim).order_by('inicio').values_list(
+        'inicio', 'total_masculino', 'total_feminino'
+    ):
+        total_m += delta_m
+        total_f += delta_f
+        serie.append((min(inicio_intervalo + duracao, fim), total_m, total_f))
+
+    com_odds = []
+    for momento, m, f in serie:
+        odds = Aposta.objects.calcular_odds_dos_totais(m, f)
+        com_odds.append((momento, m, f, odds['M'], odds['F']))
+
+    if len(com_odds) > pontos:
+        indices = lttb([(momento.timestamp(), float(odd_m)) for momento, _, _, odd_m, _ in com_odds], pontos)
+        com_odds = [com_odds[i] for i in indices]
+
+    return granularidade, [
+        {
+            'momento': momento.isoformat(),
+            'total_pote_masculino': str(m),
+            'total_pote_feminino': str(f),
+            'odd_menino': str(odd_m),
+            'odd_menina': str(odd_f),
+        }
+        for momento, m, f, odd_m, odd_f in com_odds
+    ]
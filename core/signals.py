@@ -0,0 +1,49 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache_usuario import invalidar_usuarios
+from .models import AlteracaoAposta, Aposta, TrigramaUsuario, Usuario, registrar_alteracoes
+from .transicoes import apostas_transicionadas
+
+
+@receiver(post_delete, sender=Aposta)
+def remover_aposta_dos_agregados(sender, instance, origin=None, **kwargs):
+    """
+    Retira do Pote e do resumo do usuário a contribuição de uma aposta excluída.
+    Cobre delete() da instância, exclusão em massa no admin e o CASCADE do usuário,
+    sempre dentro da transação da exclusão.
+    """
+    # No CASCADE a partir do usuário o resumo dele também está sendo excluído
+    modelo_origem = getattr(origin, 'model', type(origin))
+    registrar_alteracoes(
+        [AlteracaoAposta(instance.pk, instance.data_aposta, instance.estado(), None)],
+        atualizar_resumos=origin is None or modelo_origem is Aposta,
+    )
+
+
+@receiver(apostas_transicionadas, sender=Aposta)
+def aplicar_transicoes_aos_agregados(sender, alteracoes, **kwargs):
+    """
+    Aplica ao Pote e aos resumos dos usuários (e invalida o cache do pote)
+    as transições de status feitas em lote pelo serviço de transições.
+    """
+    registrar_alteracoes(alteracoes)
+
+
+@receiver(post_save, sender=Usuario)
+def indexar_usuario_para_busca(sender, instance, update_fields=None, **kwargs):
+    """
+    Mantém os trigramas de busca do usuário quando o nome ou o telefone podem ter mudado
+    (salvamentos só do last_login, a cada login, não tocam no índice).
+    """
+    if update_fields is None or {'nome', 'telefone'} & set(update_fields):
+        TrigramaUsuario.objects.indexar([instance])
+
+
+@receiver(post_save, sender=Usuario)
+def invalidar_dados_do_usuario(sender, instance, update_fields=None, **kwargs):
+    """
+    Troca a versão dos dados do usuário em /dados/ quando o nome pode ter mudado.
+    """
+    if update_fields is None or 'nome' in update_fields:
+        invalidar_usuarios([instance.pk], using=kwargs.get('using'))
@@ -93,20 +93,104 @@ if (messageModalOverlay) {
 }
 
 
+/**
+ * Atualiza as odds exibidas e o data-odds dos blocos de opção.
+ * @param {{odd_menino: string, odd_menina: string}} data - Odds vindas de /dados/ ou do stream.
+ */
+function atualizarOdds(data) {
+    const oddMenino = parseFloat(data.odd_menino);
+    const oddMenina = parseFloat(data.odd_menina);
+
+    if (oddMeninoElement) {
+        oddMeninoElement.textContent = `odd: ${oddMenino.toFixed(1)}x`;
+    } else {
+        console.warn('atualizarOdds: Elemento oddMeninoElement não encontrado.');
+    }
+    if (oddMeninaElement) {
+        oddMeninaElement.textContent = `odd: ${oddMenina.toFixed(1)}x`;
+    } else {
+        console.warn('atualizarOdds: Elemento oddMeninaElement não encontrado.');
+    }
+
+    // Atualizar data-odds nos blocos
+    if (blocks[0]) blocks[0].setAttribute('data-odds', oddMenino);
+    if (blocks[1]) blocks[1].setAttribute('data-odds', oddMenina);
+}
+
+let streamOdds = null;
+
+/**
+ * Abre (uma única vez) o stream de Server-Sent Events com as odds.
+ * O servidor só envia mensagens quando o pote muda; o EventSource reconecta sozinho.
+ */
+function iniciarStreamOdds() {
+    if (streamOdds) {
+        return;
+    }
+    if (typeof EventSource === 'undefined') {
+        iniciarPollingDados();
+        return;
+    }
+    streamOdds = new EventSource('/dados/stream/');
+    streamOdds.addEventListener('odds', function(event) {
+        try {
+            atualizarOdds(JSON.parse(event.data));
+        } catch (error) {
+            console.error('iniciarStreamOdds: Mensagem inválida recebida do stream:', error);
+        }
+    });
+    streamOdds.addEventListener('error', function() {
+        if (streamOdds.readyState === EventSource.CLOSED) {
+            // Servidor sem stream (ex.: implantação WSGI responde 204): volta ao polling de /dados/
+            console.warn('iniciarStreamOdds: Stream de odds indisponível, atualizando por polling.');
+            iniciarPollingDados();
+        } else {
+            console.warn('iniciarStreamOdds: Conexão com o stream de odds interrompida, tentando reconectar...');
+        }
+    });
+}
+
+const INTERVALO_POLLING_DADOS_MS = 5000;
+let pollingDados = null;
+
+/**
+ * Consulta /dados/ periodicamente quando o stream não está disponível. Com o ETag,
+ * as consultas sem mudanças recebem 304 e custam quase nada ao servidor.
+ */
+function iniciarPollingDados() {
+    if (pollingDados) {
+        return;
+    }
+    pollingDados = setInterval(carregarDados, INTERVALO_POLLING_DADOS_MS);
+}
+
+// ETag da última resposta de /dados/: sem mudanças, o servidor responde 304 sem corpo
+let etagDados = null;
+
 /**
  * Carrega os dados do usuário, odds e informações de apostas do backend.
  */
 async function carregarDados() {
     console.log('carregarDados: Iniciando carregamento de dados...');
     try {
+        const headers = {
+            'X-Requested-With': 'XMLHttpRequest',
+        };
+        if (etagDados) {
+            headers['If-None-Match'] = etagDados;
+        }
         const response = await fetch('/dados/', {
             method: 'GET',
-            headers: {
-                'X-Requested-With': 'XMLHttpRequest',
-            }
+            headers: headers
         });
 
+        if (response.status === 304) {
+            console.log('carregarDados: Dados inalterados desde a última busca (304).');
+            return;
+        }
+
         if (response.ok) {
+            etagDados = response.headers.get('ETag');
             const data = await response.json();
             console.log('carregarDados: Dados recebidos e analisados (JSON):', data);
 
@@ -129,24 +213,9 @@ async function carregarDados() {
                 console.warn('carregarDados: Não foi possível atualizar o nome do usuário. Elemento ou dados ausentes.');
             }
 
-            // Atualizar odds na interface
-            const oddMenino = parseFloat(data.odd_menino);
-            const oddMenina = parseFloat(data.odd_menina);
-
-            if (oddMeninoElement) {
-                oddMeninoElement.textContent = `odd: ${oddMenino.toFixed(1)}x`;
-            } else {
-                console.warn('carregarDados: Elemento oddMeninoElement não encontrado.');
-            }
-            if (oddMeninaElement) {
-                oddMeninaElement.textContent = `odd: ${oddMenina.toFixed(1)}x`;
-            } else {
-                console.warn('carregarDados: Elemento oddMeninaElement não encontrado.');
-            }
-
-            // Atualizar data-odds nos blocos
-            if (blocks[0]) blocks[0].setAttribute('data-odds', oddMenino);
-            if (blocks[1]) blocks[1].setAttribute('data-odds', oddMenina);
+            // Atualizar odds na interface (depois disso, o stream mantém as odds atualizadas)
+            atualizarOdds(data);
+            iniciarStreamOdds();
 
             // Atualizar dados do usuário
             if (totalBetElement && data.usuario) {
@@ -295,18 +364,35 @@ if (placeBetButton && betAmountInput && totalBetElement && betCountElement && la
 
                 const container = document.getElementById('pixQrCodeContainer');
                 container.innerHTML = '';  // wipe out any old QR
-                const canvas = document.createElement('canvas'); 
-                container.appendChild(canvas);
-
-                QRCode.toCanvas(canvas, data.pix_payload, {
-                width: 300,   // size in px; tweak as you like
-                margin: 1     // small white border
-                }, err => {
-                if (err) {
-                    console.error('QR gen error:', err);
-                    showMessageModal('Erro ao gerar QR Code.');
+
+                // QR Code renderizado (e cacheado) pelo servidor; se a imagem falhar, gera no navegador
+                const gerarQrNoNavegador = () => {
+                    container.innerHTML = '';
+                    const canvas = document.createElement('canvas'); 
+                    container.appendChild(canvas);
+
+                    QRCode.toCanvas(canvas, data.pix_payload, {
+                    width: 300,   // size in px; tweak as you like
+                    margin: 1     // small white border
+                    }, err => {
+                    if (err) {
+                        console.error('QR gen error:', err);
+                        showMessageModal('Erro ao gerar QR Code.');
+                    }
+                    });
+                };
+
+                if (data.qrcode_url) {
+                    const img = document.createElement('img');
+                    img.src = data.qrcode_url;
+                    img.alt = 'QR Code PIX';
+                    img.width = 300;
+                    img.height = 300;
+                    img.addEventListener('error', gerarQrNoNavegador);
+                    container.appendChild(img);
+                } else {
+                    gerarQrNoNavegador();
                 }
-                });
 
                 document.getElementById('pixPayload').textContent = data.pix_payload;
                 document.getElementById('pixKey').textContent = data.chave_pix;
@@ -322,7 +408,7 @@ if (placeBetButton && betAmountInput && totalBetElement && betCountElement && la
                 currentSelection = null;
                 currentOdds = 0;
 
-                await carregarDados(); // Refresh odds
+                await carregarDados(); // Refresh user data (odds chegam pelo stream)
             } else {
                 showMessageModal(data.error || 'Erro ao registrar aposta. Tente novamente.');
             }
@@ -0,0 +1,156 @@
+"""
+Transmissão das odds via Server-Sent Events (somente sob ASGI).
+
+Um único PublicadorPote por evento em cada processo observa a versão do pote
+(uma leitura de cache por intervalo) e, quando ela muda, calcula o payload uma vez
+e o entrega a todos os clientes conectados àquele evento. O custo passa a ser um
+cálculo por mudança do pote, e não um por cliente a cada polling.
+"""
+import asyncio
+import inspect
+import json
+import logging
+from functools import partial
+
+from asgiref.sync import sync_to_async
+
+from .cache_pote import asnapshot_pote, snapshot_pote, versao_pote
+
+logger = logging.getLogger(__name__)
+
+
+def payload_odds(evento=None):
+    """
+    Totais dos potes e odds do evento no mesmo formato usado por /dados/.
+    """
+    return _payload(snapshot_pote(evento))
+
+
+async def apayload_odds(evento=None):
+    return _payload(await asnapshot_pote(evento))
+
+
+def _payload(snapshot):
+    return {
+        'odd_menino': str(snapshot['odds'].get('M')),
+        'odd_menina': str(snapshot['odds'].get('F')),
+        'total_pote_masculino': str(snapshot['total_masculino']),
+        'total_pote_feminino': str(snapshot['total_feminino']),
+    }
+
+
+class PublicadorPote:
+    """
+    Fan-out em processo das atualizações do pote para os assinantes (filas asyncio).
+    As funções de versão e de payload são injetáveis para facilitar os testes; a de
+    payload pode ser uma corrotina.
+    """
+
+    def __init__(self, obter_versao=versao_pote, obter_payload=apayload_odds, intervalo=1.0, tamanho_fila=10):
+        self.obter_versao = obter_versao
+        self.obter_payload = obter_payload
+        self.intervalo = intervalo
+        self.tamanho_fila = tamanho_fila
+        self._assinantes = set()
+        self._tarefa = None
+        self._lock = None
+        self._ultimo = None  # (versao, payload)
+
+    @property
+    def total_assinantes(self):
+        return len(self._assinantes)
+
+    def publicar(self, versao, payload):
+        """
+        Entrega (versao, payload) a todos os assinantes. Um assinante lento perde
+        as atualizações mais antigas, nunca a mais recente.
+        """
+        self._ultimo = (versao, payload)
+        for fila in self._assinantes:
+            if fila.full():
+                fila.get_nowait()
+            fila.put_nowait(self._ultimo)
+
+    async def _verificar(self):
+        """
+        Consulta a versão do pote e publica um novo payload se ela mudou.
+        """
+        versao = await sync_to_async(self.obter_versao)()
+        if self._ultimo is None or versao != self._ultimo[0]:
+            if inspect.iscoroutinefunction(self.obter_payload):
+                payload = await self.obter_payload()
+            else:
+                payload = await sync_to_async(self.obter_payload)()
+            self.publicar(versao, payload)
+
+    async def _observar(self):
+        while self._assinantes:
+            try:
+                await self._verificar()
+            except Exception:
+                # Uma falha de leitura não derruba as conexões; tenta de novo no próximo ciclo
+                logger.exception("Falha ao verificar a versão do pote para o stream de odds")
+            await asyncio.sleep(self.intervalo)
+        self._ultimo = None
+
+    async def inscrever(self):
+        """
+        Cria a fila de um novo assinante, já com o estado atual, e garante que o
+        laço de observação esteja rodando no event loop corrente.
+        """
+        if self._ultimo is None:
+            # Várias conexões simultâneas disparam um único cálculo inicial
+            if self._lock is None:
+                self._lock = asyncio.Lock()
+            async with self._lock:
+                if self._ultimo is None:
+                    await self._verificar()
+        fila = asyncio.Queue(maxsize=self.tamanho_fila)
+        fila.put_nowait(self._ultimo)
+        self._assinantes.add(fila)
+        if self._tarefa is None or self._tarefa.done():
+            self._tarefa = asyncio.ensure_future(self._observar())
+        return fila
+
+    def cancelar(self, fila):
+        self._assinantes.discard(fila)
+
+
+publicador_pote = PublicadorPote()
+
+# evento_id -> publicador daquele evento (o do evento padrão é o publicador_pote)
+_publicadores = {}
+
+
+def publicador_do_evento(evento_id):
+    """
+    Retorna o publicador do evento, criando-o na primeira assinatura.
+    """
+    from .models import Evento
+
+    if evento_id is None or evento_id == Evento.objects.PK_PADRAO:
+        return publicador_pote
+    publicador = _publicadores.get(evento_id)
+    if publicador is None:
+        publicador = _publicadores[evento_id] = PublicadorPote(
+            partial(versao_pote, evento_id), partial(apayload_odds, evento_id)
+        )
+    return publicador
+
+
+async def eventos_sse(publicador, intervalo_heartbeat=15):
+    """
+    Converte as publicações em mensagens Server-Sent Events, com um comentário
+    periódico para manter a conexão aberta através de proxies.
+    """
+    fila = await publicador.inscrever()
+    try:
+        while True:
+            try:
+                versao, payload = await asyncio.wait_for(fila.get(), intervalo_heartbeat)
+            except asyncio.TimeoutError:
+                yield ': ping\n\n'
+                continue
+            yield f"id: {versao}\nevent: odds\ndata: {json.dumps(payload)}\n\n"
+    finally:
+        publicador.cancelar(fila)
@@ -1,3 +1,1078 @@
-from django.test import TestCase
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.contrib.auth.signals import user_login_failed
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db.models import F, Max, Sum
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .busca import BuscaIndexadaMixin
+from .calculo_unico import CalculoUnico
+from .conciliacao import aplicar_conciliacao, conciliar, ler_csv, ler_ofx
+from .limitador import BaldeDeFichas, ip_do_cliente
+from .metricas import contador_cache, metricas_views
+from .models import (
+    Aposta, CheckpointPote, Evento, EventoAposta, Pote, RelatorioFinanceiro, ResumoApostasUsuario, RollupPote,
+    TrigramaUsuario, Usuario,
+)
+from .pix import BRCode, crc16_ccitt
+from .qrcode_pix import cache_qrcodes
+from .serie_odds import lttb
+from .stream import PublicadorPote, eventos_sse
+from .transicoes import transicionar
+from .views import stream_odds
+
+
+class PoteConsolidadoTests(TestCase):
+    """
+    Garante que o Pote consolidado acompanha as transições de status das apostas.
+    """
+
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(
+            telefone='62999887766', nome='Convidado', chave_pix='chave', password='senha123'
+        )
+
+    def criar_aposta(self, sexo='M', valor='10.00', status='pendente'):
+        return Aposta.objects.create(
+            usuario=self.usuario, sexo_escolha=sexo, valor_aposta=Decimal(valor), status=status
+        )
+
+    def test_pote_acompanha_save_e_delete(self):
+        aposta = self.criar_aposta(valor='10.00')
+        self.assertEqual(Aposta.objects.get_total_pote(), Decimal('0.00'))
+
+        aposta.status = 'valida'
+        aposta.save()
+        pote = Pote.objects.atual()
+        self.assertEqual(pote.total_masculino, Decimal('7.50'))
+        self.assertEqual(pote.total_bruto, Decimal('10.00'))
+        self.assertEqual(pote.quantidade_masculino, 1)
+
+        aposta.delete()
+        self.assertEqual(Pote.objects.atual().total_masculino, Decimal('0.00'))
+        self.assertEqual(Pote.objects.atual().quantidade_masculino, 0)
+
+    def test_alterar_status_em_massa(self):
+        self.criar_aposta('M', '10.00')
+        self.criar_aposta('F', '20.00')
+        self.criar_aposta('F', '4.00', status='valida')
+
+        Aposta.objects.filter(status='pendente').alterar_status('valida')
+        self.assertEqual(Aposta.objects.get_total_pote_feminino(), Decimal('18.00'))
+        self.assertEqual(Aposta.objects.get_total_arrecadado_bruto(), Decimal('34.00'))
+
+        Aposta.objects.filter(sexo_escolha='F').alterar_status('rejeitada')
+        self.assertEqual(Aposta.objects.get_total_pote_feminino(), Decimal('0.00'))
+        self.assertEqual(Aposta.objects.calcular_odds(), {'M': Decimal('1.00'), 'F': Decimal('750.00')})
+        self.assertEqual(Pote.objects.recalcular(salvar=False), {})
+
+    def test_rebuild_corrige_divergencia(self):
+        self.criar_aposta('M', '10.00', status='valida')
+        Pote.objects.filter(evento_id=1).update(total_masculino=Decimal('99.00'))
+
+        call_command('rebuild_pote', stdout=StringIO())
+        self.assertEqual(Pote.objects.atual().total_masculino, Decimal('7.50'))
+
+    def test_with_odds_custo_constante(self):
+        for i in range(20):
+            self.criar_aposta('M' if i % 3 else 'F', '10.00', status='valida')
+
+        with self.assertNumQueries(2):
+            apostas = list(Aposta.objects.with_odds())
+            retornos = [(a.odd_da_aposta, a.retorno_potencial, a.retorno_real_possivel) for a in apostas]
+
+        odds = Aposta.objects.calcular_odds()
+        for aposta, (odd, retorno, retorno_real) in zip(apostas, retornos):
+            self.assertEqual(odd, odds[aposta.sexo_escolha])
+            self.assertEqual(retorno, (aposta.valor_aposta * odd).quantize(Decimal('0.01')))
+            self.assertEqual(retorno_real, (aposta.valor_para_pote * odd).quantize(Decimal('0.01')))
+
+
+class ResumoApostasUsuarioTests(TestCase):
+
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(
+            telefone='62999887766', nome='Convidado', chave_pix='chave', password='senha123'
+        )
+
+    def test_resumo_acompanha_transicoes(self):
+        primeira = Aposta.objects.create(usuario=self.usuario, sexo_escolha='M', valor_aposta=Decimal('10.00'))
+        segunda = Aposta.objects.create(usuario=self.usuario, sexo_escolha='F', valor_aposta=Decimal('5.00'))
+        Aposta.objects.filter(pk__in=[primeira.pk, segunda.pk]).alterar_status('valida')
+
+        resumo = ResumoApostasUsuario.objects.do_usuario(self.usuario)
+        self.assertEqual(resumo.total_validado, Decimal('15.00'))
+        self.assertEqual(resumo.quantidade_validas, 2)
+        self.assertEqual(resumo.ultima_aposta_texto, 'Menina - R$ 5,00')
+
+        segunda.status = 'rejeitada'
+        segunda.save()
+        resumo = ResumoApostasUsuario.objects.do_usuario(self.usuario)
+        self.assertEqual(resumo.total_validado, Decimal('10.00'))
+        self.assertEqual(resumo.ultima_aposta_texto, 'Menino - R$ 10,00')
+
+        primeira.delete()
+        resumo = ResumoApostasUsuario.objects.do_usuario(self.usuario)
+        self.assertEqual((resumo.quantidade_validas, resumo.ultima_aposta_texto), (0, '-'))
+
+    def test_dados_com_uma_leitura_do_resumo(self):
+        Aposta.objects.create(usuario=self.usuario, sexo_escolha='M', valor_aposta=Decimal('10.00'), status='valida')
+        self.client.force_login(self.usuario)
+
+        resposta = self.client.get('/dados/')
+        self.assertEqual(resposta.json()['usuario']['total_apostado'], 'R$ 10,00')
+        self.assertEqual(resposta.json()['usuario']['ultima_aposta'], 'Menino - R$ 10,00')
+
+    def test_dados_sem_mudancas_respondem_304(self):
+        cache.clear()
+        self.client.force_login(self.usuario)
+        etag = self.client.get('/dados/')['ETag']
+
+        # Só a sessão e o usuário autenticado: nenhum agregado é lido
+        with self.assertNumQueries(2):
+            resposta = self.client.get('/dados/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Aposta.objects.create(usuario=self.usuario, sexo_escolha='M', valor_aposta=Decimal('10.00'), status='valida')
+        resposta = self.client.get('/dados/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.json()['usuario']['quantidade_apostas'], 1)
+        etag = resposta['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.usuario.nome = 'Convidada'
+            self.usuario.save(update_fields=['nome'])
+        self.assertEqual(self.client.get('/dados/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    @override_settings(VERSAO_TIMEOUT_CACHE_LOCAL=0.05)
+    def test_versoes_expiram_em_cache_local(self):
+        # Num LocMemCache as invalidações de outros workers não chegam: a versão expira sozinha
+        cache.clear()
+        self.client.force_login(self.usuario)
+        etag = self.client.get('/dados/')['ETag']
+        time.sleep(0.1)
+        self.assertEqual(self.client.get('/dados/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_exclusao_do_usuario_em_cascata(self):
+        Aposta.objects.create(usuario=self.usuario, sexo_escolha='M', valor_aposta=Decimal('10.00'), status='valida')
+        self.usuario.delete()
+        self.assertFalse(ResumoApostasUsuario.objects.exists())
+        self.assertEqual(Pote.objects.atual().total_masculino, Decimal('0.00'))
+
+
+class BalancoFinanceiroTests(TestCase):
+
+    def test_cenarios_iguais_a_soma_por_aposta(self):
+        usuario = Usuario.objects.create_user(
+            telefone='62999887766', nome='Convidado', chave_pix='chave', password='senha123'
+        )
+        for sexo, valor in [('M', '10.00'), ('M', '3.33'), ('F', '7.77'), ('F', '0.01')]:
+            Aposta.objects.create(usuario=usuario, sexo_escolha=sexo, valor_aposta=Decimal(valor), status='valida')
+
+        odds = Aposta.objects.calcular_odds()
+        total_pote = Aposta.objects.get_total_pote()
+        with self.assertNumQueries(1):
+            cenarios = Aposta.objects.validar_balanco_financeiro()
+
+        for cenario in cenarios:
+            esperado = sum(
+                (a.valor_para_pote * odds[cenario['sexo']]
+                 for a in Aposta.objects.filter(sexo_escolha=cenario['sexo'], status='valida')),
+                Decimal('0.00'),
+            )
+            self.assertEqual(cenario['total_a_pagar'], esperado.quantize(Decimal('0.01')))
+            self.assertEqual(cenario['pote_disponivel'], total_pote)
+            self.assertEqual(cenario['ok'], esperado <= total_pote)
+
+
+class CachePoteTests(TransactionTestCase):
+    """
+    O snapshot do pote deve ser reaproveitado entre leituras e invalidado
+    em todos os caminhos de escrita (save, delete e ações em massa).
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = Usuario.objects.create_user(
+            telefone='62999887766', nome='Convidado', chave_pix='chave', password='senha123'
+        )
+
+    def test_leituras_repetidas_usam_o_cache(self):
+        Aposta.objects.calcular_odds()
+        antes = contador_cache.valores()
+        with self.assertNumQueries(0):
+            Aposta.objects.calcular_odds()
+            Aposta.objects.get_total_pote()
+        self.assertEqual(contador_cache.valores()['pote_hit'], antes.get('pote_hit', 0) + 2)
+
+    def test_escritas_invalidam_o_snapshot(self):
+        aposta = Aposta.objects.create(usuario=self.usuario, sexo_escolha='M', valor_aposta=Decimal('10.00'))
+        self.assertEqual(Aposta.objects.get_total_pote_masculino(), Decimal('0.00'))
+
+        Aposta.objects.filter(pk=aposta.pk).alterar_status('valida')
+        self.assertEqual(Aposta.objects.get_total_pote_masculino(), Decimal('7.50'))
+
+        Aposta.objects.create(usuario=self.usuario, sexo_escolha='F', valor_aposta=Decimal('10.00'), status='valida')
+        self.assertEqual(Aposta.objects.calcular_odds(), {'M': Decimal('2.00'), 'F': Decimal('2.00')})
+
+        aposta.delete()
+        self.assertEqual(Aposta.objects.get_total_pote(), Decimal('7.50'))
+
+
+class PublicadorPoteTests(SimpleTestCase):
+    """
+    Usa um publicador em processo com versão/payload simulados.
+    """
+
+    def test_uma_computacao_por_mudanca_para_todos_os_assinantes(self):
+        estado = {'versao': 1, 'calculos': 0}
+
+        def obter_payload():
+            estado['calculos'] += 1
+            return {'versao': estado['versao']}
+
+        publicador = PublicadorPote(lambda: estado['versao'], obter_payload, intervalo=0.01)
+
+        async def cenario():
+            filas = [await publicador.inscrever() for _ in range(5)]
+            iniciais = [await fila.get() for fila in filas]
+            estado['versao'] = 2
+            novas = [await asyncio.wait_for(fila.get(), 1) for fila in filas]
+            for fila in filas:
+                publicador.cancelar(fila)
+            await asyncio.sleep(0.05)
+            return iniciais, novas
+
+        iniciais, novas = asyncio.run(cenario())
+        self.assertEqual(iniciais, [(1, {'versao': 1})] * 5)
+        self.assertEqual(novas, [(2, {'versao': 2})] * 5)
+        self.assertEqual(estado['calculos'], 2)
+        self.assertEqual(publicador.total_assinantes, 0)
+
+    def test_formato_sse(self):
+        publicador = PublicadorPote(lambda: 7, lambda: {'odd_menino': '2.00'}, intervalo=0.01)
+
+        async def primeira_mensagem():
+            eventos = eventos_sse(publicador)
+            mensagem = await eventos.__anext__()
+            await eventos.aclose()
+            return mensagem
+
+        mensagem = asyncio.run(primeira_mensagem())
+        self.assertEqual(mensagem, 'id: 7\nevent: odds\ndata: {"odd_menino": "2.00"}\n\n')
+        self.assertEqual(publicador.total_assinantes, 0)
+
+    def test_stream_sob_wsgi_responde_204(self):
+        # Sob WSGI o stream nunca terminaria e prenderia o worker
+        resposta = asyncio.run(stream_odds(RequestFactory().get('/dados/stream/')))
+        self.assertEqual(resposta.status_code, 204)
+
+
+class CalculoUnicoTests(SimpleTestCase):
+    """
+    Chamadores concorrentes de uma mesma chave disparam um único cálculo.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def calculo_lento(self, estado, atraso=0.1):
+        def calcular():
+            estado['calculos'] += 1
+            time.sleep(atraso)
+            return estado['calculos']
+        return calcular
+
+    def test_threads_compartilham_o_calculo(self):
+        estado = {'calculos': 0}
+        calculo = CalculoUnico(lambda: cache)
+        calcular = self.calculo_lento(estado)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            valores = list(executor.map(lambda _: calculo.obter('chave', calcular), range(8)))
+        self.assertEqual(valores, [1] * 8)
+        self.assertEqual(estado['calculos'], 1)
+        self.assertEqual(cache.get('chave'), 1)
+
+    def test_corrotinas_compartilham_o_calculo(self):
+        estado = {'calculos': 0}
+        calculo = CalculoUnico(lambda: cache)
+        calcular = self.calculo_lento(estado)
+
+        async def cenario():
+            return await asyncio.gather(*(calculo.aobter('chave', calcular) for _ in range(8)))
+
+        self.assertEqual(asyncio.run(cenario()), [1] * 8)
+        self.assertEqual(estado['calculos'], 1)
+
+    def test_falha_do_dono_usa_o_valor_anterior(self):
+        cache.set('chave:ultimo', 'anterior')
+        calculo = CalculoUnico(lambda: cache)
+        iniciou = threading.Event()
+
+        def falhar():
+            iniciou.set()
+            time.sleep(0.1)
+            raise RuntimeError('banco fora do ar')
+
+        def esperar():
+            iniciou.wait()
+            return calculo.obter('chave', falhar, chave_anterior='chave:ultimo')
+
+        async def aesperar():
+            await asyncio.get_running_loop().run_in_executor(None, iniciou.wait)
+            return await calculo.aobter('chave', falhar, chave_anterior='chave:ultimo')
+
+        for esperar_dono in (esperar, lambda: asyncio.run(aesperar())):
+            iniciou.clear()
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                dono = executor.submit(calculo.obter, 'chave', falhar, chave_anterior='chave:ultimo')
+                espera = executor.submit(esperar_dono)
+                self.assertEqual(espera.result(), 'anterior')
+                with self.assertRaises(RuntimeError):
+                    dono.result()
+
+    def test_espera_esgotada_usa_o_valor_anterior(self):
+        # Outro processo segura a trava e não termina a tempo
+        cache.add('chave:calculando', 1)
+        cache.set('chave:ultimo', 'anterior')
+        estado = {'calculos': 0}
+        calculo = CalculoUnico(lambda: cache, espera=0.05, intervalo=0.01)
+        self.assertEqual(calculo.obter('chave', self.calculo_lento(estado), chave_anterior='chave:ultimo'), 'anterior')
+        self.assertEqual(estado['calculos'], 0)
+
+
+class BRCodeTests(SimpleTestCase):
+    """
+    Compara o codificador nativo com a saída do pixqrcodegen (referência anterior).
+    """
+
+    CASOS = [
+        ('EMERSON BRUNO DE QUEIROZ', '07533960173', 'GOIANIA', Decimal('10.00'), '1'),
+        ('EMERSON BRUNO DE QUEIROZ', '07533960173', 'GOIANIA', Decimal('0.01'), '987654'),
+        ('Nome Sobrenome', 'email@exemplo.com', 'Cidade Ficticia', Decimal('1234.50'), 'LOJA01'),
+        ('JOÃO DA SILVA', '+5562999887766', 'GOIÂNIA', Decimal('99999.99'), '42'),
+    ]
+
+    def payload_referencia(self, nome, chave, cidade, valor, txid):
+        from pixqrcodegen import Payload
+
+        saida = StringIO()
+        with tempfile.TemporaryDirectory() as diretorio, redirect_stdout(saida):
+            Payload(nome, chave, f"{valor:.2f}", cidade, txid, diretorio).gerarPayload()
+        return saida.getvalue().strip()
+
+    def test_igual_ao_pixqrcodegen(self):
+        for nome, chave, cidade, valor, txid in self.CASOS:
+            with self.subTest(nome=nome, valor=valor):
+                self.assertEqual(
+                    BRCode(nome, chave, cidade).payload(valor, txid),
+                    self.payload_referencia(nome, chave, cidade, valor, txid),
+                )
+
+    def test_crc16_valor_de_verificacao(self):
+        # Valor de verificação padrão do CRC-16/CCITT-FALSE
+        self.assertEqual(crc16_ccitt(b'123456789'), 0x29B1)
+
+    def test_concorrencia(self):
+        brcode = BRCode('EMERSON BRUNO DE QUEIROZ', '07533960173', 'GOIANIA')
+        esperado = {i: brcode.payload(Decimal(i) / 100, str(i)) for i in range(1, 200)}
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            obtido = dict(zip(esperado, executor.map(lambda i: brcode.payload(Decimal(i) / 100, str(i)), esperado)))
+        self.assertEqual(obtido, esperado)
+
+
+class QRCodeApostaTests(TestCase):
+
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(
+            telefone='62999887766', nome='Convidado', chave_pix='chave', password='senha123'
+        )
+        self.client.force_login(self.usuario)
+
+    def test_qrcode_da_aposta_pendente(self):
+        aposta = Aposta.objects.create(usuario=self.usuario, sexo_escolha='M', valor_aposta=Decimal('10.00'))
+        url = f'/aposta/{aposta.id}/qrcode.png'
+
+        resposta = self.client.get(url)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta['Content-Type'], 'image/png')
+        self.assertTrue(resposta.content.startswith(b'\x89PNG'))
+        self.assertIn('immutable', resposta['Cache-Control'])
+
+        # Mesmo com a imagem fora do cache, o 304 não rasteriza de novo
+        cache_qrcodes._itens.clear()
+        with mock.patch('core.qrcode_pix._rasterizar') as rasterizar:
+            resposta = self.client.get(url, HTTP_IF_NONE_MATCH=resposta['ETag'])
+        self.assertEqual(resposta.status_code, 304)
+        rasterizar.assert_not_called()
+
+        self.assertEqual(self.client.get(f'/aposta/{aposta.id}/qrcode.svg')['Content-Type'], 'image/svg+xml')
+
+    def test_apenas_apostas_pendentes(self):
+        aposta = Aposta.objects.create(
+            usuario=self.usuario, sexo_escolha='M', valor_aposta=Decimal('10.00'), status='valida'
+        )
+        self.assertEqual(self.client.get(f'/aposta/{aposta.id}/qrcode.png').status_code, 404)
+
+
+class ImportApostasTests(TestCase):
+
+    def test_importa_csv_e_atualiza_agregados(self):
+        usuario = Usuario.objects.create_user(
+            telefone='62999887766', nome='Convidado', chave_pix='chave', password='senha123'
+        )
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as arquivo:
+            arquivo.write(
+                'telefone,sexo_escolha,valor_aposta,status\n'
+                '62999887766,M,10.00,\n'
+                '(62) 99988-7766,Menina,"5,00",valida\n'
+                '11911112222,M,1.00,\n'
+                '62999887766,F,2.00,pendente\n'
+                '62999887766,M,NaN,\n'
+                '62999887766,M,1000000.00,\n'
+            )
+        self.addCleanup(os.remove, arquivo.name)
+
+        erros = StringIO()
+        call_command('import_apostas', arquivo.name, '--batch-size', '2', stdout=StringIO(), stderr=erros)
+
+        self.assertEqual(Aposta.objects.count(), 3)
+        self.assertIn('Linha 4', erros.getvalue())
+        self.assertIn("Linha 6: valor inválido: 'NaN'.", erros.getvalue())
+        self.assertIn('Linha 7: valor da aposta acima do máximo', erros.getvalue())
+        self.assertEqual(Aposta.objects.get_total_pote_masculino(), Decimal('7.50'))
+        self.assertEqual(Aposta.objects.get_total_pote_feminino(), Decimal('3.75'))
+        resumo = ResumoApostasUsuario.objects.do_usuario(usuario)
+        self.assertEqual((resumo.total_validado, resumo.quantidade_validas), (Decimal('15.00'), 2))
+        self.assertEqual(Pote.objects.recalcular(salvar=False), {})
+
+
+class ExportacaoApostasTests(TestCase):
+
+    def setUp(self):
+        self.admin = Usuario.objects.create_superuser(
+            telefone='62911112222', nome='Admin', chave_pix='admin', password='senha123'
+        )
+        for valor in ('10.00', '20.00', '30.00'):
+            Aposta.objects.create(usuario=self.admin, sexo_escolha='M', valor_aposta=Decimal(valor), status='valida')
+        self.client.force_login(self.admin)
+
+    def test_csv_em_streaming(self):
+        resposta = self.client.get('/superuser/core/aposta/exportar/csv/')
+        self.assertTrue(resposta.streaming)
+        conteudo = b''.join(resposta.streaming_content).decode('utf-8-sig')
+        linhas = conteudo.splitlines()
+        self.assertTrue(linhas[0].startswith('ID;Evento;Nome;Telefone;Chave PIX'))
+        self.assertEqual(sum(1 for linha in linhas if ';62911112222;' in linha), 3)
+        self.assertIn('Total Arrecadado Bruto;60.00', conteudo)
+
+    def test_csv_sem_filtro_so_do_evento_padrao(self):
+        outro = Evento.objects.create(
+            nome='Chá da Ana', chave_pix_recebedor='ana@exemplo.com', nome_recebedor='ANA',
+            cidade_recebedor='ANAPOLIS', taxa=Decimal('0.10'),
+        )
+        Aposta.objects.create(evento=outro, usuario=self.admin, sexo_escolha='F', valor_aposta=Decimal('40.00'), status='valida')
+
+        def exportar(consulta=''):
+            resposta = self.client.get(f'/superuser/core/aposta/exportar/csv/{consulta}')
+            return b''.join(resposta.streaming_content).decode('utf-8-sig')
+
+        # Apostas e relatório do mesmo evento: sem filtro, o padrão
+        conteudo = exportar()
+        self.assertEqual(sum(1 for linha in conteudo.splitlines() if ';62911112222;' in linha), 3)
+        self.assertIn('Total Arrecadado Bruto;60.00', conteudo)
+        conteudo = exportar(f'?evento__id__exact={outro.pk}')
+        self.assertEqual(sum(1 for linha in conteudo.splitlines() if ';62911112222;' in linha), 1)
+        self.assertIn('Total Arrecadado Bruto;40.00', conteudo)
+
+    def test_links_no_changelist(self):
+        resposta = self.client.get('/superuser/core/aposta/')
+        self.assertContains(resposta, '/superuser/core/aposta/exportar/xlsx/')
+
+    def test_xlsx_com_duas_abas(self):
+        from openpyxl import load_workbook
+
+        resposta = self.client.get('/superuser/core/aposta/exportar/xlsx/')
+        with tempfile.TemporaryFile() as arquivo:
+            arquivo.write(b''.join(resposta.streaming_content))
+            planilha = load_workbook(arquivo, read_only=True)
+            self.assertEqual(planilha.sheetnames, ['Apostas', 'Relatório Financeiro'])
+            self.assertEqual(len(list(planilha['Apostas'].iter_rows())), 4)
+
+
+@override_settings(ADMIN_CONTAGEM_EXATA_ATE=3)
+class ChangelistGrandeVolumeTests(TestCase):
+
+    def setUp(self):
+        self.admin = Usuario.objects.create_superuser(
+            telefone='62911113333', nome='Admin', chave_pix='admin', password='senha123'
+        )
+        for valor in ('10.00', '20.00', '30.00', '40.00', '50.00'):
+            Aposta.objects.create(usuario=self.admin, sexo_escolha='F', valor_aposta=Decimal(valor), status='valida')
+        # Empate na data: o cursor desempata pelo pk
+        Aposta.objects.update(data_aposta=timezone.now())
+        self.client.force_login(self.admin)
+
+        from .admin import ApostaAdmin
+        por_pagina = ApostaAdmin.list_per_page
+        ApostaAdmin.list_per_page = 2
+        self.addCleanup(setattr, ApostaAdmin, 'list_per_page', por_pagina)
+
+    def test_contagem_estimada_e_navegacao_por_cursor(self):
+        esperadas = list(Aposta.objects.order_by('-data_aposta', '-pk').values_list('pk', flat=True))
+        vistas = []
+        url = '/superuser/core/aposta/'
+        while url:
+            resposta = self.client.get(url)
+            self.assertEqual(resposta.status_code, 200)
+            changelist = resposta.context['cl']
+            vistas += [aposta.pk for aposta in changelist.result_list]
+            proximas = changelist.url_proximas()
+            url = proximas and '/superuser/core/aposta/' + proximas
+        self.assertEqual(vistas, esperadas)
+
+        resposta = self.client.get('/superuser/core/aposta/')
+        self.assertTrue(resposta.context['cl'].paginator.estimado)
+        self.assertContains(resposta, 'cerca de 5 Apostas')
+
+        # Filtros e ordenação descartam o cursor
+        resposta = self.client.get('/superuser/core/aposta/', {'apos': esperadas[1], 'o': '4'})
+        self.assertEqual(resposta.context['cl'].result_count, 5)
+        self.assertNotIn('apos=', resposta.context['cl'].get_query_string({'status__exact': 'valida'}))
+
+
+class RelatorioFinanceiroAdminTests(TestCase):
+
+    def setUp(self):
+        self.admin = Usuario.objects.create_superuser(
+            telefone='62911115555', nome='Admin', chave_pix='admin', password='senha123'
+        )
+        Aposta.objects.create(usuario=self.admin, sexo_escolha='M', valor_aposta=Decimal('10.00'), status='valida')
+        self.client.force_login(self.admin)
+
+    def test_changelist_serve_o_snapshot_e_agenda_quando_velho(self):
+        call_command('atualizar_relatorios', stdout=StringIO())
+        Aposta.objects.create(usuario=self.admin, sexo_escolha='F', valor_aposta=Decimal('20.00'), status='valida')
+
+        with mock.patch('core.relatorios.agendar_atualizacao') as agendar:
+            resposta = self.client.get('/superuser/core/aposta/')
+            self.assertEqual(resposta.context['relatorio_financeiro']['total_arrecadado_bruto'], '10.00')
+            self.assertFalse(resposta.context['relatorio_atualizando'])
+            agendar.assert_not_called()
+
+            RelatorioFinanceiro.objects.update(gerado_em=timezone.now() - timedelta(minutes=5))
+            resposta = self.client.get('/superuser/core/aposta/')
+            self.assertEqual(resposta.context['relatorio_financeiro']['total_arrecadado_bruto'], '10.00')
+            self.assertTrue(resposta.context['relatorio_atualizando'])
+            agendar.assert_called_once_with(1)
+
+    def test_botao_recalcula_na_hora(self):
+        RelatorioFinanceiro.objects.atualizar()
+        Aposta.objects.create(usuario=self.admin, sexo_escolha='F', valor_aposta=Decimal('20.00'), status='valida')
+
+        self.assertEqual(self.client.get('/superuser/core/aposta/relatorio/atualizar/').status_code, 405)
+        resposta = self.client.post('/superuser/core/aposta/relatorio/atualizar/', follow=True)
+        self.assertEqual(resposta.context['relatorio_financeiro']['total_arrecadado_bruto'], '30.00')
+        self.assertEqual(resposta.context['relatorio_financeiro']['pote_feminino'], '15.00')
+
+
+    def test_evento_inexistente_no_filtro(self):
+        resposta = self.client.get('/superuser/core/aposta/', {'evento__id__exact': 999})
+        self.assertEqual(resposta.status_code, 200)
+        self.assertFalse(Pote.objects.filter(evento_id=999).exists())
+        with self.assertRaises(Evento.DoesNotExist):
+            Pote.objects.atual(999)
+
+
+class BuscaIndexadaTests(TestCase):
+
+    def setUp(self):
+        self.admin = Usuario.objects.create_superuser(
+            telefone='62911114444', nome='Admin', chave_pix='admin', password='senha123'
+        )
+        for telefone, nome in (('62988887777', 'Ana Souza'), ('11977776666', 'Mariana Lima'),
+                               ('21966665555', 'JOÃO Paulo'), ('62955554444', 'Joana Valida')):
+            usuario = Usuario.objects.create_user(telefone=telefone, nome=nome, chave_pix='chave', password='senha123')
+            Aposta.objects.create(usuario=usuario, sexo_escolha='M', valor_aposta=Decimal('10.00'), status='valida')
+            Aposta.objects.create(usuario=usuario, sexo_escolha='F', valor_aposta=Decimal('5.00'))
+
+    def test_mesmos_resultados_da_busca_padrao(self):
+        from django.contrib.admin.sites import site
+        from django.test import RequestFactory
+
+        request = RequestFactory().get('/')
+        request.user = self.admin
+        for modelo in (Usuario, Aposta):
+            modeladmin = site._registry[modelo]
+            for termo in ('ana', 'ANA', 'mariana lima', '"Ana Souza"', 'joão', 'JOAO', 'valida', 'pend',
+                          '8887', '62', 'xyz', 'an'):
+                esperado, _ = super(BuscaIndexadaMixin, modeladmin).get_search_results(
+                    request, modelo.objects.all(), termo)
+                obtido, _ = modeladmin.get_search_results(request, modelo.objects.all(), termo)
+                self.assertEqual(set(obtido), set(esperado), (modelo.__name__, termo))
+
+        # Termos longos passam pelo índice de trigramas
+        obtido, _ = site._registry[Aposta].get_search_results(request, Aposta.objects.all(), 'mariana')
+        self.assertIn('core_trigramausuario', str(obtido.query))
+
+    def test_indice_acompanha_o_nome(self):
+        usuario = Usuario.objects.get(telefone='62988887777')
+        usuario.nome = 'Beatriz'
+        usuario.save()
+        trigramas = set(TrigramaUsuario.objects.filter(usuario=usuario).values_list('trigrama', flat=True))
+        self.assertIn('bea', trigramas)
+        self.assertNotIn('sou', trigramas)
+        self.assertIn('888', trigramas)
+
+
+class ConciliacaoExtratoTests(TestCase):
+
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(
+            telefone='62977776666', nome='Pagador', chave_pix='chave', password='senha123'
+        )
+
+    def _aposta(self, valor, status='aguardando_validacao'):
+        return Aposta.objects.create(
+            usuario=self.usuario, sexo_escolha='M', valor_aposta=Decimal(valor), status=status
+        )
+
+    def test_ofx_concilia_por_txid_e_por_valor(self):
+        por_txid = self._aposta('10.00')
+        por_valor = self._aposta('7.00', status='pendente')
+        repetida_1, repetida_2 = self._aposta('5.00'), self._aposta('5.00')
+        data = por_txid.data_aposta.strftime('%Y%m%d%H%M%S')
+        ofx = (
+            '<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n'
+            f'<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>{data}<TRNAMT>10.00<FITID>A1<MEMO>PIX TXID {por_txid.pk}</STMTTRN>\n'
+            f'<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>{data}<TRNAMT>7,00<FITID>A2<MEMO>PIX RECEBIDO</STMTTRN>\n'
+            f'<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>{data}<TRNAMT>5.00<FITID>A3<MEMO>PIX RECEBIDO</STMTTRN>\n'
+            f'<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>{data}<TRNAMT>-3.00<FITID>A4<MEMO>TARIFA</STMTTRN>\n'
+            f'<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>{data}<TRNAMT>99.00<FITID>A5<MEMO>PIX</STMTTRN>\n'
+            '</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>'
+        )
+
+        resultado = conciliar(ler_ofx(ofx))
+
+        self.assertEqual(
+            [(t.identificador, id_aposta, criterio) for t, id_aposta, criterio in resultado.conciliadas],
+            [('A1', por_txid.pk, 'txid'), ('A2', por_valor.pk, 'valor+janela')],
+        )
+        self.assertEqual([sorted(ids) for _, ids in resultado.ambiguas], [sorted([repetida_1.pk, repetida_2.pk])])
+        self.assertEqual([t.identificador for t in resultado.sem_correspondencia], ['A5'])
+
+        self.assertEqual(aplicar_conciliacao(resultado), 2)
+        self.assertEqual(Aposta.objects.get(pk=por_txid.pk).status, 'valida')
+        self.assertEqual(Aposta.objects.get(pk=repetida_1.pk).status, 'aguardando_validacao')
+        self.assertEqual(Aposta.objects.get_total_pote_masculino(), Decimal('12.75'))
+        self.assertEqual(Pote.objects.recalcular(salvar=False), {})
+
+    def test_txid_tem_prioridade_independente_da_ordem(self):
+        primeira, segunda = self._aposta('8.00'), self._aposta('8.00')
+        momento = timezone.localtime(primeira.data_aposta)
+        # A transferência só por valor vem antes, no extrato, da que identifica a primeira aposta
+        transferencias = ler_csv(
+            'data;valor;descricao\n'
+            f'{momento:%d/%m/%Y %H:%M};8,00;PIX RECEBIDO\n'
+            f'{momento:%d/%m/%Y %H:%M};8,00;PIX TXID {primeira.pk}\n'
+        )
+
+        resultado = conciliar(transferencias)
+        self.assertEqual(
+            sorted((id_aposta, criterio) for _, id_aposta, criterio in resultado.conciliadas),
+            [(primeira.pk, 'txid'), (segunda.pk, 'valor+janela')],
+        )
+        self.assertEqual((resultado.ambiguas, resultado.sem_correspondencia), ([], []))
+
+    def test_csv_fora_da_janela_nao_concilia(self):
+        aposta = self._aposta('20.00')
+        depois = timezone.localtime(aposta.data_aposta) + timedelta(hours=5)
+        transferencias = ler_csv(f'data;valor;descricao\n{depois:%d/%m/%Y %H:%M};20,00;PIX RECEBIDO\n')
+
+        self.assertEqual(len(conciliar(transferencias).sem_correspondencia), 1)
+        self.assertEqual(len(conciliar(transferencias, janela=timedelta(hours=6)).conciliadas), 1)
+
+    def test_csv_sem_separador_vira_value_error(self):
+        with self.assertRaises(ValueError):
+            ler_csv('extrato do banco\n10,00\n')
+
+
+class TransicoesTests(TestCase):
+
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(
+            telefone='62955554444', nome='Transição', chave_pix='chave', password='senha123'
+        )
+
+    def _aposta(self, status, valor='10.00'):
+        return Aposta.objects.create(
+            usuario=self.usuario, sexo_escolha='F', valor_aposta=Decimal(valor), status=status
+        ).pk
+
+    def test_aplica_so_transicoes_permitidas_e_conta_ignoradas(self):
+        ids = [self._aposta('pendente'), self._aposta('aguardando_validacao'), self._aposta('cancelada'), self._aposta('valida')]
+
+        resultado = transicionar(ids + [999999], 'valida', tamanho_lote=2)
+
+        self.assertEqual(tuple(resultado), (2, 3))
+        self.assertEqual(
+            list(Aposta.objects.filter(pk__in=ids).order_by('pk').values_list('status', 'status_anterior')),
+            [('valida', 'pendente'), ('valida', 'aguardando_validacao'), ('cancelada', ''), ('valida', '')],
+        )
+        self.assertEqual(Aposta.objects.get_total_pote_feminino(), Decimal('22.50'))
+        self.assertEqual(ResumoApostasUsuario.objects.do_usuario(self.usuario).quantidade_validas, 3)
+        self.assertEqual(Pote.objects.recalcular(salvar=False), {})
+
+        # Repetir a mesma transição não altera nada
+        self.assertEqual(tuple(transicionar(ids, 'valida')), (0, 4))
+        with self.assertRaises(ValueError):
+            transicionar(ids, 'aguardando_validacao', origens=['valida'])
+
+    def test_save_segue_as_transicoes_permitidas(self):
+        aposta = Aposta.objects.get(pk=self._aposta('cancelada'))
+        aposta.status = 'valida'
+        with self.assertRaises(ValidationError):
+            aposta.full_clean()
+        with self.assertRaises(ValueError):
+            aposta.save()
+        self.assertEqual(Aposta.objects.get(pk=aposta.pk).status, 'cancelada')
+
+        aposta = Aposta.objects.get(pk=self._aposta('aguardando_validacao'))
+        aposta.status = 'valida'
+        with mock.patch('core.signals.registrar_alteracoes') as registrar:
+            aposta.save()
+        self.assertEqual(registrar.call_count, 1)
+        self.assertEqual(Aposta.objects.get(pk=aposta.pk).status_anterior, 'aguardando_validacao')
+
+    def test_confirmar_pagamento_so_da_propria_aposta_pendente(self):
+        pendente = self._aposta('pendente')
+        outro = Usuario.objects.create_user(telefone='62944443333', nome='Outro', chave_pix='c', password='senha123')
+        self.client.force_login(outro)
+        resposta = self.client.post('/confirmar_pagamento_aposta/', {'aposta_id': pendente}, content_type='application/json')
+        self.assertEqual(resposta.status_code, 404)
+
+        self.client.force_login(self.usuario)
+        resposta = self.client.post('/confirmar_pagamento_aposta/', {'aposta_id': pendente}, content_type='application/json')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(Aposta.objects.get(pk=pendente).status, 'aguardando_validacao')
+
+
+class EventoApostaTests(TestCase):
+
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(
+            telefone='62933332222', nome='Histórico', chave_pix='chave', password='senha123'
+        )
+
+    def _atual(self):
+        pote = EventoAposta.objects.pote_em(timezone.now())
+        return {campo: pote[campo] for campo in ('total_masculino', 'total_feminino', 'total_bruto', 'quantidade_masculino', 'quantidade_feminino')}
+
+    def _pote(self):
+        pote = Pote.objects.atual()
+        return {campo: getattr(pote, campo) for campo in ('total_masculino', 'total_feminino', 'total_bruto', 'quantidade_masculino', 'quantidade_feminino')}
+
+    def test_reconstroi_pote_e_odds_no_momento_da_aposta(self):
+        menino = Aposta.objects.create(usuario=self.usuario, sexo_escolha='M', valor_aposta=Decimal('30.00'), status='valida')
+        menina = Aposta.objects.create(usuario=self.usuario, sexo_escolha='F', valor_aposta=Decimal('10.00'))
+        transicionar([menina.pk], 'valida')
+        antes_da_rejeicao = timezone.now()
+        transicionar([menino.pk], 'rejeitada')
+
+        self.assertEqual(
+            list(EventoAposta.objects.filter(aposta_id=menino.pk).values_list('status_anterior', 'status_novo')),
+            [('', 'valida'), ('valida', 'rejeitada')],
+        )
+        no_momento = EventoAposta.objects.pote_em(antes_da_rejeicao)
+        self.assertEqual((no_momento['total_masculino'], no_momento['total_feminino']), (Decimal('22.50'), Decimal('7.50')))
+        self.assertEqual(no_momento['odds'], Aposta.objects.calcular_odds_dos_totais(Decimal('22.50'), Decimal('7.50')))
+        self.assertEqual(EventoAposta.objects.pote_em(menino.data_aposta)['quantidade_feminino'], 0)
+
+        self.client.force_login(self.usuario)
+        resposta = self.client.get('/dados/historico/', {'aposta': menina.pk})
+        self.assertEqual(resposta.json()['total_pote_masculino'], '22.50')
+        self.assertEqual(self.client.get('/dados/historico/').status_code, 400)
+        self.assertEqual(self.client.get('/dados/historico/', {'aposta': 'abc'}).status_code, 400)
+
+    def test_checkpoint_mais_eventos_seguintes_bate_com_o_pote(self):
+        aposta = Aposta.objects.create(usuario=self.usuario, sexo_escolha='M', valor_aposta=Decimal('10.00'), status='valida')
+        checkpoint = CheckpointPote.objects.criar()
+        self.assertEqual(checkpoint.total_masculino, Decimal('7.50'))
+        self.assertIsNone(CheckpointPote.objects.criar())
+
+        aposta.valor_aposta = Decimal('20.00')
+        aposta.sexo_escolha = 'F'
+        aposta.save()
+        Aposta.objects.create(usuario=self.usuario, sexo_escolha='M', valor_aposta=Decimal('4.00'), status='valida').delete()
+
+        self.assertEqual(self._atual(), self._pote())
+        CheckpointPote.objects.criar()
+        self.assertEqual(self._atual(), self._pote())
+
+    def test_checkpoint_nao_depende_da_ordem_de_criado_em(self):
+        # O id e o criado_em do log não andam juntos (o criado_em é anterior ao commit):
+        # o checkpoint corta pelo id, e nenhum registro anterior ao corte fica de fora
+        primeira = Aposta.objects.create(usuario=self.usuario, sexo_escolha='M', valor_aposta=Decimal('10.00'), status='valida')
+        Aposta.objects.create(usuario=self.usuario, sexo_escolha='F', valor_aposta=Decimal('10.00'), status='valida')
+        agora = timezone.now()
+        EventoAposta.objects.filter(aposta_id=primeira.pk).update(criado_em=agora + timedelta(minutes=1))
+        EventoAposta.objects.exclude(aposta_id=primeira.pk).update(criado_em=agora - timedelta(minutes=1))
+
+        checkpoint = CheckpointPote.objects.criar()
+        self.assertEqual(checkpoint.ultimo_evento_id, EventoAposta.objects.aggregate(ultimo=Max('pk'))['ultimo'])
+        self.assertEqual(EventoAposta.objects.pote_em(agora + timedelta(minutes=2))['total_masculino'], Decimal('7.50'))
+
+
+class SerieOddsTests(TestCase):
+
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(
+            telefone='62922221111', nome='Gráfico', chave_pix='chave', password='senha123'
+        )
+
+    def test_rollups_incrementais_e_serie(self):
+        Aposta.objects.create(usuario=self.usuario, sexo_escolha='M', valor_aposta=Decimal('10.00'), status='valida')
+        feminina = Aposta.objects.create(usuario=self.usuario, sexo_escolha='F', valor_aposta=Decimal('30.00'))
+        transicionar([feminina.pk], 'valida')
+        Aposta.objects.create(usuario=self.usuario, sexo_escolha='F', valor_aposta=Decimal('5.00'))  # pendente: não entra
+
+        incrementais = sorted(RollupPote.objects.values_list('granularidade', 'inicio', 'total_masculino', 'total_feminino'))
+        RollupPote.objects.recalcular()
+        self.assertEqual(sorted(RollupPote.objects.values_list('granularidade', 'inicio', 'total_masculino', 'total_feminino')), incrementais)
+
+        self.client.force_login(self.usuario)
+        inicio = (timezone.now() - timedelta(hours=1)).isoformat()
+        resposta = self.client.get('/dados/odds_historico/', {'inicio': inicio})
+        self.assertEqual(resposta.status_code, 200)
+        self.assertIn('max-age=30', resposta['Cache-Control'])
+        dados = resposta.json()
+        self.assertEqual(dados['granularidade'], 'minuto')
+        self.assertEqual(dados['pontos'][0]['total_pote_masculino'], '0.00')
+        self.assertEqual(
+            (dados['pontos'][-1]['total_pote_masculino'], dados['pontos'][-1]['total_pote_feminino']),
+            ('7.50', '22.50'),
+        )
+        self.assertEqual(self.client.get('/dados/odds_historico/', {'pontos': 'x'}).status_code, 400)
+
+    def test_lttb_preserva_extremos(self):
+        pontos = [(x, 1.0) for x in range(100)]
+        pontos[37] = (37, 9.0)
+        indices = lttb(pontos, 10)
+        self.assertEqual(len(indices), 10)
+        self.assertEqual((indices[0], indices[-1]), (0, 99))
+        self.assertIn(37, indices)
+        self.assertEqual(lttb(pontos[:5], 10), [0, 1, 2, 3, 4])
+
+
+class MultiplosEventosTests(TestCase):
+    """
+    Cada evento tem pote, odds, taxa e recebedor próprios.
+    """
+
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(
+            telefone='62933334444', nome='Convidado', chave_pix='chave', password='senha123'
+        )
+        self.padrao = Evento.objects.padrao()
+        self.outro = Evento.objects.create(
+            nome='Chá da Ana', chave_pix_recebedor='ana@exemplo.com', nome_recebedor='ANA',
+            cidade_recebedor='ANAPOLIS', taxa=Decimal('0.10'),
+        )
+
+    def test_potes_e_odds_isolados_por_evento(self):
+        Aposta.objects.create(usuario=self.usuario, sexo_escolha='M', valor_aposta=Decimal('10.00'), status='valida')
+        aposta = Aposta.objects.create(evento=self.outro, usuario=self.usuario, sexo_escolha='F',
+                                       valor_aposta=Decimal('10.00'))
+        transicionar([aposta.pk], 'valida')
+
+        self.assertEqual(Aposta.objects.get_total_pote_masculino(), Decimal('7.50'))
+        self.assertEqual(Aposta.objects.get_total_pote_feminino(), Decimal('0.00'))
+        self.assertEqual(Aposta.objects.get_total_pote_feminino(self.outro), Decimal('9.00'))
+        self.assertEqual(Aposta.objects.get_total_pote_masculino(self.outro), Decimal('0.00'))
+        self.assertEqual(Aposta.objects.get_total_para_pais(self.outro), Decimal('1.00'))
+        self.assertEqual(Pote.objects.recalcular(salvar=False), {})
+        self.assertEqual(Pote.objects.recalcular(salvar=False, evento=self.outro), {})
+        self.assertEqual(EventoAposta.objects.filter(evento=self.outro).count(), 2)
+
+        self.client.force_login(self.usuario)
+        dados = self.client.get('/dados/', {'evento': self.outro.pk}).json()
+        self.assertEqual((dados['total_pote_masculino'], dados['total_pote_feminino']), ('0.00', '9.00'))
+        self.assertEqual(self.client.get('/dados/', {'evento': 999}).status_code, 404)
+
+    def test_taxa_travada_depois_da_primeira_aposta(self):
+        aposta = Aposta.objects.create(evento=self.outro, usuario=self.usuario, sexo_escolha='M',
+                                       valor_aposta=Decimal('10.00'), status='valida')
+        # Mesmo com a taxa alterada por fora, a aposta antiga mantém o valor da sua época
+        Evento.objects.filter(pk=self.outro.pk).update(taxa=Decimal('0.50'))
+        aposta = Aposta.objects.get(pk=aposta.pk)
+        aposta.sexo_escolha = 'F'
+        aposta.save()
+        self.assertEqual(Aposta.objects.get(pk=aposta.pk).valor_para_pote, Decimal('9.00'))
+        relatorio = Aposta.objects.get_relatorio_financeiro(self.outro)
+        self.assertEqual(relatorio['total_para_pais'] + relatorio['total_pote_disponivel'], relatorio['total_arrecadado_bruto'])
+
+        evento = Evento.objects.get(pk=self.outro.pk)
+        evento.taxa = Decimal('0.20')
+        with self.assertRaises(ValidationError):
+            evento.full_clean()
+        with self.assertRaises(ValueError):
+            evento.save()
+
+    def test_aposta_pix_usa_o_recebedor_do_evento(self):
+        self.client.force_login(self.usuario)
+        corpo = {'sexo_escolha': 'M', 'valor_aposta': '10.00', 'evento': self.outro.pk}
+        resposta = self.client.post('/registrar/', corpo, content_type='application/json')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.json()['chave_pix'], 'ana@exemplo.com')
+        self.assertIn('ANAPOLIS', resposta.json()['pix_payload'])
+        self.assertEqual(Aposta.objects.get().evento, self.outro)
+
+        Evento.objects.filter(pk=self.outro.pk).update(status='encerrado')
+        resposta = self.client.post('/registrar/', corpo, content_type='application/json')
+        self.assertEqual(resposta.status_code, 400)
+
+        for evento, status in (('abc', 400), (999, 404)):
+            resposta = self.client.post('/registrar/', {**corpo, 'evento': evento}, content_type='application/json')
+            self.assertEqual(resposta.status_code, status)
+
+
+class LoginAssincronoTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        Usuario.objects.create_user(telefone='62911110000', nome='Login', chave_pix='chave', password='senha123')
+
+    def _login(self, senha, ip='10.0.0.1', telefone='62911110000'):
+        return self.client.post(
+            '/login/', {'telefone': telefone, 'senha': senha}, content_type='application/json', REMOTE_ADDR=ip
+        )
+
+    def test_login_e_cadastro_com_hash_no_pool(self):
+        self.assertEqual(self._login('errada').status_code, 400)
+        self.assertEqual(self._login('senha123').status_code, 200)
+        self.assertEqual(self.client.get('/apostas/').status_code, 200)
+
+        resposta = self.client.post('/cadastro_usuario/', {
+            'nome': 'Novo', 'telefone': '62911112222', 'chave_pix': 'pix', 'senha': 'segredo1',
+            'confirma_senha': 'segredo1', 'termos': 'on',
+        })
+        self.assertEqual(resposta.status_code, 200)
+        self.assertTrue(Usuario.objects.get(telefone='62911112222').check_password('segredo1'))
+
+    def test_login_assincrono_sinaliza_falha_e_atualiza_hash(self):
+        usuario = Usuario.objects.get(telefone='62911110000')
+        usuario.password = PBKDF2PasswordHasher().encode('senha123', 'salantigo', iterations=1000)
+        usuario.save(update_fields=['password'])
+        falhas = []
+        receptor = lambda sender, credentials, **kwargs: falhas.append(credentials)
+        user_login_failed.connect(receptor)
+        self.addCleanup(user_login_failed.disconnect, receptor)
+
+        self.assertEqual(self._login('errada').status_code, 400)
+        self.assertEqual(self._login('senha123', telefone='62911119999').status_code, 400)
+        self.assertEqual([c['telefone'] for c in falhas], ['62911110000', '62911119999'])
+        self.assertNotIn('errada', str(falhas))
+
+        self.assertEqual(self._login('senha123').status_code, 200)
+        usuario.refresh_from_db()
+        self.assertFalse(usuario.password.startswith('pbkdf2_sha256$1000$'))
+        self.assertTrue(usuario.check_password('senha123'))
+
+    def test_limite_por_telefone_recusa_antes_do_hash(self):
+        for i in range(5):
+            self.assertEqual(self._login('errada', ip=f'10.0.1.{i}').status_code, 400)
+        resposta = self._login('senha123', ip='10.0.2.1')
+        self.assertEqual(resposta.status_code, 429)
+        self.assertGreater(int(resposta['Retry-After']), 0)
+
+    @override_settings(IP_CLIENTE_CABECALHO='HTTP_X_FORWARDED_FOR', IP_CLIENTE_PROXIES_CONFIAVEIS=1)
+    def test_ip_do_cliente_pelo_proxy_confiavel(self):
+        fabrica = RequestFactory()
+        # A entrada mais à direita é a que o proxy acrescentou; as anteriores vêm do cliente
+        requisicao = fabrica.get('/', HTTP_X_FORWARDED_FOR='1.2.3.4, 200.1.1.7', REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(ip_do_cliente(requisicao), '200.1.1.7')
+        self.assertEqual(ip_do_cliente(fabrica.get('/', REMOTE_ADDR='10.0.0.2')), '10.0.0.2')
+
+    def test_metodos_permitidos(self):
+        self.assertEqual(self.client.get('/login/').status_code, 405)
+        self.assertEqual(self.client.put('/cadastro_usuario/').status_code, 405)
+
+    def test_balde_recarrega_com_o_tempo(self):
+        balde = BaldeDeFichas('teste', 'LIMITE_TESTE', (2, 1))
+        estado, espera = balde._consumir(None, 100.0)
+        estado, espera = balde._consumir(estado, 100.0)
+        self.assertEqual(espera, 0)
+        estado, espera = balde._consumir(estado, 100.5)
+        self.assertAlmostEqual(espera, 0.5)
+        self.assertEqual(balde._consumir(estado, 101.0)[1], 0)
+
+
+class MetricasMiddlewareTests(TestCase):
+
+    def setUp(self):
+        self.admin = Usuario.objects.create_superuser(
+            telefone='62900001111', nome='Admin', chave_pix='chave', password='senha123'
+        )
+        self.client.force_login(self.admin)
+
+    def test_metricas_por_view_em_formato_prometheus(self):
+        antes = metricas_views.valores().get('api_dados_usr_odd', {}).get('quantidade', 0)
+        self.client.get('/dados/')
+
+        dados = metricas_views.valores()['api_dados_usr_odd']
+        self.assertEqual(dados['quantidade'], antes + 1)
+        self.assertGreater(dados['consultas'], 0)
+
+        texto = self.client.get('/metrics').content.decode()
+        self.assertIn('http_request_duration_seconds_bucket{view="api_dados_usr_odd",le="+Inf"}', texto)
+        self.assertIn('http_sql_queries_total{view="api_dados_usr_odd"}', texto)
+
+        self.client.logout()
+        self.assertEqual(self.client.get('/metrics').status_code, 302)
+
+    @override_settings(METRICAS_SERVER_TIMING=True)
+    def test_server_timing_opcional(self):
+        resposta = self.client.get('/dados/')
+        self.assertRegex(resposta['Server-Timing'], r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ consultas"')
+
+
+class SeedEventTests(TestCase):
+
+    def test_semeia_usuarios_e_apostas_com_agregados_consistentes(self):
+        Usuario.objects.create_user(telefone='21900000001', nome='Existente', chave_pix='chave', password='senha123')
+
+        call_command('seed_event', users=30, bets=400, semente=7, stdout=StringIO())
+        call_command('seed_event', users=30, bets=100, semente=8, stdout=StringIO())
+
+        self.assertEqual(Usuario.objects.count(), 30)
+        self.assertEqual(Usuario.objects.filter(chave_pix__startswith='+55').count(), 29)
+        self.assertEqual(Aposta.objects.count(), 500)
+        self.assertEqual(EventoAposta.objects.count(), 500)
+        self.assertFalse(Aposta.objects.exclude(valor_para_pote=F('valor_aposta') * Decimal('0.75')).exists())
+        self.assertEqual(Pote.objects.recalcular(salvar=False), {})
+
+        resumos = {r.pk: (r.total_validado, r.quantidade_validas, r.id_ultima_aposta) for r in ResumoApostasUsuario.objects.all()}
+        ResumoApostasUsuario.objects.recalcular()
+        self.assertEqual(
+            resumos,
+            {r.pk: (r.total_validado, r.quantidade_validas, r.id_ultima_aposta) for r in ResumoApostasUsuario.objects.all()},
+        )
+        self.assertEqual(RollupPote.objects.filter(granularidade='hora').aggregate(total=Sum('total_bruto'))['total'],
+                         Pote.objects.atual().total_bruto)
+        self.assertTrue(self.client.login(telefone='11900000000', password='senha123'))
@@ -0,0 +1,89 @@
+"""
+Serviço central de transição de status das apostas.
+
+Cada lote é aplicado com um único UPDATE condicional
+(UPDATE ... SET status_anterior = status, status = novo, lote_transicao = token
+ WHERE id IN (...) AND status IN (origens permitidas)),
+sem select_for_update: o próprio UPDATE trava as linhas e reavalia o WHERE, então
+dois workers concorrentes nunca aplicam a mesma transição duas vezes. As linhas
+efetivamente alteradas são lidas de volta pelo token do lote e enviadas no sinal
+apostas_transicionadas, na mesma transação, para os agregados (Pote, resumos, cache).
+Aposta.save() segue as mesmas regras quando o status de uma aposta muda (ex.: pelo
+formulário do admin) e envia o mesmo sinal.
+"""
+import uuid
+from collections import namedtuple
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import F
+from django.dispatch import Signal
+
+from .models import AlteracaoAposta, Aposta, EstadoAposta
+
+# Status de destino -> status de origem permitidos
+TRANSICOES = {
+    'aguardando_validacao': ('pendente',),
+    'valida': ('pendente', 'aguardando_validacao', 'rejeitada'),
+    'rejeitada': ('pendente', 'aguardando_validacao', 'valida'),
+    'cancelada': ('pendente', 'aguardando_validacao'),
+}
+
+
+def transicao_permitida(origem, destino):
+    """
+    Indica se uma aposta pode passar de `origem` para `destino` (manter o status é sempre permitido).
+    """
+    return origem == destino or origem in TRANSICOES.get(destino, ())
+
+
+ResultadoTransicao = namedtuple('ResultadoTransicao', ['aplicadas', 'ignoradas'])
+
+# Enviado dentro da transação de cada lote com as alterações efetivamente aplicadas.
+# Argumentos: alteracoes (lista de AlteracaoAposta) e novo_status.
+apostas_transicionadas = Signal()
+
+
+def _lotes(ids, tamanho_lote):
+    ids = iter(ids)
+    while lote := list(islice(ids, tamanho_lote)):
+        yield lote
+
+
+def transicionar(ids, novo_status, origens=None, queryset=None, tamanho_lote=1000):
+    """
+    Move as apostas informadas para novo_status, apenas as que estão em um status
+    de origem permitido (TRANSICOES, opcionalmente restrito por origens).
+    queryset restringe ainda mais as linhas elegíveis (ex.: apostas do usuário logado).
+    Retorna ResultadoTransicao(aplicadas, ignoradas).
+    """
+    if novo_status not in TRANSICOES:
+        raise ValueError(f"Status de destino inválido: '{novo_status}'.")
+    permitidas = TRANSICOES[novo_status]
+    origens = tuple(origens) if origens is not None else permitidas
+    if not set(origens) <= set(permitidas):
+        raise ValueError(f"Transição não permitida para '{novo_status}' a partir de {sorted(set(origens) - set(permitidas))}.")
+
+    base = queryset if queryset is not None else Aposta.objects.all()
+    aplicadas = ignoradas = 0
+    for lote in _lotes(ids, tamanho_lote):
+        token = uuid.uuid4()
+        with transaction.atomic(using=base.db):
+            # status_anterior vem antes de status: o MySQL avalia as atribuições da esquerda para a direita
+            quantidade = base.filter(pk__in=lote, status__in=origens).order_by().update(
+                status_anterior=F('status'),
+                status=novo_status,
+                lote_transicao=token,
+            )
+            if quantidade:
+                linhas = Aposta.objects.using(base.db).filter(pk__in=lote, lote_transicao=token).values_list(
+                    'pk', 'data_aposta', 'usuario_id', 'evento_id', 'status_anterior', 'sexo_escolha', 'valor_aposta', 'valor_para_pote'
+                )
+                alteracoes = []
+                for pk, data_aposta, *estado in linhas:
+                    antes = EstadoAposta(*estado)
+                    alteracoes.append(AlteracaoAposta(pk, data_aposta, antes, antes._replace(status=novo_status)))
+                apostas_transicionadas.send(sender=Aposta, alteracoes=alteracoes, novo_status=novo_status)
+        aplicadas += quantidade
+        ignoradas += len(lote) - quantidade
+    return ResultadoTransicao(aplicadas, ignoradas)
@@ -12,8 +12,16 @@ urlpatterns = [
     path('cadastro_usuario/', views.cadastro_usuario, name='cadastro_usuario'),
     # URL para obter os potes e odds (usada pelo JS para atualizar a tela)
     path('dados/', views.get_dados_usuario_e_odds, name='api_dados_usr_odd'),
+    # Stream (Server-Sent Events) com as odds atualizadas a cada mudança do pote (ASGI)
+    path('dados/stream/', views.stream_odds, name='api_stream_odds'),
+    path('dados/historico/', views.pote_historico, name='api_pote_historico'),
+    path('dados/odds_historico/', views.odds_historico, name='api_odds_historico'),
     # URL para registrar uma nova aposta
     path('registrar/', views.iniciar_aposta_pix, name='iniciar_aposta_pix'),
     path('confirmar_pagamento_aposta/', views.confirmar_pagamento_aposta, name='confirmar_pagamento_aposta'),
+    # Imagem do QR Code PIX de uma aposta pendente (png ou svg)
+    path('aposta/<int:aposta_id>/qrcode.<str:formato>', views.qrcode_aposta, name='qrcode_aposta'),
+    # Métricas por view e contadores de cache no formato do Prometheus (apenas staff)
+    path('metrics', views.metricas_prometheus, name='metricas_prometheus'),
     
 ]
\ No newline at end of file
@@ -1,19 +1,37 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse
+from django.urls import reverse
+from django.http import Http404, JsonResponse, HttpResponse, HttpResponseNotAllowed, HttpResponseNotModified, StreamingHttpResponse
 from django.views.decorators.http import require_http_methods, require_POST
-from django.contrib.auth import authenticate, login, logout, get_user_model
+from django.contrib.auth import login, logout, get_user_model
 from django.contrib.auth.decorators import login_required # Se os usuários forem autenticados
+from django.contrib.admin.views.decorators import staff_member_required
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
 from django.db import IntegrityError
-from django.db.models import Sum, F
+from django.db.models import F
+from django.core.cache import caches
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.dateparse import parse_datetime
 import json
+import math
+from datetime import timedelta
 from decimal import Decimal
 import re # Para validar o formato do telefone
 import uuid # Para gerar um TxID único
-from pixqrcodegen import Payload
-from io import StringIO
-import sys
 
-from .models import Aposta 
+from .models import Aposta, Evento, EventoAposta, ResumoApostasUsuario, RollupPote
+from .metricas import contador_cache, formato_prometheus, metricas_views
+from .cache_pote import versao_pote
+from .cache_usuario import versoes_dados
+from .limitador import BaldeDeFichas, ip_do_cliente
+from .login_async import SobrecargaHash, autenticar, cadastrar
+from .pix import brcode_recebedor
+from .qrcode_pix import FORMATOS, etag_qrcode, pre_renderizar, renderizar_qrcode
+from .serie_odds import serie_odds
+from .stream import eventos_sse, publicador_do_evento
+from .transicoes import transicionar
+from asgiref.sync import sync_to_async
 
 User = get_user_model()
 
@@ -27,22 +45,49 @@ def validate_telefone_format(telefone, required_length=11):
 
 
 def generate_pix_payload(name, pix_key, value, city, txtID):
-    # Format the value
-    value_str = f"{value:.2f}"
-    payload = Payload(name, pix_key, value_str, city, txtID)
-
-    # Capture the printed output
-    old_stdout = sys.stdout
-    buf     = StringIO()
-    sys.stdout = buf
-    try:
-        payload.gerarPayload()      # this prints the BR-Code
-    finally:
-        sys.stdout = old_stdout     # restore
+    # O BRCode do recebedor é montado uma vez; aqui só entram valor e txid
+    return brcode_recebedor(name, pix_key, city).payload(value, txtID)
+
+
+def pix_payload_aposta(aposta):
+    """
+    Payload PIX de uma aposta, para o recebedor do evento dela (o txid é o id da aposta).
+    É determinístico, então pode ser regenerado a qualquer momento a partir da própria aposta.
+    """
+    evento = aposta.evento
+    return generate_pix_payload(
+        evento.nome_recebedor, evento.chave_pix_recebedor, aposta.valor_aposta,
+        evento.cidade_recebedor, str(aposta.id)
+    )
 
-    # Grab and trim the string
-    payload = buf.getvalue().strip()
-    return payload
+
+def evento_da_requisicao(request):
+    """
+    Id do evento informado em ?evento=<id>. Sem o parâmetro, é o evento padrão
+    (sem consultar o banco). Levanta Http404 para um evento inexistente.
+    """
+    valor = request.GET.get('evento')
+    if not valor:
+        return Evento.objects.PK_PADRAO
+    try:
+        evento_id = int(valor)
+    except ValueError:
+        raise Http404("Evento inválido.")
+    if not Evento.objects.filter(pk=evento_id).exists():
+        raise Http404("Evento não encontrado.")
+    return evento_id
+
+def resumo_usuario(usuario):
+    """
+    Resumo das apostas válidas do usuário já formatado para o frontend.
+    Lê o ResumoApostasUsuario com uma única consulta por chave primária.
+    """
+    resumo = ResumoApostasUsuario.objects.do_usuario(usuario)
+    return {
+        'total_apostado': f"R$ {resumo.total_validado:.2f}".replace('.', ','),
+        'quantidade_apostas': resumo.quantidade_validas,
+        'ultima_aposta': resumo.ultima_aposta_texto,
+    }
 
 @require_http_methods(["GET"])
 def login_page(request):
@@ -56,13 +101,33 @@ def login_page(request):
 
 
 
-@require_http_methods(["POST"])
-def login_view(request):
+balde_login_ip = BaldeDeFichas('login-ip', 'LOGIN_LIMITE_IP', (300, 5))
+balde_login_telefone = BaldeDeFichas('login-telefone', 'LOGIN_LIMITE_TELEFONE', (5, 1 / 30))
+balde_cadastro_ip = BaldeDeFichas('cadastro-ip', 'CADASTRO_LIMITE_IP', (200, 2))
+
+
+def _resposta_limite(espera, status=429):
+    """
+    Resposta para tentativas recusadas pelo limite de taxa (429) ou pela fila de hash cheia (503).
+    """
+    resposta = JsonResponse({
+        'success': False,
+        'errors': {'non_field_errors': 'Muitas tentativas. Aguarde alguns instantes e tente novamente.'}
+    }, status=status)
+    resposta['Retry-After'] = str(math.ceil(espera))
+    return resposta
+
+
+async def login_view(request):
     """
     Processa as credenciais de login (telefone e senha).
-    Usa o sistema de autenticação do Django para verificar e logar o usuário.
-    Espera dados JSON no corpo da requisição.
+    Espera dados JSON no corpo da requisição. View assíncrona: tentativas acima do
+    limite por IP/telefone são recusadas antes do hash, e o hash da senha roda no
+    pool limitado de core/login_async.py, sem prender o worker.
     """
+    # Método verificado aqui: require_http_methods só aceita views assíncronas a partir do Django 5.0
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
     try:
         # request.body contém os dados brutos da requisição HTTP (em bytes)
         # json.loads() tenta converter essa string JSON em um dicionário Python
@@ -95,10 +160,17 @@ def login_view(request):
     if errors:
         return JsonResponse({'success': False, 'errors': errors}, status=400)
 
-    # AUTENTICAÇÃO via Django:
-    # authenticate() verifica as credenciais do usuário. Ele usa o AUTH_USER_MODEL (Usuario)
-    # e o USERNAME_FIELD (telefone) para encontrar o usuário e comparar a senha.
-    user = authenticate(request, telefone=telefone, password=senha)
+    # Limites por IP e por telefone, antes de qualquer hash
+    espera = await balde_login_ip.aconsumir(ip_do_cliente(request)) or await balde_login_telefone.aconsumir(telefone)
+    if espera:
+        return _resposta_limite(espera)
+
+    # AUTENTICAÇÃO: mesmo resultado de authenticate() (usuário ativo, encontrado
+    # pelo telefone e com a senha correta), com o hash da senha no pool
+    try:
+        user = await autenticar(request, telefone, senha)
+    except SobrecargaHash:
+        return _resposta_limite(1, status=503)
     
     if user is not None: # Se as credenciais são válidas e o usuário foi encontrado
         if not user.is_active:
@@ -110,7 +182,7 @@ def login_view(request):
 
         # Faz login do usuário na sessão do Django.
         # Isso cria a sessão, marca o usuário como logado e atualiza o last_login.
-        login(request, user)
+        await sync_to_async(login)(request, user)
 
         # Retorna uma resposta JSON de sucesso, com mensagem e URL de redirecionamento
         return JsonResponse({
@@ -119,7 +191,7 @@ def login_view(request):
             'redirect_url': '/apostas/' # Redireciona para a página de apostas
         })
     else:
-        # Se authenticate() retornou None, significa que as credenciais são inválidas
+        # Se autenticar() retornou None, significa que as credenciais são inválidas
         return JsonResponse({
             'success': False,
             'errors': {'non_field_errors': 'Telefone ou senha incorretos.'}
@@ -132,17 +204,19 @@ def logout_view(request):
     return redirect('login_page')
 
 
-@require_http_methods(["GET", "POST"])
-def cadastro_usuario(request):
+async def cadastro_usuario(request):
     """
     Lida com o registro de novos usuários.
     - GET: Exibe o formulário de cadastro.
-    - POST: Processa os dados do formulário, valida-os e cria o usuário.
+    - POST: Processa os dados do formulário, valida-os e cria o usuário
+      (com limite por IP e o hash da senha no pool de core/login_async.py).
     """
+    if request.method not in ('GET', 'POST'):
+        return HttpResponseNotAllowed(['GET', 'POST'])
     if request.method == "GET":
         # Se a requisição for GET, simplesmente renderiza o template 'cadastro.html'
         # para que o usuário possa preencher o formulário.
-        return render(request, 'cadastro.html')
+        return await sync_to_async(render)(request, 'cadastro.html')
 
     if request.method == "POST":
         # Pega os dados enviados pelo formulário (via request.POST para FormData)
@@ -184,19 +258,21 @@ def cadastro_usuario(request):
         if errors:
             return JsonResponse({'success': False, 'errors': errors}, status=400) # Status 400 para erros de validação
 
+        espera = await balde_cadastro_ip.aconsumir(ip_do_cliente(request))
+        if espera:
+            return _resposta_limite(espera)
+
         # Bloco de Criação do Usuário e Validações de Banco de Dados
         try:
             # Validação crucial: Verifica se o telefone já está cadastrado no banco de dados.
             # É feito aqui porque só precisamos do banco de dados para essa verificação.
-            if User.objects.filter(telefone=telefone).exists():
+            if await User.objects.filter(telefone=telefone).aexists():
                 errors['telefone'] = 'Este telefone já está cadastrado.'
                 # Se o telefone já existe, retorna o erro sem tentar criar o usuário.
                 return JsonResponse({'success': False, 'errors': errors}, status=400)
             
-            # Cria o usuário usando o gerenciador customizado (UsuarioManager).
-            # O 'senha' aqui é o argumento que seu create_user no Manager espera,
-            # e ele internamente chama set_password para hashear.
-            user = User.objects.create_user(telefone=telefone, nome=nome, chave_pix=chave_pix, password=senha )
+            # Cria o usuário como o create_user do UsuarioManager, mas com o hash no pool.
+            user = await cadastrar(telefone=telefone, nome=nome, chave_pix=chave_pix, senha=senha)
             
             # Se o usuário foi criado com sucesso, retorna uma resposta de sucesso.
             return JsonResponse({
@@ -214,6 +290,8 @@ def cadastro_usuario(request):
                 'success': False,
                 'errors': {'non_field_errors': 'Ocorreu um erro de dados. Possivelmente telefone já cadastrado.'}
             }, status=400) # Erro 400 porque o cliente enviou dados que violam as regras
+        except SobrecargaHash:
+            return _resposta_limite(1, status=503)
         except Exception as e:
             # Captura qualquer outro erro inesperado durante a criação do usuário.
             print(f"Erro inesperado ao criar usuário: {str(e)}") # Log para debug no servidor
@@ -235,17 +313,14 @@ def apostas_view(request):
     """
     # request.user é uma instância do seu modelo de usuário customizado (core.Usuario)
     # quando o usuário está logado.
-    usuario_apostas = Aposta.objects.filter(usuario=request.user, status='valida')
-    total_apostado = usuario_apostas.aggregate(total=Sum('valor_aposta'))['total'] or Decimal('0.00')
-    quantidade_apostas = usuario_apostas.count()
-    ultima_aposta = usuario_apostas.first()
+    resumo = resumo_usuario(request.user)
     
     # Cria um dicionário 'context' para passar dados para o template HTML.
     context = {
         'usuario': request.user, # Acessa o nome do usuário logado
-        'total_apostado': total_apostado, # Chama um método do seu modelo para formatar o telefone
-        'quantidade_apostas': quantidade_apostas,
-        'ultima_aposta': ultima_aposta,
+        'total_apostado': resumo['total_apostado'],
+        'quantidade_apostas': resumo['quantidade_apostas'],
+        'ultima_aposta': resumo['ultima_aposta'],
     }
     # Renderiza o template 'apostas.html', passando o contexto com os dados do usuário.
     return render(request, 'apostas.html', context)
@@ -256,22 +331,23 @@ def apostas_view(request):
 @login_required
 @require_http_methods(["GET"])
 def get_dados_usuario_e_odds(request):
+    """
+    Odds, potes e resumo do usuário. O ETag combina a versão do pote do evento com a
+    versão dos dados do usuário (core/cache_usuario.py): um polling sem mudanças recebe
+    304 com uma única leitura no cache, sem tocar nos agregados.
+    """
+    evento_id = evento_da_requisicao(request)
+    etag = '"{}-{}-{}-{}"'.format(evento_id, request.user.pk, *versoes_dados(evento_id, request.user.pk))
+    if etag in request.headers.get('If-None-Match', ''):
+        resposta = HttpResponseNotModified()
+        resposta['ETag'] = etag
+        return resposta
     try:
-        odds_data = Aposta.objects.calcular_odds()
-        total_masculino = Aposta.objects.get_total_pote_masculino()
-        total_feminino = Aposta.objects.get_total_pote_feminino()
-
-        usuario_apostas = Aposta.objects.filter(usuario=request.user, status='valida')
-        total_apostado = usuario_apostas.aggregate(total=Sum('valor_aposta'))['total'] or Decimal('0.00')
-        quantidade_apostas = usuario_apostas.count()
-        ultima_aposta = usuario_apostas.order_by('-data_aposta').first()
+        odds_data = Aposta.objects.calcular_odds(evento_id)
+        total_masculino = Aposta.objects.get_total_pote_masculino(evento_id)
+        total_feminino = Aposta.objects.get_total_pote_feminino(evento_id)
 
-        ultima_aposta_texto = "-"
-        if ultima_aposta:
-            sexo_display = "Menino" if ultima_aposta.sexo_escolha == 'M' else "Menina"
-            ultima_aposta_texto = f"{sexo_display} - R$ {ultima_aposta.valor_aposta:.2f}".replace('.', ',')
-
-        return JsonResponse({
+        resposta = JsonResponse({
             'success': True,
             'odd_menino': str(odds_data.get('M', Decimal('1.0'))),
             'odd_menina': str(odds_data.get('F', Decimal('1.0'))),
@@ -279,11 +355,12 @@ def get_dados_usuario_e_odds(request):
             'total_pote_feminino': str(total_feminino),
             'usuario': {
                 'nome': request.user.nome,
-                'total_apostado': f"R$ {total_apostado:.2f}".replace('.', ','),
-                'quantidade_apostas': quantidade_apostas,
-                'ultima_aposta': ultima_aposta_texto,
+                **resumo_usuario(request.user),
             }
         })
+        resposta['ETag'] = etag
+        resposta['Cache-Control'] = 'private, no-cache'
+        return resposta
     except Exception as e:
         import logging
         logger = logging.getLogger(__name__)
@@ -292,17 +369,142 @@ def get_dados_usuario_e_odds(request):
 
 
 
+def _parse_momento(valor):
+    if not valor:
+        return None
+    momento = parse_datetime(valor)
+    if momento is None:
+        raise ValueError(valor)
+    return timezone.make_aware(momento) if timezone.is_naive(momento) else momento
+
+
+@login_required
+@require_http_methods(["GET"])
+def pote_historico(request):
+    """
+    Totais dos potes e odds como estavam em um momento passado, reconstruídos pelo
+    log de eventos. Aceita ?momento=<data ISO 8601> (com ?evento=<id> opcional) ou
+    ?aposta=<id> (uma aposta do próprio usuário, para responder "quais eram as odds
+    quando apostei?", no evento da aposta).
+    """
+    aposta_id = request.GET.get('aposta')
+    if aposta_id:
+        try:
+            aposta_id = int(aposta_id)
+        except ValueError:
+            return JsonResponse({'error': 'Aposta inválida.'}, status=400)
+        aposta = get_object_or_404(Aposta, id=aposta_id, usuario=request.user)
+        momento = aposta.data_aposta
+        evento_id = aposta.evento_id
+    else:
+        evento_id = evento_da_requisicao(request)
+        try:
+            momento = _parse_momento(request.GET.get('momento'))
+        except ValueError:
+            momento = None
+        if momento is None:
+            return JsonResponse({'error': 'Informe "momento" (data ISO 8601) ou "aposta".'}, status=400)
+
+    pote = EventoAposta.objects.pote_em(momento, evento_id)
+    return JsonResponse({
+        'success': True,
+        'momento': momento.isoformat(),
+        'odd_menino': str(pote['odds']['M']),
+        'odd_menina': str(pote['odds']['F']),
+        'total_pote_masculino': str(pote['total_masculino']),
+        'total_pote_feminino': str(pote['total_feminino']),
+        'quantidade_masculino': pote['quantidade_masculino'],
+        'quantidade_feminino': pote['quantidade_feminino'],
+    })
+
+
+@login_required
+@require_http_methods(["GET"])
+def odds_historico(request):
+    """
+    Série das odds de Menino/Menina ao longo do tempo para o gráfico, a partir dos
+    rollups por minuto/hora. Parâmetros opcionais: evento, inicio e fim (ISO 8601) e
+    pontos (máximo de pontos após a redução com LTTB). A resposta é guardada no cache
+    por versão do pote do evento, então todos os convidados compartilham o mesmo cálculo.
+    """
+    evento_id = evento_da_requisicao(request)
+    agora = timezone.now()
+    try:
+        fim = _parse_momento(request.GET.get('fim')) or agora
+        inicio = _parse_momento(request.GET.get('inicio'))
+        pontos = min(max(int(request.GET.get('pontos', 200)), 3), 1000)
+    except ValueError:
+        return JsonResponse({'error': 'Parâmetros inválidos: use inicio/fim em ISO 8601 e pontos inteiro.'}, status=400)
+    if inicio is None:
+        primeiro = RollupPote.objects.filter(evento_id=evento_id, granularidade='hora').order_by('inicio').values_list('inicio', flat=True).first()
+        inicio = primeiro or fim - timedelta(hours=6)
+    if inicio >= fim:
+        return JsonResponse({'error': '"inicio" deve ser anterior a "fim".'}, status=400)
+
+    # fim no minuto seguinte: requisições próximas compartilham a mesma chave de cache
+    fim = min(fim, agora).replace(second=0, microsecond=0) + timedelta(minutes=1)
+    chave = f"pote:serie:{evento_id}:{versao_pote(evento_id)}:{inicio.timestamp():.0f}:{fim.timestamp():.0f}:{pontos}"
+    cache = caches[getattr(settings, 'POTE_CACHE_ALIAS', 'default')]
+    dados = cache.get(chave)
+    if dados is None:
+        granularidade, serie = serie_odds(inicio, fim, pontos, evento_id)
+        dados = {'success': True, 'granularidade': granularidade, 'pontos': serie}
+        cache.set(chave, dados, timeout=getattr(settings, 'POTE_CACHE_TIMEOUT', 3600))
+
+    resposta = JsonResponse(dados)
+    # Janelas já encerradas não mudam; a janela atual muda a cada nova aposta validada
+    patch_cache_control(resposta, private=True, max_age=3600 if fim <= agora - timedelta(minutes=1) else 30)
+    return resposta
+
+
+async def stream_odds(request):
+    """
+    Server-Sent Events com os totais dos potes e as odds do evento (?evento=<id>),
+    enviados apenas quando o pote muda.
+    View assíncrona: só funciona servida via ASGI (django1/asgi.py), pois mantém a conexão
+    aberta. Sob WSGI o StreamingHttpResponse consumiria o gerador (que nunca termina) antes
+    de enviar qualquer byte, prendendo o worker; responde 204, que faz o EventSource
+    desistir, e o frontend volta a consultar /dados/ periodicamente.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    autenticado = await sync_to_async(lambda: request.user.is_authenticated)()
+    if not autenticado:
+        return JsonResponse({'error': 'Usuário não autenticado.'}, status=401)
+
+    evento_id = await sync_to_async(evento_da_requisicao)(request)
+    resposta = StreamingHttpResponse(eventos_sse(publicador_do_evento(evento_id)), content_type='text/event-stream')
+    resposta['Cache-Control'] = 'no-cache'
+    resposta['X-Accel-Buffering'] = 'no'  # Evita buffer em proxies como o nginx
+    return resposta
+
+
 @login_required
 @require_http_methods(["POST"])
 def iniciar_aposta_pix(request):
     """
-    Recebe os dados iniciais da aposta, cria uma aposta com status 'pendente'
-    e retorna os detalhes do PIX para o frontend.
+    Recebe os dados iniciais da aposta, cria uma aposta com status 'pendente' no
+    evento informado (padrão: o evento padrão) e retorna os detalhes do PIX do
+    recebedor desse evento para o frontend.
     """
     try:
         data = json.loads(request.body)
         sexo_escolha = data.get('sexo_escolha')
         valor_aposta = Decimal(str(data.get('valor_aposta', '0.00')))
+
+        evento_id = data.get('evento')
+        if evento_id:
+            try:
+                evento_id = int(evento_id)
+            except (TypeError, ValueError):
+                return JsonResponse({'error': 'Evento inválido.'}, status=400)
+        evento = Evento.objects.filter(pk=evento_id).first() if evento_id else Evento.objects.padrao()
+        if evento is None:
+            return JsonResponse({'error': 'Evento não encontrado.'}, status=404)
+        if not evento.aceita_apostas:
+            return JsonResponse({'error': 'As apostas deste evento estão encerradas.'}, status=400)
         
         if not sexo_escolha or sexo_escolha not in ['M', 'F']:
             return JsonResponse({'error': 'Escolha de sexo inválida. Deve ser "M" ou "F".'}, status=400)
@@ -311,22 +513,18 @@ def iniciar_aposta_pix(request):
             return JsonResponse({'error': 'Valor da aposta inválido. Mínimo de R$0.01.'}, status=400)
         
         aposta = Aposta.objects.create(
+            evento=evento,
             usuario=request.user,
             sexo_escolha=sexo_escolha,
             valor_aposta=valor_aposta,
             status='pendente',
         )
 
-        chave_pix_recebedor = "07533960173"
-        nome_recebedor = "EMERSON BRUNO DE QUEIROZ"
-        cidade_recebedor = "GOIANIA"
+        chave_pix_recebedor = evento.chave_pix_recebedor
         
-
-        
-        pix_payload = generate_pix_payload(
-            nome_recebedor, chave_pix_recebedor, valor_aposta, cidade_recebedor, str(aposta.id)
-        )
-        print(pix_payload)
+        pix_payload = pix_payload_aposta(aposta)
+        if settings.PIX_QRCODE_PRE_RENDERIZAR:
+            pre_renderizar(pix_payload)
         
         return JsonResponse({
             'success': True,
@@ -334,7 +532,8 @@ def iniciar_aposta_pix(request):
             'aposta_id': str(aposta.id),
             'valor_aposta': str(aposta.valor_aposta),
             'chave_pix': str(chave_pix_recebedor),
-            'pix_payload': str(pix_payload)
+            'pix_payload': str(pix_payload),
+            'qrcode_url': reverse('qrcode_aposta', args=[aposta.id, 'png']),
         }, status=200)
     
     except Exception as e:
@@ -344,6 +543,31 @@ def iniciar_aposta_pix(request):
         return JsonResponse({'error': f'Erro ao iniciar aposta PIX: {str(e)}'}, status=500)
 
 
+@login_required
+@require_http_methods(["GET"])
+def qrcode_aposta(request, aposta_id, formato):
+    """
+    Retorna a imagem (PNG ou SVG) do QR Code PIX de uma aposta pendente do usuário.
+    A imagem vem do cache LRU e, como o payload não muda, é servida como imutável.
+    """
+    if formato not in FORMATOS:
+        return JsonResponse({'error': 'Formato inválido. Use png ou svg.'}, status=400)
+
+    aposta = get_object_or_404(Aposta.objects.select_related('evento'), id=aposta_id, usuario=request.user, status='pendente')
+    payload = pix_payload_aposta(aposta)
+    etag = etag_qrcode(payload, formato)
+
+    # O 304 sai só pelo hash do payload, sem rasterizar mesmo que a imagem tenha saído do cache
+    if etag in request.headers.get('If-None-Match', ''):
+        resposta = HttpResponseNotModified()
+    else:
+        _, conteudo = renderizar_qrcode(payload, formato)
+        resposta = HttpResponse(conteudo, content_type=FORMATOS[formato])
+    resposta['ETag'] = etag
+    resposta['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return resposta
+
+
 @login_required
 @require_http_methods(["POST"])
 def confirmar_pagamento_aposta(request):
@@ -358,32 +582,19 @@ def confirmar_pagamento_aposta(request):
         if not aposta_id:
             return JsonResponse({'error': 'ID da aposta ausente'}, status=400)
         
-        aposta = get_object_or_404(Aposta, id=aposta_id, usuario=request.user, status='pendente')
-
-        aposta.status = 'aguardando_validacao'
-        aposta.save()
-
-        # Recalcula e retorna os dados atualizados do usuário para o frontend
-        # Filtra por apostas com status 'valida' para os cálculos do usuário
-
-        usuario_apostas = Aposta.objects.filter(usuario=request.user, status='valida')
-        total_apostado = usuario_apostas.aggregate(total=Sum('valor_aposta'))['total'] or Decimal('0.00')
-        quantidade_apostas = usuario_apostas.count()
-        ultima_aposta_obj = usuario_apostas.order_by('-data_aposta').first()
-
-        ultima_aposta_texto = "-"
-        if ultima_aposta_obj:
-            sexo_display = "Menino" if ultima_aposta_obj.sexo_escolha == 'M' else "Menina"
-            ultima_aposta_texto = f"{sexo_display} - R$ {ultima_aposta_obj.valor_aposta:.2f}".replace('.', ',')
+        # Um único UPDATE condicional: só passa se a aposta for do usuário e ainda estiver pendente
+        resultado = transicionar(
+            [aposta_id], 'aguardando_validacao', origens=['pendente'],
+            queryset=Aposta.objects.filter(usuario=request.user),
+        )
+        if not resultado.aplicadas:
+            raise Aposta.DoesNotExist
 
+        # Retorna os dados atualizados do usuário (apostas válidas) para o frontend
         return JsonResponse({
             'success': True,
             'message': 'Aposta finalizada! Aguardando validação do pagamento.',
-            'usuario_atualizado': {
-                'total_apostado': f"R$ {total_apostado:.2f}".replace('.', ','),
-                'quantidade_apostas': quantidade_apostas,
-                'ultima_aposta': ultima_aposta_texto,
-            }
+            'usuario_atualizado': resumo_usuario(request.user),
         }, status=200)
     
     except Aposta.DoesNotExist:
@@ -392,3 +603,15 @@ def confirmar_pagamento_aposta(request):
         print(f"Erro ao confirmar pagamento: {e}")
         return JsonResponse({'error': f'Erro ao confirmar pagamento: {str(e)}'}, status=500)
 
+
+@staff_member_required
+@require_http_methods(["GET"])
+def metricas_prometheus(request):
+    """
+    Métricas por view (histograma de latência, consultas e tempo de SQL, acertos/falhas
+    de cache) e contadores de cache do processo, no formato texto do Prometheus.
+    """
+    return HttpResponse(
+        formato_prometheus(metricas_views.valores(), contador_cache.valores()),
+        content_type='text/plain; version=0.0.4',
+    )
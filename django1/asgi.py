@@ -3,6 +3,9 @@ ASGI config for django1 project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+O stream de odds em /dados/stream/ (Server-Sent Events) é uma view assíncrona e
+deve ser servido por este application (ex: uvicorn django1.asgi:application).
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
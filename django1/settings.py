@@ -43,6 +43,7 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = 'core.Usuario'
 
 MIDDLEWARE = [
+    'core.middleware.MetricasMiddleware',  # Primeiro: mede a pilha inteira (ver /metrics)
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -95,6 +96,68 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Memória local atende uma instância única; com mais de um nó, aponte para
+# Redis/Memcached para que a versão do pote seja compartilhada entre eles.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'e-menino-ou-menina',
+    }
+}
+
+# Com mais de um worker, use um cache compartilhado (Redis, Memcached): as versões do pote e
+# dos usuários (ETag de /dados/) precisam ser vistas por todos os processos. No LocMemCache
+# elas expiram a cada VERSAO_TIMEOUT_CACHE_LOCAL segundos para limitar dados velhos.
+VERSAO_TIMEOUT_CACHE_LOCAL = 5
+
+# Alias do cache usado pelo snapshot versionado do pote/odds (core/cache_pote.py)
+POTE_CACHE_ALIAS = 'default'
+POTE_CACHE_TIMEOUT = 3600
+# Cálculo único do snapshot (core/calculo_unico.py): espera máxima por um cálculo alheio e validade da trava, em segundos
+POTE_CALCULO_ESPERA = 2.0
+POTE_CALCULO_TRAVA = 10
+
+# Recebedor dos pagamentos PIX das apostas
+PIX_CHAVE_RECEBEDOR = '07533960173'
+PIX_NOME_RECEBEDOR = 'EMERSON BRUNO DE QUEIROZ'
+PIX_CIDADE_RECEBEDOR = 'GOIANIA'
+
+# QR Code dos pagamentos: tamanho do cache LRU em memória e pré-renderização ao criar a aposta
+PIX_QRCODE_CACHE_TAMANHO = 256
+PIX_QRCODE_PRE_RENDERIZAR = True
+
+# Login/cadastro (core/login_async.py): threads para o hash de senha e máximo de hashes aguardando
+LOGIN_HASH_THREADS = 4
+LOGIN_HASH_FILA_MAXIMA = 64
+
+# Limites por token bucket (capacidade, fichas recarregadas por segundo), guardados no cache.
+# Na festa os convidados dividem o IP do Wi-Fi (NAT): os baldes por IP comportam uma multidão
+# e a força bruta é contida pelo balde por telefone.
+LIMITE_CACHE_ALIAS = 'default'
+LOGIN_LIMITE_IP = (300, 5)
+LOGIN_LIMITE_TELEFONE = (5, 1 / 30)
+CADASTRO_LIMITE_IP = (200, 2)
+
+# IP do cliente atrás de proxy reverso (core/limitador.py): cabeçalho META com a lista de IPs
+# repassada pelo proxy e quantos proxies confiáveis a acrescentam. None usa REMOTE_ADDR.
+IP_CLIENTE_CABECALHO = None
+IP_CLIENTE_PROXIES_CONFIAVEIS = 1
+
+# Métricas por view (core/middleware.py): também devolve o cabeçalho Server-Timing quando True
+METRICAS_SERVER_TIMING = False
+
+# Changelist de apostas no admin (core/paginacao.py): contagem exata até este número de linhas, estimada acima
+ADMIN_CONTAGEM_EXATA_ATE = 10_000
+
+# Relatório financeiro do admin (core/relatorios.py): idade máxima, em segundos, antes de recalcular em segundo plano
+RELATORIO_IDADE_MAXIMA = 60
+
+# Busca do admin por nome/telefone (core/busca.py): no MySQL usa o índice FULLTEXT; False usa a tabela de trigramas
+BUSCA_FULLTEXT = True
+
 AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',
 ]